@@ -7,20 +7,53 @@ Ubuntu Health Monitor - Flask API
 ระบบติดตามและวิเคราะห์สถานะเซิร์ฟเวอร์ Ubuntu แบบเรียลไทม์
 """
 
+from utils.startup import ClientFactory, StartupTimer, lazy_import
+
+# วัดเวลา import ของแต่ละ module ตั้งแต่ต้นไฟล์ (ดูได้ที่ /api/v1/self/metrics)
+startup = StartupTimer()
+startup.track_imports()
+
 import os
+import atexit
 import json
+import functools
 import logging
 import platform
 import psutil
-import requests
+import queue
 import subprocess
+import threading
 import time
 from datetime import datetime
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
-from influxdb_client import InfluxDBClient, Point
-from influxdb_client.client.write_api import SYNCHRONOUS
-import openai
+from werkzeug.http import http_date
+
+from utils.alert_cooldown import AlertCooldown
+from utils.collector_scheduler import CollectorScheduler
+from utils.cpu_stat import CpuStatCollector
+from utils.disk_collector import DiskUsageCollector
+from utils.disk_hotspots import DiskHotspotAnalyzer
+from utils.downsample import METHODS as DOWNSAMPLE_METHODS
+from utils.diskstats import DiskStatsCollector
+from utils.fleet import FleetAgent, FleetAggregator, decode_batch
+from utils.forecaster import Forecaster
+from utils.hwmon import HwmonReader
+from utils.log_collector import LogErrorCollector
+from utils.influx_analytics import InfluxAnalytics, parse_duration
+from utils.line_protocol import LineProtocolEncoder
+from utils.plugins import PluginManager, plugin_alerts, plugin_points
+from utils.process_collector import ProcessCollector
+from utils.response_cache import ResponseCache, choose_encoding, etag_matches
+from utils.prometheus_exporter import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsExposition
+from utils.self_metrics import SelfMetrics
+
+# dependency ที่ใช้เฉพาะบาง deployment (AI summary, InfluxDB, Discord, ประวัติข้อมูล) ถูกโหลดเมื่อใช้งานครั้งแรก
+requests = lazy_import("requests", startup)
+influxdb = lazy_import("influxdb_client", startup)
+influxdb_write = lazy_import("influxdb_client.client.write_api", startup)
+data_processor = lazy_import("utils.data_processor", startup)
+series_registry = lazy_import("utils.series_registry", startup)
 
 # ตั้งค่า logging
 if not os.path.exists('logs'):
@@ -46,9 +79,138 @@ except FileNotFoundError:
             "token": "my-token",
             "org": "my-org",
             "bucket": "system_metrics"
-        }
+        },
+        "fleet": {
+            "mode": "standalone",
+            "aggregator_url": "http://localhost:5000",
+            "token": "",
+            "push_interval": 1,
+            "batch_size": 10,
+            "stale_after": 30
+        },
+        "sampler": {
+            "interval": 5
+        },
+        "collectors": {}
     }
 
+# ค่าเริ่มต้นของ fleet mode (standalone, agent หรือ aggregator)
+fleet_settings = {
+    "mode": "standalone",
+    "aggregator_url": "http://localhost:5000",
+    "token": "",
+    "push_interval": 1,
+    "batch_size": 10,
+    "stale_after": 30
+}
+fleet_settings.update(settings.get("fleet", {}))
+
+# ค่าเริ่มต้นของการแจ้งเตือนผ่าน Discord (cooldown แยกตาม host และชนิดของการแจ้งเตือน)
+discord_settings = {
+    "webhook_url": "",
+    "timeout": 10,
+    "cooldown_seconds": 300
+}
+discord_settings.update(settings.get("discord", {}))
+
+# ค่าเริ่มต้นของการเก็บข้อมูลเบื้องหลัง (ใช้สำหรับ /metrics)
+sampler_settings = {
+    "interval": 5
+}
+sampler_settings.update(settings.get("sampler", {}))
+
+# ค่าเริ่มต้นของประวัติข้อมูลในเครื่อง (ใช้สำหรับ /api/v1/history)
+history_settings = {
+    "interval": 60,
+    "max_entries": 50000,
+    "max_points": 5000,
+    "cache_size": 128,
+    "storage": "jsonl",
+    "block_size": 3600,
+    "cold_entries": 0
+}
+history_settings.update(settings.get("history", {}))
+
+# ค่าเริ่มต้นของการวิเคราะห์ข้อมูลระยะยาวใน InfluxDB
+analytics_settings = {
+    "cache_ttl": 300,
+    "time_bucket": 60,
+    "timezone": "UTC",
+    "max_range": "90d"
+}
+analytics_settings.update(settings.get("analytics", {}))
+
+# ค่าเริ่มต้นของการพยากรณ์หน่วยความจำและพื้นที่ดิสก์ (Holt-Winters ที่บันทึกสถานะลงไฟล์)
+forecast_settings = {
+    "state_file": "logs/forecast_state.json",
+    "alpha": 0.2,
+    "beta": 0.02,
+    "gamma": 0.1,
+    "season_slots": 24,
+    "horizon": "30d",
+    "max_horizon": "365d",
+    "save_interval": 300
+}
+forecast_settings.update(settings.get("forecast", {}))
+
+# ค่าเริ่มต้นของการตรวจหาจุดเปลี่ยนระดับการใช้งาน (ใช้ประกอบการสรุปด้วย AI)
+change_point_settings = {
+    "hours": 168,
+    "series": ["cpu", "memory", "swap", "disk"],
+    "min_shift": 5,
+    "min_confidence": 0.9,
+    "max_changes": 5
+}
+change_point_settings.update(settings.get("change_points", {}))
+
+# ค่าเริ่มต้นของการหาไดเรกทอรีที่ใช้พื้นที่มากเมื่อ partition เกิน threshold
+disk_hotspot_settings = {
+    "enabled": True,
+    "workers": 8,
+    "top_n": 10,
+    "depth": 4,
+    "min_interval": 3600,
+    "max_seconds": 600,
+    "full_rescan_interval": 86400,
+    "track_bytes": 16777216,
+    "track_files": 16
+}
+disk_hotspot_settings.update(settings.get("disk_hotspots", {}))
+
+# รอบเวลา, jitter และ budget (วินาทีต่อรอบ) ของ collector แต่ละตัว
+collector_settings = {
+    "cpu": {"interval": 1, "jitter": 0.1, "budget": 0.05},
+    "memory": {"interval": 1, "jitter": 0.1, "budget": 0.05},
+    "disk": {"interval": 30, "jitter": 0.2, "budget": 2, "timeout": 2, "workers": 8,
+             "quarantine_after": 3, "quarantine_seconds": 300},
+    "disk_io": {"interval": 5, "jitter": 0.1, "budget": 0.1},
+    "network": {"interval": 1, "jitter": 0.1, "budget": 0.2},
+    "temperature": {"interval": 1, "jitter": 0.1, "budget": 0.05},
+    "connections": {"interval": 15, "jitter": 0.2, "budget": 1},
+    "processes": {"interval": 5, "jitter": 0.1, "budget": 1, "top_n": 10, "io": True},
+    "logs": {"interval": 15, "jitter": 0.2, "budget": 1, "paths": ["/var/log/syslog", "/var/log/kern.log"],
+             "state_file": "logs/log_offsets.json", "window_minutes": 60, "max_read_bytes": 67108864,
+             "signatures": {}}
+}
+for collector_name, collector_config in settings.get("collectors", {}).items():
+    collector_settings.setdefault(collector_name, {}).update(collector_config)
+
+# ค่าเริ่มต้นของ collector plugins (รันแต่ละตัวใน process แยกและคุม budget ของแต่ละตัว)
+plugin_settings = {
+    "enabled": True,
+    "directory": "plugins",
+    "entry_points": True,
+    "nice": 10,
+    "max_memory_mb": 1024,
+    "disable_after": 3,
+    "max_slowdown": 10,
+    "max_result_bytes": 1048576,
+    "start_timeout": 10,
+    "log_file": "logs/plugins.log",
+    "overrides": {}
+}
+plugin_settings.update(settings.get("plugins", {}))
+
 try:
     with open('config/thresholds.json', 'r') as f:
         thresholds = json.load(f)
@@ -61,17 +223,39 @@ except FileNotFoundError:
         "temperature": 70
     }
 
-# ตั้งค่า OpenAI API
-if settings["openai"]["api_key"]:
+def build_openai_client():
+    """import และตั้งค่า OpenAI API (ถูกเรียกเมื่อขอ AI summary ครั้งแรก)"""
+    import openai
     openai.api_key = settings["openai"]["api_key"]
+    return openai
 
-# ตั้งค่า InfluxDB client
-influxdb_client = InfluxDBClient(
+# ตั้งค่า OpenAI API
+openai_client = ClientFactory(build_openai_client, name="openai", timer=startup)
+
+# ตั้งค่า InfluxDB client (สร้างเมื่อเขียนหรือ query ครั้งแรก)
+influxdb_client = ClientFactory(lambda: influxdb.InfluxDBClient(
     url=settings["influxdb"]["url"],
     token=settings["influxdb"]["token"],
     org=settings["influxdb"]["org"]
+), name="InfluxDBClient", timer=startup)
+write_api = ClientFactory(
+    lambda: influxdb_client.write_api(write_options=influxdb_write.SYNCHRONOUS),
+    name="write_api",
+    timer=startup
+)
+
+# แปลงข้อมูลเป็น line protocol โดย cache ส่วนหัวของแต่ละ series (host/mountpoint/interface) ไว้
+line_encoder = LineProtocolEncoder()
+
+# วิเคราะห์ข้อมูลย้อนหลังใน InfluxDB (aggregate ในฐานข้อมูลและ cache ผลลัพธ์ตาม TTL)
+influx_analytics = InfluxAnalytics(
+    ClientFactory(lambda: influxdb_client.query_api(), name="query_api", timer=startup),
+    bucket=settings["influxdb"]["bucket"],
+    org=settings["influxdb"]["org"],
+    ttl=analytics_settings["cache_ttl"],
+    time_bucket=analytics_settings["time_bucket"],
+    location=analytics_settings["timezone"]
 )
-write_api = influxdb_client.write_api(write_options=SYNCHRONOUS)
 
 # โหลด system prompt
 try:
@@ -94,15 +278,140 @@ except FileNotFoundError:
 app = Flask(__name__)
 CORS(app)
 
-@app.route('/api/v1/system/info', methods=['GET'])
-def get_system_info():
-    """ข้อมูลระบบทั้งหมด"""
-    data = {
+# เก็บข้อมูลพื้นที่ดิสก์แบบมี timeout ต่อ mount
+disk_usage_collector = DiskUsageCollector(
+    timeout=collector_settings["disk"].get("timeout", 2),
+    max_workers=collector_settings["disk"].get("workers", 8),
+    quarantine_after=collector_settings["disk"].get("quarantine_after", 3),
+    quarantine_seconds=collector_settings["disk"].get("quarantine_seconds", 300)
+)
+
+# คำนวณการใช้ CPU จากผลต่างของ /proc/stat (ไม่ต้อง sleep)
+cpu_stat_collector = CpuStatCollector()
+
+# เก็บสถิติ I/O ของแต่ละดิสก์จาก /proc/diskstats
+disk_stats_collector = DiskStatsCollector()
+
+# อ่านอุณหภูมิจาก hwmon โดยเปิดไฟล์ค้างไว้
+hwmon_reader = HwmonReader()
+
+# เก็บข้อมูล process จาก /proc (คำนวณ CPU% จากผลต่างระหว่างรอบ)
+process_collector = ProcessCollector(
+    top_n=collector_settings["processes"].get("top_n", 10),
+    collect_io=collector_settings["processes"].get("io", True)
+)
+
+# นับข้อผิดพลาดจาก syslog/kern.log/journal export โดยอ่านเฉพาะส่วนที่เพิ่มขึ้นจาก offset ที่บันทึกไว้
+log_collector = LogErrorCollector(
+    paths=collector_settings["logs"].get("paths", ["/var/log/syslog", "/var/log/kern.log"]),
+    state_file=collector_settings["logs"].get("state_file", "logs/log_offsets.json"),
+    signatures=collector_settings["logs"].get("signatures"),
+    window_minutes=collector_settings["logs"].get("window_minutes", 60),
+    max_read_bytes=collector_settings["logs"].get("max_read_bytes", 67108864)
+)
+
+# collector plugins จากไดเรกทอรี plugins/ และ entry points (เริ่มทำงานเมื่อรัน app.py โดยตรง)
+plugin_manager = PluginManager(
+    directory=plugin_settings["directory"],
+    entry_points=plugin_settings["entry_points"],
+    overrides=plugin_settings["overrides"],
+    thresholds=thresholds.get("plugins", {}),
+    nice=plugin_settings["nice"],
+    max_memory_mb=plugin_settings["max_memory_mb"],
+    disable_after=plugin_settings["disable_after"],
+    max_slowdown=plugin_settings["max_slowdown"],
+    max_result_bytes=plugin_settings["max_result_bytes"],
+    start_timeout=plugin_settings["start_timeout"],
+    log_file=plugin_settings["log_file"]
+)
+
+# จำกัดการส่งการแจ้งเตือนซ้ำ (สำคัญใน aggregator mode ที่ตรวจ thresholds ของทุก host ทุกตัวอย่าง)
+alert_cooldown = AlertCooldown(seconds=discord_settings["cooldown_seconds"])
+
+# วัดเวลาการทำงานภายในของ monitor เอง
+self_metrics = SelfMetrics()
+self_metrics.gauge("process.threads", threading.active_count)
+
+# Prometheus exposition ที่ถูก render หนึ่งครั้งต่อรอบการเก็บข้อมูล
+metrics_exposition = MetricsExposition()
+
+# JSON response ที่ serialize ไว้แล้วของแต่ละ snapshot
+response_cache = ResponseCache()
+
+# ประวัติข้อมูลในเครื่องและ cache ของผลลัพธ์ที่ downsample แล้ว (แยกตามช่วงเวลาและความละเอียด)
+# (โหลดจากไฟล์เมื่อใช้งานครั้งแรก เพราะ agent ไม่ใช้และไฟล์ประวัติอาจมีขนาดใหญ่)
+history = ClientFactory(lambda: data_processor.DataProcessor(
+    max_entries=history_settings["max_entries"],
+    storage=history_settings["storage"],
+    block_size=history_settings["block_size"],
+    cold_entries=history_settings["cold_entries"]
+), name="history", timer=startup)
+history_cache = ResponseCache(max_entries=history_settings["cache_size"])
+HISTORY_METRICS = ("cpu", "memory", "swap", "disk", "network_sent", "network_recv", "temperature")
+
+# พยากรณ์หน่วยความจำและพื้นที่ดิสก์ของแต่ละ partition (series: "memory", "disk:<mountpoint>")
+forecaster = Forecaster(
+    state_file=forecast_settings["state_file"],
+    alpha=forecast_settings["alpha"],
+    beta=forecast_settings["beta"],
+    gamma=forecast_settings["gamma"],
+    season_slots=forecast_settings["season_slots"],
+    save_interval=forecast_settings["save_interval"]
+)
+
+# หาไดเรกทอรีที่ใหญ่ที่สุดและโตเร็วที่สุดของ partition ที่เกิน threshold (สแกนในเบื้องหลัง)
+disk_hotspots = DiskHotspotAnalyzer(
+    workers=disk_hotspot_settings["workers"],
+    top_n=disk_hotspot_settings["top_n"],
+    depth=disk_hotspot_settings["depth"],
+    min_interval=disk_hotspot_settings["min_interval"],
+    max_seconds=disk_hotspot_settings["max_seconds"],
+    full_rescan_interval=disk_hotspot_settings["full_rescan_interval"],
+    track_bytes=disk_hotspot_settings["track_bytes"],
+    track_files=disk_hotspot_settings["track_files"]
+)
+
+@app.before_request
+def start_request_timer():
+    """เริ่มจับเวลา request"""
+    g.request_started = time.perf_counter()
+    startup.first_request()
+
+@app.after_request
+def record_request_timer(response):
+    """บันทึกเวลาที่ใช้ของแต่ละ route"""
+    started = getattr(g, "request_started", None)
+    if started is not None:
+        rule = request.url_rule.rule if request.url_rule else "unmatched"
+        name = f"route.{request.method} {rule}"
+        self_metrics.observe(name, time.perf_counter() - started)
+        if response.status_code >= 500:
+            self_metrics.increment(f"{name}.5xx")
+    return response
+
+@app.teardown_request
+def record_request_error(exc):
+    """นับ exception ที่ไม่ได้ถูกจัดการใน route"""
+    if exc is not None:
+        rule = request.url_rule.rule if request.url_rule else "unmatched"
+        self_metrics.error(f"route.{request.method} {rule}", exc)
+
+# collectors ที่รวมอยู่ใน snapshot ของ /api/v1/system/info
+SNAPSHOT_SECTIONS = ("cpu", "memory", "disk", "disk_io", "network", "temperature", "connections", "logs")
+
+def collect_system_data():
+    """เก็บข้อมูลระบบทั้งหมดหนึ่งตัวอย่าง (ใช้ผลล่าสุดจาก scheduler ถ้าทำงานอยู่)"""
+    if collector_scheduler.running:
+        return assemble_snapshot(*collector_scheduler.snapshot(SNAPSHOT_SECTIONS))
+    
+    return {
         "cpu": get_cpu_info(),
         "memory": get_memory_info(),
-        "disk": get_disk_info(),
+        "disk": merge_sections({"disk": get_disk_info(), "disk_io": get_disk_io_info()}, ("disk", "disk_io")),
         "network": get_network_info(),
         "temperature": get_temperature_info(),
+        "logs": get_log_errors(),
+        "plugins": plugin_manager.snapshot(),
         "system": {
             "platform": platform.platform(),
             "hostname": platform.node(),
@@ -111,7 +420,97 @@ def get_system_info():
             "timestamp": datetime.now().isoformat()
         }
     }
+
+def collect_section(name):
+    """ดึงข้อมูลของ collector หนึ่งตัว (ใช้ผลล่าสุดจาก scheduler ถ้าทำงานอยู่)"""
+    if collector_scheduler.running:
+        return collector_scheduler.latest(name)[0]
+    return collector_scheduler.collectors[name].func()
+
+def assemble_snapshot(results, collected_at):
+    """รวมผลล่าสุดของแต่ละ collector พร้อมเวลาที่เก็บข้อมูลแยกตาม section"""
+    network = dict(results["network"])
+    network["connections"] = results["connections"]
+    disk = dict(results["disk"])
+    disk["devices"] = results["disk_io"]
     
+    return {
+        "cpu": results["cpu"],
+        "memory": results["memory"],
+        "disk": disk,
+        "network": network,
+        "temperature": results["temperature"],
+        "logs": results["logs"],
+        "plugins": plugin_manager.snapshot(),
+        "system": {
+            "platform": platform.platform(),
+            "hostname": platform.node(),
+            "kernel": platform.release(),
+            "uptime": get_uptime(),
+            "timestamp": datetime.fromtimestamp(max((ts for ts in collected_at.values() if ts), default=time.time())).isoformat()
+        },
+        "timestamps": {
+            section: datetime.fromtimestamp(ts).isoformat() if ts else None
+            for section, ts in collected_at.items()
+        }
+    }
+
+def cached_json_response(key, version, build, last_modified=None, cache=None):
+    """ส่ง JSON ที่ serialize ไว้แล้ว พร้อมรองรับ ETag/If-None-Match, If-Modified-Since และการบีบอัด"""
+    entry = (cache or response_cache).get(key, version, build, last_modified)
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": http_date(entry.last_modified),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    }
+    
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        if etag_matches(if_none_match, entry.etag):
+            return Response(status=304, headers=headers)
+    elif request.if_modified_since is not None:
+        if int(entry.last_modified) <= request.if_modified_since.timestamp():
+            return Response(status=304, headers=headers)
+    
+    encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(entry.encoded(encoding), headers=headers, content_type="application/json")
+
+def section_response(*names):
+    """response ของ collector ตั้งแต่หนึ่งตัวขึ้นไป (serialize ใหม่เฉพาะเมื่อมีผลใหม่)"""
+    if not collector_scheduler.running:
+        results = {name: collector_scheduler.collectors[name].func() for name in names}
+        return cached_json_response(f"system/{names[0]}", None, lambda: merge_sections(results, names))
+    
+    results = {}
+    collected_at = []
+    for name in names:
+        results[name], ts = collector_scheduler.latest(name)
+        collected_at.append(ts)
+    
+    return cached_json_response(
+        f"system/{names[0]}",
+        tuple(collected_at),
+        lambda: merge_sections(results, names),
+        last_modified=max((ts for ts in collected_at if ts), default=None)
+    )
+
+def merge_sections(results, names):
+    """รวมผลของหลาย collector (network รวม connections, disk รวม devices)"""
+    if names == ("network", "connections"):
+        network = dict(results["network"])
+        network["connections"] = results["connections"]
+        return network
+    if names == ("disk", "disk_io"):
+        disk = dict(results["disk"])
+        disk["devices"] = results["disk_io"]
+        return disk
+    return results[names[0]]
+
+def process_system_data(data):
+    """บันทึกข้อมูลลง InfluxDB และตรวจสอบ thresholds (หนึ่งครั้งต่อ snapshot)"""
     # เก็บข้อมูลลง InfluxDB
     try:
         store_in_influxdb(data)
@@ -121,32 +520,237 @@ def get_system_info():
     # ตรวจสอบ thresholds และส่งการแจ้งเตือนถ้าจำเป็น
     check_thresholds(data)
     
-    return jsonify(data)
+    return data
+
+@app.route('/api/v1/system/info', methods=['GET'])
+def get_system_info():
+    """ข้อมูลระบบทั้งหมด"""
+    if not collector_scheduler.running:
+        return cached_json_response("system/info", None, lambda: process_system_data(collect_system_data()))
+    
+    results, collected_at = collector_scheduler.snapshot(SNAPSHOT_SECTIONS)
+    return cached_json_response(
+        "system/info",
+        (tuple(sorted(collected_at.items())), plugin_manager.version()),
+        lambda: process_system_data(assemble_snapshot(results, collected_at)),
+        last_modified=max((ts for ts in collected_at.values() if ts), default=None)
+    )
 
 @app.route('/api/v1/system/cpu', methods=['GET'])
 def get_cpu_endpoint():
     """ข้อมูล CPU"""
-    return jsonify(get_cpu_info())
+    return section_response("cpu")
 
 @app.route('/api/v1/system/memory', methods=['GET'])
 def get_memory_endpoint():
     """ข้อมูล Memory"""
-    return jsonify(get_memory_info())
+    return section_response("memory")
 
 @app.route('/api/v1/system/disk', methods=['GET'])
 def get_disk_endpoint():
     """ข้อมูล Disk"""
-    return jsonify(get_disk_info())
+    return section_response("disk", "disk_io")
 
 @app.route('/api/v1/system/network', methods=['GET'])
 def get_network_endpoint():
     """ข้อมูล Network"""
-    return jsonify(get_network_info())
+    return section_response("network", "connections")
 
 @app.route('/api/v1/system/temperature', methods=['GET'])
 def get_temperature_endpoint():
     """ข้อมูลอุณหภูมิ"""
-    return jsonify(get_temperature_info())
+    return section_response("temperature")
+
+@app.route('/api/v1/system/processes', methods=['GET'])
+def get_processes_endpoint():
+    """process ที่ใช้ CPU, หน่วยความจำ และ I/O มากที่สุด"""
+    return section_response("processes")
+
+@app.route('/api/v1/system/logs', methods=['GET'])
+def get_logs_endpoint():
+    """จำนวนข้อผิดพลาดจาก log แยกตาม signature, unit และนาที"""
+    return section_response("logs")
+
+@app.route('/api/v1/plugins', methods=['GET'])
+def get_plugins_endpoint():
+    """สถานะ, เวลาที่ใช้และจำนวนข้อผิดพลาดของแต่ละ collector plugin"""
+    return jsonify(plugin_manager.stats())
+
+@app.route('/api/v1/plugins/<name>', methods=['GET'])
+def get_plugin_data_endpoint(name):
+    """ผลล่าสุดของ collector plugin (จาก cache เสมอ ไม่รอ plugin)"""
+    plugin = plugin_manager.snapshot().get(name)
+    if plugin is None:
+        return jsonify({"error": f"ไม่มีข้อมูลของ plugin: {name}"}), 404
+    return jsonify(plugin)
+
+@app.route('/api/v1/plugins/<name>/enable', methods=['POST'])
+def enable_plugin_endpoint(name):
+    """เปิด plugin ที่ถูกปิดเพราะเกิน budget หรือทำงานผิดพลาดอีกครั้ง"""
+    if not plugin_manager.enable(name):
+        return jsonify({"error": f"ไม่พบ plugin: {name}"}), 404
+    return jsonify(plugin_manager.stats()[name])
+
+def parse_time_param(value):
+    """แปลงพารามิเตอร์เวลา (epoch seconds หรือ ISO 8601) เป็น epoch time"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value).timestamp()
+
+@app.route('/api/v1/history', methods=['GET'])
+def get_history():
+    """ประวัติของ series จากข้อมูลในเครื่อง (downsample ให้ไม่เกินจำนวนจุดที่ขอ)"""
+    metric = request.args.get('metric', 'cpu')
+    label = request.args.get('mountpoint') or request.args.get('interface') or request.args.get('sensor')
+    method = request.args.get('method', 'lttb')
+    from_param = request.args.get('from')
+    to_param = request.args.get('to')
+    
+    if metric not in HISTORY_METRICS:
+        return jsonify({"error": f"metric ต้องเป็นหนึ่งใน {', '.join(HISTORY_METRICS)}"}), 400
+    if method not in DOWNSAMPLE_METHODS:
+        return jsonify({"error": f"method ต้องเป็นหนึ่งใน {', '.join(DOWNSAMPLE_METHODS)}"}), 400
+    try:
+        points = int(request.args.get('points', 500))
+        start = parse_time_param(from_param)
+        end = parse_time_param(to_param)
+    except ValueError:
+        return jsonify({"error": "from, to หรือ points ไม่ถูกต้อง"}), 400
+    if not 1 <= points <= history_settings["max_points"]:
+        return jsonify({"error": f"points ต้องอยู่ระหว่าง 1 ถึง {history_settings['max_points']}"}), 400
+    
+    if metric == "disk" and label is None:
+        label = "/"
+    series = series_registry.series_name(metric, label)
+    available = history.series_names()
+    if available and series not in available:
+        return jsonify({
+            "error": f"ไม่พบ series: {series}",
+            "series": [name for name in available if series_registry.parse_series_name(name)[0] == metric]
+        }), 404
+    
+    def build():
+        range_end = end if end is not None else time.time()
+        range_start = start if start is not None else range_end - 86400
+        timestamps, values = history.get_series(series, range_start, range_end)
+        sampled_times, sampled_values = DOWNSAMPLE_METHODS[method](timestamps, values, points)
+        return {
+            "metric": metric,
+            "series": series,
+            "method": method,
+            "from": datetime.fromtimestamp(range_start).isoformat(),
+            "to": datetime.fromtimestamp(range_end).isoformat(),
+            "raw_points": len(timestamps),
+            "points": len(sampled_times),
+            "timestamps": [int(ts) for ts in sampled_times],
+            "values": [round(value, 2) for value in sampled_values]
+        }
+    
+    # ผลลัพธ์ถูก cache ตามช่วงเวลาและความละเอียดจนกว่าจะมีข้อมูลใหม่
+    return cached_json_response(
+        f"history/{series}/{from_param}/{to_param}/{points}/{method}",
+        history.version(),
+        build,
+        last_modified=history.last_timestamp(),
+        cache=history_cache
+    )
+
+@app.route('/api/v1/analytics/<kind>', methods=['GET'])
+def get_analytics(kind):
+    """วิเคราะห์ข้อมูลย้อนหลังจาก InfluxDB (average, percentiles, peak-hours, trend)"""
+    metric = request.args.get('metric', 'cpu')
+    host = request.args.get('host') or None
+    mountpoint = request.args.get('mountpoint') or None
+    
+    try:
+        range_seconds = parse_duration(request.args.get('range', '30d' if kind == 'trend' else '7d'))
+        if range_seconds > parse_duration(analytics_settings["max_range"]):
+            return jsonify({"error": f"range ต้องไม่เกิน {analytics_settings['max_range']}"}), 400
+        
+        if kind == 'average':
+            hours = None
+            if request.args.get('hours'):
+                start_hour, stop_hour = (int(value) for value in request.args['hours'].split('-'))
+                if not (0 <= start_hour <= 23 and 0 <= stop_hour <= 23):
+                    raise ValueError("hours ต้องอยู่ในรูปแบบ start-stop เช่น 9-17")
+                hours = (start_hour, stop_hour)
+            result = influx_analytics.get_average(metric, range_seconds, host, mountpoint, hours)
+        elif kind == 'percentiles':
+            result = influx_analytics.get_percentiles(metric, range_seconds, host, mountpoint)
+        elif kind == 'peak-hours':
+            result = influx_analytics.get_peak_usage_times(metric, range_seconds, host, mountpoint)
+        elif kind == 'trend':
+            days = int(request.args.get('days', 7))
+            if not 1 <= days <= 90:
+                raise ValueError("days ต้องอยู่ระหว่าง 1 ถึง 90")
+            result = influx_analytics.predict_usage_trend(metric, range_seconds, days, host, mountpoint)
+        else:
+            return jsonify({"error": f"ไม่รองรับการวิเคราะห์: {kind}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        self_metrics.error("influxdb.query", e)
+        logging.error(f"ไม่สามารถ query InfluxDB: {str(e)}")
+        return jsonify({"error": f"ไม่สามารถ query InfluxDB: {str(e)}"}), 502
+    
+    result["range"] = request.args.get('range', '30d' if kind == 'trend' else '7d')
+    return jsonify(result)
+
+def forecast_threshold(name):
+    """threshold เริ่มต้นของ series (จาก thresholds.json)"""
+    if name == "memory":
+        return thresholds["memory_percent"]
+    return thresholds["disk_percent"]
+
+@app.route('/api/v1/forecast', methods=['GET'])
+def get_forecast():
+    """พยากรณ์หน่วยความจำและพื้นที่ดิสก์ พร้อมช่วงความเชื่อมั่นและเวลาที่จะถึง threshold"""
+    series = request.args.get('series')
+    horizon_param = request.args.get('horizon', forecast_settings["horizon"])
+    threshold_param = request.args.get('threshold')
+    
+    try:
+        horizon = parse_duration(horizon_param)
+        threshold = float(threshold_param) if threshold_param is not None else None
+        points = int(request.args.get('points', 48))
+    except ValueError:
+        return jsonify({"error": "horizon, threshold หรือ points ไม่ถูกต้อง"}), 400
+    if horizon > parse_duration(forecast_settings["max_horizon"]):
+        return jsonify({"error": f"horizon ต้องไม่เกิน {forecast_settings['max_horizon']}"}), 400
+    if not 1 <= points <= 1000:
+        return jsonify({"error": "points ต้องอยู่ระหว่าง 1 ถึง 1000"}), 400
+    
+    names = forecaster.names()
+    if series is not None:
+        if series not in names:
+            return jsonify({"error": f"ไม่พบ series: {series}"}), 404
+        names = [series]
+    
+    def build():
+        return {
+            "horizon": horizon_param,
+            "series": {
+                name: forecaster.forecast(
+                    name,
+                    horizon,
+                    threshold if threshold is not None else forecast_threshold(name),
+                    points
+                )
+                for name in names
+            }
+        }
+    
+    return cached_json_response(
+        f"forecast/{series}/{horizon_param}/{threshold_param}/{points}",
+        forecaster.version(),
+        build
+    )
 
 @app.route('/api/v1/system/summary', methods=['GET'])
 def get_ai_summary():
@@ -156,11 +760,14 @@ def get_ai_summary():
     
     # ดึงข้อมูลระบบ
     system_data = {
-        "cpu": get_cpu_info(),
-        "memory": get_memory_info(),
-        "disk": get_disk_info(),
-        "temperature": get_temperature_info(),
-        "uptime": get_uptime()
+        "cpu": collect_section("cpu"),
+        "memory": collect_section("memory"),
+        "disk": collect_section("disk"),
+        "temperature": collect_section("temperature"),
+        "processes": summarize_processes(collect_section("processes")),
+        "log_errors": (collect_section("logs") or {}).get("totals"),
+        "uptime": get_uptime(),
+        "changes": recent_change_points()
     }
     
     try:
@@ -168,15 +775,19 @@ def get_ai_summary():
         prompt = system_summary_prompt.format(system_data=json.dumps(system_data, indent=2))
         
         # เรียกใช้ OpenAI API
-        response = openai.ChatCompletion.create(
-            model=settings["openai"]["model"],
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": "วิเคราะห์สถานะระบบปัจจุบัน"}
-            ],
-            temperature=0.3,
-            max_tokens=800
-        )
+        started = time.perf_counter()
+        try:
+            response = openai_client.ChatCompletion.create(
+                model=settings["openai"]["model"],
+                messages=[
+                    {"role": "system", "content": prompt},
+                    {"role": "user", "content": "วิเคราะห์สถานะระบบปัจจุบัน"}
+                ],
+                temperature=0.3,
+                max_tokens=800
+            )
+        finally:
+            self_metrics.observe("openai.chat_completion", time.perf_counter() - started)
         
         summary = response.choices[0].message.content
         
@@ -187,29 +798,133 @@ def get_ai_summary():
         })
     
     except Exception as e:
+        self_metrics.error("openai.chat_completion", e)
         logging.error(f"ไม่สามารถวิเคราะห์ข้อมูลด้วย OpenAI: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/v1/fleet/ingest', methods=['POST'])
+def fleet_ingest():
+    """รับ batch ข้อมูลจาก agent (เฉพาะ aggregator mode)"""
+    if fleet_aggregator is None:
+        return jsonify({"error": "Fleet aggregator ไม่ได้เปิดใช้งาน"}), 404
+    
+    if fleet_settings["token"]:
+        if request.headers.get("Authorization") != f"Bearer {fleet_settings['token']}":
+            return jsonify({"error": "Unauthorized"}), 401
+    
+    try:
+        samples = decode_batch(request.get_data(), request.headers.get("Content-Encoding"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        result = fleet_aggregator.ingest(samples)
+    except queue.Full:
+        return jsonify({"error": "Aggregator กำลังประมวลผลไม่ทัน กรุณาส่งใหม่ภายหลัง"}), 503
+    
+    return jsonify(result), 202
+
+@app.route('/api/v1/fleet/hosts', methods=['GET'])
+def get_fleet_hosts():
+    """สรุปสถานะของทุก host ใน fleet"""
+    if fleet_aggregator is None:
+        return jsonify({"error": "Fleet aggregator ไม่ได้เปิดใช้งาน"}), 404
+    
+    return jsonify({
+        "summary": fleet_aggregator.summary(),
+        "hosts": fleet_aggregator.hosts()
+    })
+
+@app.route('/api/v1/fleet/hosts/<hostname>', methods=['GET'])
+def get_fleet_host(hostname):
+    """ข้อมูลล่าสุดของ host ที่ระบุ"""
+    if fleet_aggregator is None:
+        return jsonify({"error": "Fleet aggregator ไม่ได้เปิดใช้งาน"}), 404
+    
+    sample = fleet_aggregator.host(hostname)
+    if sample is None:
+        return jsonify({"error": f"ไม่พบ host {hostname}"}), 404
+    
+    return jsonify(sample)
+
+@app.route('/api/v1/disk/hotspots', methods=['GET'])
+def get_disk_hotspots():
+    """ไดเรกทอรีที่ใหญ่ที่สุดและโตเร็วที่สุดจากการสแกนล่าสุดของแต่ละ mountpoint"""
+    mountpoint = request.args.get('mountpoint')
+    if mountpoint is None:
+        return jsonify({
+            "mountpoints": dict(disk_hotspots.results),
+            "scanning": disk_hotspots.scanning()
+        })
+    
+    result = disk_hotspots.results.get(mountpoint)
+    if result is None:
+        return jsonify({
+            "error": f"ยังไม่มีผลการวิเคราะห์ของ {mountpoint}",
+            "scanning": disk_hotspots.is_scanning(mountpoint),
+            "mountpoints": sorted(disk_hotspots.results)
+        }), 404
+    
+    return jsonify(dict(result, scanning=disk_hotspots.is_scanning(mountpoint)))
+
+@app.route('/api/v1/disk/hotspots', methods=['POST'])
+def scan_disk_hotspots():
+    """เริ่มสแกน mountpoint ที่ระบุในเบื้องหลัง (ดูผลได้ที่ GET /api/v1/disk/hotspots)"""
+    mountpoint = (request.get_json(silent=True) or {}).get('mountpoint') or request.args.get('mountpoint')
+    mountpoints = [partition["mountpoint"] for partition in get_disk_info()["partitions"]]
+    if mountpoint not in mountpoints:
+        return jsonify({"error": f"ไม่พบ mountpoint {mountpoint}", "mountpoints": mountpoints}), 404
+    
+    if not disk_hotspots.request_scan(mountpoint, force=True):
+        return jsonify({"error": f"กำลังสแกน {mountpoint} อยู่", "scanning": True}), 409
+    
+    return jsonify({"mountpoint": mountpoint, "scanning": True}), 202
+
+@app.route('/metrics', methods=['GET'])
+def get_prometheus_metrics():
+    """Prometheus exposition ที่ render ไว้แล้วจากรอบการเก็บข้อมูลล่าสุด"""
+    # exposition ถูกเก็บไว้เฉพาะแบบ gzip (เคารพ q=0 ของ Accept-Encoding)
+    accept_gzip = choose_encoding(request.headers.get('Accept-Encoding'), supported=("gzip",)) == "gzip"
+    body, encoding = metrics_exposition.get(accept_gzip)
+    if body is None:
+        return Response("# metrics are not sampled yet\n", status=503, mimetype="text/plain")
+    
+    response = Response(body, content_type=METRICS_CONTENT_TYPE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+@app.route('/api/v1/self/metrics', methods=['GET'])
+def get_self_metrics():
+    """เวลาที่ใช้, จำนวนข้อผิดพลาด และ queue depth ของการทำงานภายใน monitor"""
+    data = self_metrics.snapshot()
+    data["collectors"] = collector_scheduler.stats()
+    data["disk_mounts"] = disk_usage_collector.stats()
+    data["response_cache"] = response_cache.stats()
+    data["history_cache"] = {key: value for key, value in history_cache.stats().items() if key != "entries"}
+    data["history_cache"]["entries"] = len(history_cache.entries)
+    data["analytics_cache"] = influx_analytics.cache.stats()
+    data["plugins"] = plugin_manager.stats()
+    data["startup"] = startup.report()
+    return jsonify(data)
+
+@self_metrics.timed("collector.cpu")
 def get_cpu_info():
     """ดึงข้อมูล CPU"""
-    cpu_percent = psutil.cpu_percent(interval=1)
+    # เปอร์เซ็นต์คำนวณจากผลต่างกับ /proc/stat รอบก่อน จึงไม่ต้อง sleep
+    cpu_stat = cpu_stat_collector.collect()
     cpu_freq = psutil.cpu_freq()
     load_avg = os.getloadavg()
     
-    try:
-        # ดึงข้อมูล CPU จาก lscpu
-        cpu_info = subprocess.check_output(['lscpu'], text=True)
-        cpu_model = ""
-        
-        for line in cpu_info.split('\n'):
-            if 'Model name' in line:
-                cpu_model = line.split(':')[1].strip()
-                break
-    except:
-        cpu_model = "Unknown"
-    
     return {
-        "percent": cpu_percent,
+        "percent": cpu_stat["percent"],
+        "times_percent": cpu_stat["times_percent"],
+        "per_core": cpu_stat["per_core"],
+        "context_switches_per_sec": cpu_stat["context_switches_per_sec"],
+        "interrupts_per_sec": cpu_stat["interrupts_per_sec"],
+        "procs_running": cpu_stat["procs_running"],
+        "procs_blocked": cpu_stat["procs_blocked"],
         "cores": {
             "physical": psutil.cpu_count(logical=False),
             "logical": psutil.cpu_count(logical=True)
@@ -224,9 +939,22 @@ def get_cpu_info():
             "5min": load_avg[1],
             "15min": load_avg[2]
         },
-        "model": cpu_model
+        "model": get_cpu_model()
     }
 
+@functools.lru_cache(maxsize=None)
+def get_cpu_model():
+    """ชื่อรุ่น CPU จาก lscpu (อ่านครั้งเดียวเพราะไม่เปลี่ยนระหว่างที่โปรแกรมทำงาน)"""
+    try:
+        cpu_info = subprocess.check_output(['lscpu'], text=True)
+        for line in cpu_info.split('\n'):
+            if 'Model name' in line:
+                return line.split(':')[1].strip()
+        return ""
+    except:
+        return "Unknown"
+
+@self_metrics.timed("collector.memory")
 def get_memory_info():
     """ดึงข้อมูล Memory"""
     mem = psutil.virtual_memory()
@@ -247,22 +975,11 @@ def get_memory_info():
         }
     }
 
+@self_metrics.timed("collector.disk")
 def get_disk_info():
     """ดึงข้อมูล Disk"""
-    partitions = []
-    
-    for part in psutil.disk_partitions(all=False):
-        if os.path.exists(part.mountpoint):
-            usage = psutil.disk_usage(part.mountpoint)
-            partitions.append({
-                "device": part.device,
-                "mountpoint": part.mountpoint,
-                "fstype": part.fstype,
-                "total": usage.total,
-                "used": usage.used,
-                "free": usage.free,
-                "percent": usage.percent
-            })
+    # statvfs ทำงานใน worker pool พร้อม timeout เพื่อไม่ให้ mount ที่ค้างทำให้ API ค้าง
+    partitions = disk_usage_collector.collect()
     
     # รวมข้อมูล I/O
     try:
@@ -283,8 +1000,26 @@ def get_disk_info():
         "io": io
     }
 
+@self_metrics.timed("collector.disk_io")
+def get_disk_io_info():
+    """ดึงสถิติ I/O ของแต่ละดิสก์ (IOPS, throughput, await, queue size และ %util)"""
+    try:
+        return disk_stats_collector.collect()
+    except Exception as e:
+        logging.error(f"ไม่สามารถอ่าน /proc/diskstats: {str(e)}")
+        return {}
+
+@self_metrics.timed("collector.network")
 def get_network_info():
     """ดึงข้อมูล Network"""
+    return {
+        "interfaces": get_interface_info(),
+        "connections": get_connection_info()
+    }
+
+@self_metrics.timed("collector.interfaces")
+def get_interface_info():
+    """ดึงข้อมูล address และ I/O ของแต่ละ interface"""
     interfaces = {}
     
     # รวมข้อมูล interface
@@ -322,9 +1057,17 @@ def get_network_info():
     except:
         pass
     
-    # ดึงข้อมูล connections
+    return interfaces
+
+@self_metrics.timed("collector.connections")
+def get_connection_info():
+    """นับจำนวน connections แยกตามสถานะ"""
     try:
-        connections = psutil.net_connections(kind='inet')
+        started = time.perf_counter()
+        try:
+            connections = psutil.net_connections(kind='inet')
+        finally:
+            self_metrics.observe("collector.network.net_connections", time.perf_counter() - started)
         conn_stats = {
             "established": 0,
             "listen": 0,
@@ -348,37 +1091,80 @@ def get_network_info():
     except:
         conn_stats = None
     
-    return {
-        "interfaces": interfaces,
-        "connections": conn_stats
-    }
+    return conn_stats
 
+@self_metrics.timed("collector.temperature")
 def get_temperature_info():
     """ดึงข้อมูลอุณหภูมิ"""
-    temps = {}
-    
     try:
-        # ดึงข้อมูลอุณหภูมิจาก psutil
-        temps_psutil = psutil.sensors_temperatures()
-        for chip, sensors in temps_psutil.items():
-            temps[chip] = []
-            for sensor in sensors:
-                temps[chip].append({
-                    "label": sensor.label,
-                    "current": sensor.current,
-                    "high": sensor.high,
-                    "critical": sensor.critical
-                })
-    except:
-        try:
-            # ถ้า psutil ไม่ทำงาน ลองใช้ lm-sensors
-            sensors_output = subprocess.check_output(['sensors', '-j'], text=True)
-            temps = json.loads(sensors_output)
-        except:
-            temps = {"error": "ไม่สามารถดึงข้อมูลอุณหภูมิได้"}
+        # อ่านเฉพาะ temp*_input ที่เปิดไว้แล้ว (ค้นหา sensors ใหม่เมื่อ hwmon device เปลี่ยน)
+        return hwmon_reader.read()
+    except Exception as e:
+        logging.error(f"ไม่สามารถอ่านข้อมูลอุณหภูมิ: {str(e)}")
+        return {"error": "ไม่สามารถดึงข้อมูลอุณหภูมิได้"}
+
+@self_metrics.timed("collector.processes")
+def get_process_info():
+    """ดึงข้อมูล process ที่ใช้ทรัพยากรมากที่สุด"""
+    return process_collector.collect()
+
+@self_metrics.timed("collector.logs")
+def get_log_errors():
+    """นับข้อผิดพลาดในส่วนที่เพิ่มขึ้นของไฟล์ log"""
+    try:
+        return log_collector.collect()
+    except Exception as e:
+        logging.error(f"ไม่สามารถอ่านไฟล์ log: {str(e)}")
+        return {"error": "ไม่สามารถนับข้อผิดพลาดจาก log ได้"}
+
+def recent_change_points():
+    """จุดที่ระดับการใช้งานเปลี่ยนไปอย่างถาวรในประวัติข้อมูล (เฉพาะที่มั่นใจพอ) สำหรับ prompt ของ AI"""
+    try:
+        results = history.detect_change_points(
+            hours=change_point_settings["hours"],
+            series=change_point_settings["series"],
+            min_shift=change_point_settings["min_shift"],
+            max_changes=change_point_settings["max_changes"]
+        )
+    except Exception as e:
+        logging.error(f"ไม่สามารถตรวจหาจุดเปลี่ยนของประวัติข้อมูล: {str(e)}")
+        return {"error": "ไม่สามารถตรวจหาจุดเปลี่ยนได้"}
+    if "error" in results:
+        return results
     
-    return temps
+    changes = {}
+    for name, points in results.items():
+        confident = [
+            {key: point[key] for key in ("time", "mean_before", "mean_after", "change", "confidence")}
+            for point in points
+            if point["confidence"] >= change_point_settings["min_confidence"]
+        ]
+        if confident:
+            changes[name] = confident
+    return changes
 
+def summarize_processes(processes, limit=5):
+    """ย่อข้อมูล process ให้เหลือเฉพาะที่จำเป็นสำหรับ prompt ของ AI"""
+    if not processes or "error" in processes:
+        return processes
+    
+    def brief(proc):
+        return {
+            "pid": proc["pid"],
+            "name": proc["name"],
+            "user": proc["user"],
+            "cpu_percent": proc["cpu_percent"],
+            "rss_mb": round(proc["rss"] / (1024 * 1024), 1)
+        }
+    
+    return {
+        "count": processes["count"],
+        "states": processes["states"],
+        "top_cpu": [brief(proc) for proc in processes["top_cpu"][:limit]],
+        "top_memory": [brief(proc) for proc in processes["top_memory"][:limit]]
+    }
+
+@self_metrics.timed("collector.uptime")
 def get_uptime():
     """ดึงข้อมูล uptime"""
     try:
@@ -408,79 +1194,138 @@ def format_uptime(seconds):
     else:
         return f"{int(minutes)} นาที, {int(seconds)} วินาที"
 
-def store_in_influxdb(data):
-    """เก็บข้อมูลลง InfluxDB"""
-    timestamp = datetime.utcnow()
+@self_metrics.timed("influxdb.write")
+def store_in_influxdb(data, api=None, timestamp=None):
+    """เก็บข้อมูลลง InfluxDB (แปลงทั้ง snapshot เป็น line protocol buffer เดียว)"""
+    if api is None:
+        api = write_api
+    if timestamp is None:
+        timestamp = datetime.utcnow()
+    host = (("host", data["system"]["hostname"]),)
+    points = []
+    # section ที่ collector ยังไม่มีผลลัพธ์จะเป็น {"error": ...} จึงข้ามไปทีละ section
+    cpu = data["cpu"]
+    memory = data["memory"]
+    disk = data["disk"]
+    devices = disk.get("devices") or {}
+    network = data["network"]
     
-    # CPU metrics
-    cpu_point = Point("cpu_metrics") \
-        .tag("host", platform.node()) \
-        .field("cpu_percent", data["cpu"]["percent"]) \
-        .field("load_avg_1m", data["cpu"]["load_average"]["1min"]) \
-        .field("load_avg_5m", data["cpu"]["load_average"]["5min"]) \
-        .field("load_avg_15m", data["cpu"]["load_average"]["15min"]) \
-        .time(timestamp)
+    if "error" not in cpu:
+        # CPU metrics
+        points.append(("cpu_metrics", host, {
+            "cpu_percent": cpu["percent"],
+            "load_avg_1m": cpu["load_average"]["1min"],
+            "load_avg_5m": cpu["load_average"]["5min"],
+            "load_avg_15m": cpu["load_average"]["15min"]
+        }))
+        
+        # CPU time breakdown (รวมและแยก core)
+        times_percent = cpu.get("times_percent")
+        if times_percent:
+            fields = {name: float(value) for name, value in times_percent.items()}
+            for name in ("context_switches_per_sec", "interrupts_per_sec"):
+                if cpu.get(name) is not None:
+                    fields[name] = float(cpu[name])
+            points.append(("cpu_times", host, fields))
+        
+        for core in cpu.get("per_core", []):
+            points.append(("cpu_core_metrics", host + (("core", str(core["core"])),), {
+                "cpu_percent": float(core["percent"]),
+                "user": float(core["user"]),
+                "system": float(core["system"]),
+                "iowait": float(core["iowait"]),
+                "irq": float(core["irq"]),
+                "softirq": float(core["softirq"]),
+                "steal": float(core["steal"])
+            }))
     
     # Memory metrics
-    mem_point = Point("memory_metrics") \
-        .tag("host", platform.node()) \
-        .field("memory_percent", data["memory"]["ram"]["percent"]) \
-        .field("swap_percent", data["memory"]["swap"]["percent"]) \
-        .time(timestamp)
+    if "error" not in memory:
+        points.append(("memory_metrics", host, {
+            "memory_percent": memory["ram"]["percent"],
+            "swap_percent": memory["swap"]["percent"]
+        }))
     
     # Disk metrics for each partition
-    for partition in data["disk"]["partitions"]:
-        disk_point = Point("disk_metrics") \
-            .tag("host", platform.node()) \
-            .tag("mountpoint", partition["mountpoint"]) \
-            .field("disk_percent", partition["percent"]) \
-            .time(timestamp)
-        
-        write_api.write(
-            bucket=settings["influxdb"]["bucket"],
-            org=settings["influxdb"]["org"],
-            record=disk_point
-        )
+    for partition in disk.get("partitions", []):
+        if partition["percent"] is None:
+            continue
+        points.append(("disk_metrics", host + (("mountpoint", partition["mountpoint"]),), {
+            "disk_percent": partition["percent"]
+        }))
+    
+    # Disk I/O metrics for each block device
+    if "error" not in devices:
+        for device, stats in devices.items():
+            if stats["util_percent"] is None:
+                continue
+            points.append(("disk_io_metrics", host + (("device", device),), {
+                "reads_per_sec": float(stats["reads_per_sec"]),
+                "writes_per_sec": float(stats["writes_per_sec"]),
+                "read_bytes_per_sec": float(stats["read_bytes_per_sec"]),
+                "write_bytes_per_sec": float(stats["write_bytes_per_sec"]),
+                "await_ms": float(stats["await_ms"]),
+                "avg_queue_size": float(stats["avg_queue_size"]),
+                "util_percent": float(stats["util_percent"])
+            }))
     
     # Network metrics for each interface
-    for interface_name, interface_data in data["network"]["interfaces"].items():
+    for interface_name, interface_data in network.get("interfaces", {}).items():
         if "io" in interface_data:
-            net_point = Point("network_metrics") \
-                .tag("host", platform.node()) \
-                .tag("interface", interface_name) \
-                .field("bytes_sent", interface_data["io"]["bytes_sent"]) \
-                .field("bytes_recv", interface_data["io"]["bytes_recv"]) \
-                .time(timestamp)
-            
-            write_api.write(
-                bucket=settings["influxdb"]["bucket"],
-                org=settings["influxdb"]["org"],
-                record=net_point
-            )
+            points.append(("network_metrics", host + (("interface", interface_name),), {
+                "bytes_sent": interface_data["io"]["bytes_sent"],
+                "bytes_recv": interface_data["io"]["bytes_recv"]
+            }))
+    
+    # จำนวนข้อผิดพลาดจาก log แบบสะสม (ใช้ difference() หรือ derivative() ใน query เพื่อดูอัตรา)
+    for signature, units in (data.get("logs") or {}).get("lifetime", {}).items():
+        for unit, count in units.items():
+            points.append(("log_errors", host + (("signature", signature), ("unit", unit)), {
+                "count": count
+            }))
+    
+    # ผลของ collector plugins ตาม mapping ที่แต่ละ plugin ประกาศไว้
+    points.extend(plugin_points(data.get("plugins") or {}, host))
     
-    # เขียนข้อมูล CPU และ Memory
-    write_api.write(
+    # เขียนข้อมูลทั้งหมดในครั้งเดียว
+    api.write(
         bucket=settings["influxdb"]["bucket"],
         org=settings["influxdb"]["org"],
-        record=[cpu_point, mem_point]
+        record=line_encoder.encode(points, timestamp)
     )
 
-def check_thresholds(data):
-    """ตรวจสอบค่า thresholds และส่งการแจ้งเตือนถ้าจำเป็น"""
+def check_thresholds(data, local=True):
+    """
+    ตรวจสอบค่า thresholds และส่งการแจ้งเตือนถ้าจำเป็น
+    
+    Args:
+        data (dict): ข้อมูลระบบ
+        local (bool): ข้อมูลเป็นของเครื่องนี้ (ไม่ใช่ของ agent) จึงวิเคราะห์ไดเรกทอรีของ partition ที่เกิน threshold ได้
+    """
     alerts = []
+    fields = []
+    # section ที่ collector ยังไม่มีผลลัพธ์จะเป็น {"error": ...} จึงข้ามไป
+    cpu_percent = data["cpu"].get("percent")
+    memory_percent = data["memory"].get("ram", {}).get("percent")
     
     # ตรวจสอบ CPU
-    if data["cpu"]["percent"] > thresholds["cpu_percent"]:
-        alerts.append(f"⚠️ CPU usage is high: {data['cpu']['percent']}% (threshold: {thresholds['cpu_percent']}%)")
+    if cpu_percent is not None and cpu_percent > thresholds["cpu_percent"]:
+        alerts.append(f"⚠️ CPU usage is high: {cpu_percent}% (threshold: {thresholds['cpu_percent']}%)")
     
     # ตรวจสอบ Memory
-    if data["memory"]["ram"]["percent"] > thresholds["memory_percent"]:
-        alerts.append(f"⚠️ Memory usage is high: {data['memory']['ram']['percent']}% (threshold: {thresholds['memory_percent']}%)")
+    if memory_percent is not None and memory_percent > thresholds["memory_percent"]:
+        alerts.append(f"⚠️ Memory usage is high: {memory_percent}% (threshold: {thresholds['memory_percent']}%)")
     
     # ตรวจสอบ Disk
-    for partition in data["disk"]["partitions"]:
-        if partition["percent"] > thresholds["disk_percent"]:
+    for partition in data["disk"].get("partitions", []):
+        if partition["percent"] is not None and partition["percent"] > thresholds["disk_percent"]:
             alerts.append(f"⚠️ Disk usage is high on {partition['mountpoint']}: {partition['percent']}% (threshold: {thresholds['disk_percent']}%)")
+            if local and disk_hotspot_settings["enabled"]:
+                disk_hotspots.request_scan(partition["mountpoint"])
+                hotspots = disk_hotspots.summary(partition["mountpoint"])
+                if hotspots:
+                    # Discord จำกัดความยาวของ field ไว้ที่ 1024 ตัวอักษร
+                    fields.append({"name": f"Disk Hotspots ({partition['mountpoint']})", "value": hotspots[:1024]})
     
     # ตรวจสอบอุณหภูมิ (ถ้ามีข้อมูล)
     if isinstance(data["temperature"], dict) and "error" not in data["temperature"]:
@@ -490,13 +1335,18 @@ def check_thresholds(data):
                     if sensor.get("current") and sensor["current"] > thresholds["temperature"]:
                         alerts.append(f"⚠️ Temperature is high on {chip} {sensor.get('label', '')}: {sensor['current']}°C (threshold: {thresholds['temperature']}°C)")
     
-    # ส่งการแจ้งเตือนถ้าจำเป็น
-    if alerts and settings["discord"]["webhook_url"]:
-        send_discord_alert(alerts, data)
+    # ตรวจสอบ thresholds ที่ collector plugins ประกาศไว้
+    alerts.extend(plugin_alerts(data.get("plugins") or {}))
+    
+    # ส่งการแจ้งเตือนถ้าจำเป็น (ข้ามการแจ้งเตือนเดิมของ host เดิมที่ยังอยู่ในช่วง cooldown)
+    if alerts and discord_settings["webhook_url"]:
+        alerts = alert_cooldown.filter(data["system"]["hostname"], alerts)
+        if alerts:
+            send_discord_alert(alerts, data, fields)
 
-def send_discord_alert(alerts, data):
+def send_discord_alert(alerts, data, extra_fields=()):
     """ส่งการแจ้งเตือนไปยัง Discord"""
-    webhook_url = settings["discord"]["webhook_url"]
+    webhook_url = discord_settings["webhook_url"]
     
     # สร้าง embed สำหรับ Discord
     embeds = [{
@@ -506,19 +1356,20 @@ def send_discord_alert(alerts, data):
         "fields": [
             {
                 "name": "CPU Usage",
-                "value": f"{data['cpu']['percent']}%",
+                "value": f"{data['cpu'].get('percent', 'N/A')}%",
                 "inline": True
             },
             {
                 "name": "Memory Usage",
-                "value": f"{data['memory']['ram']['percent']}%",
+                "value": f"{data['memory'].get('ram', {}).get('percent', 'N/A')}%",
                 "inline": True
             },
             {
                 "name": "System Uptime",
                 "value": data["system"]["uptime"]["formatted"],
                 "inline": True
-            }
+            },
+            *extra_fields
         ],
         "footer": {
             "text": f"Host: {data['system']['hostname']} | {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
@@ -530,16 +1381,185 @@ def send_discord_alert(alerts, data):
         "embeds": embeds
     }
     
+    started = time.perf_counter()
     try:
         response = requests.post(
             webhook_url,
             data=json.dumps(payload),
-            headers={"Content-Type": "application/json"}
+            headers={"Content-Type": "application/json"},
+            timeout=discord_settings["timeout"]
         )
         response.raise_for_status()
         logging.info(f"Discord notification sent successfully: {response.status_code}")
     except Exception as e:
+        self_metrics.error("discord.send", e)
         logging.error(f"Failed to send Discord notification: {str(e)}")
+    finally:
+        self_metrics.observe("discord.send", time.perf_counter() - started)
+
+def record_history(data):
+    """บันทึกเมตริกหลักของ snapshot ลงในประวัติข้อมูลในเครื่อง (แยกเป็น series ตาม mountpoint, interface และ sensor)"""
+    # section ที่ collector ยังไม่มีผลลัพธ์จะเป็น {"error": ...} จึงไม่บันทึก section นั้น
+    entry = {}
+    if "error" not in data["cpu"]:
+        entry["cpu"] = {"percent": data["cpu"]["percent"]}
+    if "error" not in data["memory"]:
+        entry["memory"] = {
+            "ram": {"percent": data["memory"]["ram"]["percent"]},
+            "swap": {"percent": data["memory"]["swap"]["percent"]}
+        }
+    entry["disk"] = {
+        "partitions": [
+            {"mountpoint": partition["mountpoint"], "percent": partition["percent"]}
+            for partition in data["disk"].get("partitions", [])
+            if partition["percent"] is not None
+        ]
+    }
+    entry["network"] = {
+        "interfaces": {
+            name: {"io": {"bytes_sent": interface["io"]["bytes_sent"], "bytes_recv": interface["io"]["bytes_recv"]}}
+            for name, interface in data["network"].get("interfaces", {}).items()
+            if "io" in interface
+        }
+    }
+    temperature = data.get("temperature") or {}
+    entry["temperature"] = {
+        chip: [{"label": sensor.get("label"), "current": sensor.get("current")} for sensor in sensors]
+        for chip, sensors in temperature.items()
+        if isinstance(sensors, list)
+    }
+    history.save_data(entry)
+
+def record_forecasts(data):
+    """อัปเดตการพยากรณ์ด้วย snapshot ล่าสุดและบันทึกสถานะเป็นระยะ"""
+    now = time.time()
+    if "error" not in data["memory"]:
+        forecaster.update("memory", data["memory"]["ram"]["percent"], now)
+    for partition in data["disk"].get("partitions", []):
+        forecaster.update(f"disk:{partition['mountpoint']}", partition["percent"], now)
+    forecaster.maybe_save()
+
+def sampling_loop():
+    """เก็บข้อมูลระบบเป็นระยะในเบื้องหลังและ render metrics เก็บไว้"""
+    interval = sampler_settings["interval"]
+    last_history = None
+    while True:
+        started = time.monotonic()
+        try:
+            data = collect_system_data()
+            render_started = time.perf_counter()
+            metrics_exposition.update(data)
+            self_metrics.observe("sampler.render", time.perf_counter() - render_started)
+            if last_history is None or started - last_history >= history_settings["interval"]:
+                record_history(data)
+                record_forecasts(data)
+                last_history = started
+        except Exception as e:
+            self_metrics.error("sampler.tick", e)
+            logging.error(f"ไม่สามารถเก็บข้อมูลระบบในเบื้องหลัง: {str(e)}")
+        time.sleep(max(0, interval - (time.monotonic() - started)))
+
+def register_collectors():
+    """ลงทะเบียน collectors กับ scheduler ตามการตั้งค่า"""
+    collectors = {
+        "cpu": get_cpu_info,
+        "memory": get_memory_info,
+        "disk": get_disk_info,
+        "disk_io": get_disk_io_info,
+        "network": lambda: {"interfaces": get_interface_info()},
+        "temperature": get_temperature_info,
+        "connections": get_connection_info,
+        "processes": get_process_info,
+        "logs": get_log_errors
+    }
+    for name, func in collectors.items():
+        config = collector_settings.get(name, {})
+        collector_scheduler.register(
+            name, func,
+            interval=config.get("interval", 1),
+            jitter=config.get("jitter", 0.1),
+            budget=config.get("budget"),
+            max_interval=config.get("max_interval")
+        )
+
+# ตั้งค่า collector scheduler (เริ่มทำงานใน start_services)
+collector_scheduler = CollectorScheduler()
+register_collectors()
+
+def start_sampler():
+    """เริ่ม thread สำหรับเก็บข้อมูลเบื้องหลัง"""
+    # บันทึกสถานะการพยากรณ์ล่าสุดก่อนปิดโปรแกรม
+    atexit.register(forecaster.save)
+    thread = threading.Thread(target=sampling_loop, name="sampler", daemon=True)
+    thread.start()
+    return thread
+
+_services_lock = threading.Lock()
+_services_started = False
+
+def start_services(sampler=True):
+    """
+    เริ่ม collector scheduler, collector plugins และ sampler (เริ่มเพียงครั้งเดียวต่อ process)
+    
+    Args:
+        sampler (bool): เริ่ม thread ที่ render /metrics และบันทึกประวัติข้อมูลด้วย (agent mode ไม่ใช้)
+    
+    Returns:
+        bool: True ถ้าเริ่มในการเรียกครั้งนี้
+    """
+    global _services_started
+    with _services_lock:
+        if _services_started:
+            return False
+        _services_started = True
+    
+    collector_scheduler.start()
+    if plugin_settings["enabled"]:
+        plugin_manager.start()
+        atexit.register(plugin_manager.stop)
+    if sampler:
+        start_sampler()
+    return True
+
+@app.before_request
+def ensure_services():
+    """เริ่ม services เบื้องหลังเมื่อมี request แรก (WSGI server เช่น gunicorn ไม่ได้รัน __main__ และแต่ละ worker ต้องเริ่ม thread เองหลัง fork)"""
+    start_services(sampler=fleet_settings["mode"] != "agent")
+
+@self_metrics.timed("fleet.handle_sample")
+def handle_fleet_sample(sample):
+    """ส่งข้อมูลที่ได้รับจาก agent ไปยัง InfluxDB และระบบแจ้งเตือน"""
+    try:
+        store_in_influxdb(
+            sample,
+            api=batch_write_api,
+            timestamp=datetime.utcfromtimestamp(sample["collected_at"])
+        )
+    except Exception as e:
+        logging.error(f"ไม่สามารถบันทึกข้อมูลของ {sample['system']['hostname']} ลง InfluxDB: {str(e)}")
+    
+    check_thresholds(sample, local=False)
+
+# ตั้งค่า fleet aggregator (ใช้ batching write API เพื่อรองรับหลาย host)
+fleet_aggregator = None
+batch_write_api = None
+if fleet_settings["mode"] == "aggregator":
+    batch_write_api = ClientFactory(
+        lambda: influxdb_client.write_api(
+            write_options=influxdb_write.WriteOptions(batch_size=5000, flush_interval=1000)
+        ),
+        name="batch_write_api",
+        timer=startup
+    )
+    fleet_aggregator = FleetAggregator(
+        handlers=[handle_fleet_sample],
+        stale_after=fleet_settings["stale_after"]
+    )
+    self_metrics.gauge("fleet.queue_depth", fleet_aggregator.queue.qsize)
+    self_metrics.gauge("fleet.hosts", lambda: len(fleet_aggregator.latest))
+
+# ทุก module ที่จำเป็นถูกโหลดแล้ว ส่วนที่เหลือโหลดเมื่อใช้งานครั้งแรก
+startup.stop_tracking()
 
 if __name__ == '__main__':
     # สร้าง config directory ถ้ายังไม่มี
@@ -564,5 +1584,22 @@ if __name__ == '__main__':
         with open('prompts/system_summary_prompt.txt', 'w') as f:
             f.write(system_summary_prompt)
     
-    print("Starting Ubuntu Health Monitor API...")
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    report = startup.report(limit=5)
+    slowest = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in report["imports"].items())
+    logging.info(f"โหลดโปรแกรมเสร็จใน {report['ready_seconds'] * 1000:.0f} ms (import ที่ช้าที่สุด: {slowest})")
+    
+    if fleet_settings["mode"] == "agent":
+        start_services(sampler=False)
+        print(f"Starting Ubuntu Health Monitor agent -> {fleet_settings['aggregator_url']}...")
+        agent = FleetAgent(
+            collect_system_data,
+            fleet_settings["aggregator_url"],
+            token=fleet_settings["token"],
+            interval=fleet_settings["push_interval"],
+            batch_size=fleet_settings["batch_size"]
+        )
+        agent.run()
+    else:
+        start_services()
+        print("Starting Ubuntu Health Monitor API...")
+        app.run(host='0.0.0.0', port=5000, debug=False)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ตัวอย่าง collector plugin: ขนาดคิวของ Postfix
+
+ไฟล์ที่ขึ้นต้นด้วย _ จะไม่ถูกโหลด คัดลอกเป็น plugins/postfix_queue.py เพื่อเปิดใช้งาน
+"""
+
+import os
+import time
+
+from utils.plugins import CollectorPlugin
+
+class PostfixQueuePlugin(CollectorPlugin):
+    """จำนวนอีเมลและอายุของอีเมลที่เก่าที่สุดในแต่ละคิวของ Postfix"""
+
+    schema = {"depth": "int", "oldest_seconds": "float"}
+    interval = 30
+    cpu_budget = 0.2
+    wall_budget = 2.0
+    influxdb = {"measurement": "postfix_queue", "tag": "queue"}
+    thresholds = {"depth": {"max": 1000}}
+
+    def setup(self, config):
+        """
+        กำหนดไดเรกทอรีของคิว
+
+        Args:
+            config (dict): {"spool": "/var/spool/postfix", "queues": ["incoming", "active", "deferred", "hold"]}
+        """
+        self.spool = config.get("spool", "/var/spool/postfix")
+        self.queues = config.get("queues", ["incoming", "active", "deferred", "hold"])
+
+    def collect(self):
+        """นับไฟล์ในแต่ละคิว (deferred แบ่งเป็นไดเรกทอรีย่อยตาม hash)"""
+        now = time.time()
+        result = {}
+        for name in self.queues:
+            depth = 0
+            oldest = now
+            for root, _, files in os.walk(os.path.join(self.spool, name)):
+                for filename in files:
+                    try:
+                        mtime = os.stat(os.path.join(root, filename)).st_mtime
+                    except OSError:
+                        # อีเมลถูกส่งหรือย้ายคิวระหว่างที่อ่าน
+                        continue
+                    depth += 1
+                    oldest = min(oldest, mtime)
+            result[name] = {"depth": depth, "oldest_seconds": round(now - oldest, 1)}
+        return result
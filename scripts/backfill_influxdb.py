@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - InfluxDB Backfill
+ส่งประวัติข้อมูลในเครื่อง (logs/system_data.log แบบ JSONL หรือ block file แบบ Gorilla) เข้า InfluxDB
+ในรูปแบบ measurement และ tag เดียวกับที่ store_in_influxdb เขียน เพื่อให้ Grafana เห็นช่วงเวลาที่ InfluxDB ล่ม
+หรือช่วงก่อนติดตั้ง
+
+ไฟล์ถูกแบ่งเป็น batch แล้วแปลงเป็น line protocol และบีบอัด gzip แบบขนานหลาย process ส่งพร้อมกันไม่เกิน
+--concurrency request และบันทึก checkpoint หลังทุก batch ที่ส่งสำเร็จตามลำดับ จึงรันต่อจากจุดเดิมได้เมื่อถูกหยุดกลางคัน
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import platform
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+# ให้ import utils/ ได้เมื่อรันจาก root ของโปรเจค
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from utils.batch_analytics import chunk_ranges
+from utils.gorilla import BlockFile, block_info, decode_block
+from utils.line_protocol import LineProtocolEncoder
+from utils.series_registry import parse_series_name, split_sample
+
+DEFAULT_CHECKPOINT = os.path.join(ROOT_DIR, "logs", "backfill_checkpoint.json")
+
+# encoder ของแต่ละ worker process (cache ส่วนหัวของ series ข้าม batch)
+_encoders = {}
+
+def parse_time(value):
+    """แปลงเวลา (epoch seconds หรือ ISO 8601) เป็น epoch time"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value).timestamp()
+
+# measurement และ field ของแต่ละเมตริกในประวัติข้อมูล (ชื่อเดียวกับที่ store_in_influxdb เขียน)
+# ประวัติข้อมูลเก็บเฉพาะเมตริกหลัก และอุณหภูมิไม่ได้ถูกเขียนลง InfluxDB จึงไม่อยู่ในตารางนี้
+SERIES_FIELDS = {
+    "cpu": ("cpu_metrics", None, "cpu_percent", float),
+    "memory": ("memory_metrics", None, "memory_percent", float),
+    "swap": ("memory_metrics", None, "swap_percent", float),
+    "disk": ("disk_metrics", "mountpoint", "disk_percent", float),
+    # ตัวนับ byte ถูกเขียนเป็น integer field (ค่าจาก Gorilla block เป็น float ต้องแปลงกลับ)
+    "network_sent": ("network_metrics", "interface", "bytes_sent", int),
+    "network_recv": ("network_metrics", "interface", "bytes_recv", int)
+}
+
+class SampleEncoder:
+    """
+    แปลงตัวอย่างจากประวัติข้อมูลเป็น line protocol แบบเดียวกับ store_in_influxdb (ทุก byte)
+
+    ส่วนหัวของแต่ละ series และชื่อ field ถูก cache ไว้ การแปลงแต่ละตัวอย่างจึงเหลือเพียงการจัดรูปแบบตัวเลข
+    """
+
+    def __init__(self, host):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Sample Encoder
+
+        Args:
+            host (str): ค่า tag host
+        """
+        self.host = host
+        self._encoder = LineProtocolEncoder()
+        self._series = {}
+
+    def _lookup(self, metric, label):
+        """ส่วนหัวของ line, ชื่อ field และชนิดของค่าของ series (None ถ้าไม่ได้ถูกเขียนลง InfluxDB)"""
+        key = (metric, label)
+        if key not in self._series:
+            mapping = SERIES_FIELDS.get(metric)
+            if mapping is None:
+                self._series[key] = None
+            else:
+                measurement, tag, field, kind = mapping
+                tags = (("host", self.host),) if tag is None else (("host", self.host), (tag, label))
+                self._series[key] = (self._encoder.prefix(measurement, tags), field, kind)
+        return self._series[key]
+
+    def lines(self, values, timestamp_ns):
+        """
+        แปลงหนึ่งตัวอย่างเป็น line protocol
+
+        Args:
+            values (iterable): (metric, label, value)
+            timestamp_ns (int): epoch nanoseconds
+
+        Returns:
+            list: บรรทัด line protocol (หนึ่งบรรทัดต่อ point, field ของ point เดียวกันถูกรวมในบรรทัดเดียว)
+        """
+        points = {}
+        for metric, label, value in values:
+            if value is None:
+                continue
+            series = self._lookup(metric, label)
+            if series is None:
+                continue
+            prefix, field, kind = series
+            if kind is float:
+                value = float(value)
+                if not math.isfinite(value):
+                    continue
+                text = repr(value)
+                if text.endswith('.0'):
+                    text = text[:-2]
+            else:
+                if value != value:
+                    continue
+                text = f"{int(value)}i"
+            previous = points.get(prefix)
+            if previous is None:
+                points[prefix] = (field, f"{field}={text}")
+            else:
+                # field ของ point เดียวกันเรียงตามชื่อ (memory_percent/swap_percent, bytes_recv/bytes_sent)
+                part = f"{field}={text}"
+                joined = f"{previous[1]},{part}" if previous[0] < field else f"{part},{previous[1]}"
+                points[prefix] = (max(previous[0], field), joined)
+        suffix = f" {timestamp_ns}"
+        return [prefix + fields + suffix for prefix, (_, fields) in points.items()]
+
+def encode_batch(task):
+    """
+    แปลงข้อมูลหนึ่ง batch เป็น line protocol ที่บีบอัดแล้ว (ทำงานใน worker process)
+
+    Args:
+        task (dict): kind ('jsonl' หรือ 'gorilla'), path, start, end, host, range_start, range_end,
+            gzip_level และ blocks (เฉพาะ gorilla)
+
+    Returns:
+        dict: ข้อมูลที่บีบอัดแล้ว, ตำแหน่งที่ประมวลผลถึง และจำนวนตัวอย่าง/points/bytes
+    """
+    encoder = _encoders.get(task["host"])
+    if encoder is None:
+        encoder = _encoders[task["host"]] = SampleEncoder(task["host"])
+    range_start, range_end = task["range_start"], task["range_end"]
+    lines = []
+    samples = errors = skipped = 0
+    end = task["end"]
+
+    def add(timestamp, values):
+        nonlocal samples, skipped
+        if (range_start is not None and timestamp < range_start) or (range_end is not None and timestamp > range_end):
+            skipped += 1
+            return
+        samples += 1
+        lines.extend(encoder.lines(values, int(round(timestamp * 1e6)) * 1000))
+
+    if task["kind"] == "jsonl":
+        with open(task["path"], 'rb') as f:
+            f.seek(task["start"])
+            data = f.read(task["end"] - task["start"])
+        # ไม่ประมวลผลบรรทัดสุดท้ายที่ยังเขียนไม่ครบ (ไฟล์ที่ยังถูกเขียนอยู่)
+        complete = data.rfind(b'\n') + 1
+        end = task["start"] + complete
+        for raw in data[:complete].splitlines():
+            try:
+                entry = json.loads(raw)
+                timestamp = datetime.fromisoformat(entry['timestamp']).timestamp()
+            except (KeyError, TypeError, ValueError):
+                errors += 1
+                continue
+            add(timestamp, split_sample(entry))
+    else:
+        for block in task["blocks"]:
+            times, series = decode_block(block)
+            columns = [(parse_series_name(name), column.tolist()) for name, column in series.items()]
+            for index, timestamp in enumerate(times.tolist()):
+                add(timestamp, ((metric, label, column[index]) for (metric, label), column in columns))
+
+    body = ("\n".join(lines)).encode('utf-8')
+    return {
+        "path": task["path"],
+        "end": end,
+        "samples": samples,
+        "skipped": skipped,
+        "errors": errors,
+        "points": len(lines),
+        "raw_bytes": len(body),
+        "data": gzip.compress(body, compresslevel=task["gzip_level"]) if lines else b''
+    }
+
+def plan_batches(path, offset, batch_samples, options):
+    """
+    แบ่งไฟล์เป็น batch ตั้งแต่ offset ของ checkpoint
+
+    ไฟล์ JSONL ถูกแบ่งเป็นช่วง byte ตามความยาวเฉลี่ยของบรรทัด ส่วนไฟล์ Gorilla ถูกรวม block ตามจำนวนตัวอย่าง
+
+    Yields:
+        dict: task สำหรับ encode_batch
+    """
+    base = dict(options, path=path)
+    if path.endswith('.gorilla'):
+        blocks = []
+        count = 0
+        start = offset
+        for block, end in BlockFile(path).iter_from(offset):
+            blocks.append(block)
+            count += block_info(block)["count"]
+            if count >= batch_samples:
+                yield dict(base, kind="gorilla", start=start, end=end, blocks=blocks)
+                blocks, count, start = [], 0, end
+        if blocks:
+            yield dict(base, kind="gorilla", start=start, end=end, blocks=blocks)
+        return
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        sample = f.read(1024 * 1024)
+    line_bytes = len(sample) / max(1, sample.count(b'\n'))
+    chunk_size = max(64 * 1024, int(line_bytes * batch_samples))
+    for start, end in chunk_ranges(path, chunk_size, start=offset):
+        yield dict(base, kind="jsonl", start=start, end=end)
+
+class InfluxWriter:
+    """
+    ส่ง line protocol ที่บีบอัดแล้วไปยัง /api/v2/write ของ InfluxDB
+
+    เมื่อ InfluxDB ตอบ 429/503 หรือเชื่อมต่อไม่ได้ จะรอตาม Retry-After (หรือ backoff แบบ exponential) แล้วลองใหม่
+    เพื่อไม่ให้ backfill เพิ่มภาระให้ฐานข้อมูลที่ใช้งานอยู่
+    """
+
+    def __init__(self, url, token, org, bucket, retries=8, timeout=60):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Influx Writer
+
+        Args:
+            url (str): URL ของ InfluxDB เช่น http://localhost:8086
+            token (str): API token
+            org (str): organization
+            bucket (str): bucket
+            retries (int): จำนวนครั้งที่ลองใหม่ก่อนหยุด
+            timeout (float): timeout ของแต่ละ request (วินาที)
+        """
+        import requests
+
+        self._requests = requests
+        self.url = url.rstrip('/') + "/api/v2/write"
+        self.params = {"org": org, "bucket": bucket, "precision": "ns"}
+        self.headers = {
+            "Authorization": f"Token {token}",
+            "Content-Encoding": "gzip",
+            "Content-Type": "text/plain; charset=utf-8"
+        }
+        self.retries = retries
+        self.timeout = timeout
+        self.retried = 0
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        return session
+
+    def write(self, data):
+        """
+        ส่งข้อมูลหนึ่ง batch
+
+        Raises:
+            RuntimeError: ถ้า InfluxDB ปฏิเสธข้อมูลหรือยังล้มเหลวหลังลองครบ retries ครั้ง
+        """
+        for attempt in range(self.retries + 1):
+            delay = min(60, 2 ** attempt)
+            try:
+                response = self._session().post(self.url, params=self.params, headers=self.headers,
+                                                data=data, timeout=self.timeout)
+            except self._requests.RequestException as e:
+                error = str(e)
+            else:
+                if response.status_code < 300:
+                    return
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code not in (429, 500, 502, 503, 504):
+                    raise RuntimeError(error)
+                try:
+                    delay = max(delay, float(response.headers.get("Retry-After", 0)))
+                except ValueError:
+                    pass
+            if attempt == self.retries:
+                raise RuntimeError(error)
+            self.retried += 1
+            time.sleep(delay)
+
+class Checkpoint:
+    """offset ของแต่ละไฟล์ที่ส่งสำเร็จแล้ว (บันทึกแบบเขียนไฟล์ชั่วคราวแล้ว rename)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if path:
+            try:
+                with open(path, 'r') as f:
+                    self.files = json.load(f)
+            except FileNotFoundError:
+                pass
+        self._saved = time.monotonic()
+
+    def offset(self, path):
+        """offset ที่จะเริ่มอ่าน (เริ่มใหม่ถ้าไฟล์ถูกแทนที่หรือถูกตัดให้สั้นลง)"""
+        state = self.files.get(os.path.abspath(path))
+        stat = os.stat(path)
+        if not state or state["inode"] != stat.st_ino or state["offset"] > stat.st_size:
+            return 0
+        return state["offset"]
+
+    def advance(self, path, offset, force=False):
+        """บันทึกว่าไฟล์ถูกส่งถึง offset แล้ว (เขียนลงไฟล์ไม่เกินทุก 5 วินาที ยกเว้น force)"""
+        self.files[os.path.abspath(path)] = {"inode": os.stat(path).st_ino, "offset": offset}
+        if self.path and (force or time.monotonic() - self._saved >= 5):
+            self.save()
+
+    def save(self):
+        """เขียน checkpoint ลงไฟล์"""
+        if not self.path:
+            return
+        temp_file = f"{self.path}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(self.files, f, indent=2)
+        os.replace(temp_file, self.path)
+        self._saved = time.monotonic()
+
+def backfill(paths, writer, checkpoint, host, batch_samples=20000, workers=None, concurrency=2,
+             gzip_level=3, start=None, end=None, progress=None):
+    """
+    ส่งประวัติข้อมูลทั้งหมดเข้า InfluxDB
+
+    batch ถูก encode ขนานใน worker process และส่งพร้อมกันไม่เกิน concurrency request checkpoint ถูกเลื่อนตาม
+    ลำดับของ batch เท่านั้น (batch ที่ส่งเสร็จก่อน batch ก่อนหน้าจะรอ) การรันต่อจึงไม่ข้ามข้อมูล
+
+    Args:
+        paths (list): ไฟล์ JSONL หรือ .gorilla (เก่าสุดก่อน)
+        writer (InfluxWriter): ใช้ส่งข้อมูล (None คือ encode อย่างเดียวเพื่อวัดความเร็ว)
+        checkpoint (Checkpoint): offset ที่ส่งสำเร็จแล้วของแต่ละไฟล์
+        host (str): ค่า tag host
+        batch_samples (int): จำนวนตัวอย่างโดยประมาณต่อ batch
+        workers (int, optional): จำนวน worker process (ค่าเริ่มต้นคือจำนวน CPU)
+        concurrency (int): จำนวน request ที่ส่งพร้อมกันสูงสุด
+        gzip_level (int): ระดับการบีบอัด gzip (1-9)
+        start (float, optional): ส่งเฉพาะตัวอย่างตั้งแต่ epoch time นี้
+        end (float, optional): ส่งเฉพาะตัวอย่างจนถึง epoch time นี้
+        progress (callable, optional): ถูกเรียกด้วยสถิติสะสมหลังทุก batch
+
+    Returns:
+        dict: จำนวนตัวอย่าง, points, bytes ก่อนและหลังบีบอัด, เวลาที่ใช้ และ throughput
+    """
+    workers = workers or os.cpu_count() or 1
+    options = {"host": host, "range_start": start, "range_end": end, "gzip_level": gzip_level}
+    stats = {"samples": 0, "skipped": 0, "errors": 0, "points": 0, "batches": 0, "raw_bytes": 0, "sent_bytes": 0}
+    started = time.perf_counter()
+
+    def tasks():
+        for path in paths:
+            yield from plan_batches(path, checkpoint.offset(path), batch_samples, options)
+
+    encoded = deque()
+    pending = deque()
+
+    def retire():
+        # batch ที่เก่าที่สุดต้องส่งสำเร็จก่อนจึงเลื่อน checkpoint
+        result, future = pending.popleft()
+        if future is not None:
+            future.result()
+        checkpoint.advance(result["path"], result["end"])
+        for key in ("samples", "skipped", "errors", "points", "raw_bytes"):
+            stats[key] += result[key]
+        stats["sent_bytes"] += len(result["data"])
+        stats["batches"] += 1
+        if progress:
+            progress(dict(stats, elapsed_seconds=time.perf_counter() - started))
+
+    def dispatch():
+        # ส่ง batch ที่ encode เสร็จแล้วตามลำดับ โดยมี request ค้างอยู่ไม่เกิน concurrency
+        result = encoded.popleft().result()
+        send = senders.submit(writer.write, result["data"]) if writer and result["data"] else None
+        pending.append((result, send))
+        while len(pending) > concurrency:
+            retire()
+
+    with ProcessPoolExecutor(max_workers=workers) as encoders, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="backfill") as senders:
+        try:
+            for task in tasks():
+                encoded.append(encoders.submit(encode_batch, task))
+                # จำกัดจำนวน batch ที่อยู่ในหน่วยความจำ
+                while len(encoded) > workers * 2:
+                    dispatch()
+            while encoded:
+                dispatch()
+            while pending:
+                retire()
+        finally:
+            for future in encoded:
+                future.cancel()
+            checkpoint.save()
+
+    elapsed = time.perf_counter() - started
+    stats.update({
+        "elapsed_seconds": round(elapsed, 3),
+        "samples_per_second": round(stats["samples"] / elapsed, 1) if elapsed else None,
+        "points_per_second": round(stats["points"] / elapsed, 1) if elapsed else None,
+        "compression_ratio": round(stats["raw_bytes"] / stats["sent_bytes"], 2) if stats["sent_bytes"] else None,
+        "retries": writer.retried if writer else 0
+    })
+    return stats
+
+def load_influx_settings():
+    """อ่านการตั้งค่า InfluxDB จาก config/settings.json (ถ้ามี)"""
+    try:
+        with open(os.path.join(ROOT_DIR, 'config', 'settings.json'), 'r') as f:
+            return json.load(f).get("influxdb", {})
+    except FileNotFoundError:
+        return {}
+
+def main(argv=None):
+    """รัน backfill จาก command line พิมพ์ความคืบหน้าไปยัง stderr และผลสรุปเป็น JSON"""
+    influx = load_influx_settings()
+    parser = argparse.ArgumentParser(description="Backfill Ubuntu Health Monitor history files into InfluxDB")
+    parser.add_argument("paths", nargs="*", default=[os.path.join(ROOT_DIR, "logs", "system_data.log")],
+                        help="JSONL history files or .gorilla block files, oldest first (default: logs/system_data.log)")
+    parser.add_argument("--url", default=influx.get("url", "http://localhost:8086"), help="InfluxDB URL")
+    parser.add_argument("--token", default=influx.get("token"), help="InfluxDB API token")
+    parser.add_argument("--org", default=influx.get("org"), help="InfluxDB organization")
+    parser.add_argument("--bucket", default=influx.get("bucket"), help="InfluxDB bucket")
+    parser.add_argument("--host", default=platform.node(), help="Value of the host tag (default: this hostname)")
+    parser.add_argument("--start", help="Only samples at or after this time (epoch or ISO 8601)")
+    parser.add_argument("--end", help="Only samples at or before this time (epoch or ISO 8601)")
+    parser.add_argument("--batch-samples", type=int, default=20000, help="Samples per write request (default: 20000)")
+    parser.add_argument("--workers", type=int, default=None, help="Encoder processes (default: CPU count)")
+    parser.add_argument("--concurrency", type=int, default=2, help="Concurrent write requests (default: 2)")
+    parser.add_argument("--gzip-level", type=int, default=3, choices=range(1, 10), metavar="1-9",
+                        help="gzip compression level (default: 3)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file (default: logs/backfill_checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the beginning")
+    parser.add_argument("--dry-run", action="store_true", help="Encode and compress only, do not write to InfluxDB")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        parser.error(f"file not found: {', '.join(missing)}")
+    if not args.dry_run and not (args.token and args.org and args.bucket):
+        parser.error("--token, --org and --bucket are required (or set influxdb in config/settings.json)")
+
+    checkpoint = Checkpoint(None if args.dry_run else args.checkpoint)
+    if args.restart:
+        checkpoint.files = {}
+    writer = None if args.dry_run else InfluxWriter(args.url, args.token, args.org, args.bucket)
+
+    last_report = [0.0]
+
+    def progress(stats):
+        if stats["elapsed_seconds"] - last_report[0] < 5:
+            return
+        last_report[0] = stats["elapsed_seconds"]
+        print(f"{stats['samples']:,} samples, {stats['points']:,} points, "
+              f"{stats['samples'] / stats['elapsed_seconds']:,.0f} samples/s, "
+              f"{stats['sent_bytes'] / 1024 ** 2:.1f} MiB sent", file=sys.stderr)
+
+    try:
+        result = backfill(
+            args.paths, writer, checkpoint, args.host,
+            batch_samples=args.batch_samples,
+            workers=args.workers,
+            concurrency=args.concurrency,
+            gzip_level=args.gzip_level,
+            start=parse_time(args.start),
+            end=parse_time(args.end),
+            progress=progress
+        )
+    except (RuntimeError, OSError) as e:
+        print(f"backfill stopped: {e} (rerun to resume from {args.checkpoint})", file=sys.stderr)
+        sys.exit(1)
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+if __name__ == "__main__":
+    main()
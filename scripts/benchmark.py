@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Micro-benchmark Suite
+วัดเวลาและหน่วยความจำของ collectors, DataProcessor, batch analytics, รูปแบบการเก็บประวัติข้อมูล
+และเวลาเริ่มโปรแกรม โดยไม่ต้องเชื่อมต่อเครือข่าย
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime
+from types import SimpleNamespace
+
+# ให้ import app.py และ utils/ ได้เมื่อรันจาก root ของโปรเจค
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+DEFAULT_SIZES = "1000,100000,10000000"
+
+# โครงสร้างข้อมูลเลียนแบบ namedtuple ของ psutil
+scpufreq = namedtuple('scpufreq', ['current', 'min', 'max'])
+svmem = namedtuple('svmem', ['total', 'available', 'percent', 'used', 'free'])
+sswap = namedtuple('sswap', ['total', 'used', 'free', 'percent', 'sin', 'sout'])
+sdiskpart = namedtuple('sdiskpart', ['device', 'mountpoint', 'fstype', 'opts'])
+sdiskusage = namedtuple('sdiskusage', ['total', 'used', 'free', 'percent'])
+sdiskio = namedtuple('sdiskio', ['read_count', 'write_count', 'read_bytes', 'write_bytes',
+                                 'read_time', 'write_time'])
+snicaddr = namedtuple('snicaddr', ['family', 'address', 'netmask', 'broadcast', 'ptp'])
+snetio = namedtuple('snetio', ['bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+                               'errin', 'errout', 'dropin', 'dropout'])
+sconn = namedtuple('sconn', ['fd', 'family', 'type', 'laddr', 'raddr', 'status', 'pid'])
+
+class FakePsutil:
+    """psutil จำลองที่คืนค่าคงที่ตามขนาดที่กำหนด (ไม่อ่าน /proc และไม่ sleep)"""
+
+    def __init__(self, mount_root, partitions=20, interfaces=20, connections=5000):
+        rng = random.Random(42)
+        self._partitions = []
+        for i in range(partitions):
+            # mountpoint ต้องมีอยู่จริงเพราะ get_disk_info ตรวจสอบด้วย os.path.exists
+            mountpoint = os.path.join(mount_root, f"data{i}")
+            os.makedirs(mountpoint, exist_ok=True)
+            self._partitions.append(sdiskpart(f"/dev/sd{chr(97 + i % 26)}{i // 26 + 1}", mountpoint, "ext4", "rw"))
+        self._usage = sdiskusage(500 * 1024**3, 200 * 1024**3, 300 * 1024**3, 40.0)
+        self._addrs = {
+            f"eth{i}": [
+                snicaddr(socket.AF_INET, f"10.0.{i}.1", "255.255.255.0", f"10.0.{i}.255", None),
+                snicaddr(socket.AF_INET6, f"fe80::{i:x}", "ffff:ffff:ffff:ffff::", None, None)
+            ]
+            for i in range(interfaces)
+        }
+        self._netio = {
+            name: snetio(rng.randint(0, 10**12), rng.randint(0, 10**12), 10**6, 10**6, 0, 0, 0, 0)
+            for name in self._addrs
+        }
+        statuses = ['ESTABLISHED'] * 6 + ['LISTEN', 'TIME_WAIT', 'CLOSE_WAIT', 'SYN_SENT']
+        self._connections = [
+            sconn(-1, socket.AF_INET, socket.SOCK_STREAM, ("10.0.0.1", 1024 + i), ("10.0.0.2", 443),
+                  statuses[i % len(statuses)], None)
+            for i in range(connections)
+        ]
+
+    def cpu_freq(self):
+        return scpufreq(2400.0, 800.0, 3600.0)
+
+    def cpu_count(self, logical=True):
+        return 16 if logical else 8
+
+    def virtual_memory(self):
+        return svmem(64 * 1024**3, 32 * 1024**3, 50.0, 30 * 1024**3, 2 * 1024**3)
+
+    def swap_memory(self):
+        return sswap(8 * 1024**3, 1024**3, 7 * 1024**3, 12.5, 0, 0)
+
+    def disk_partitions(self, all=False):
+        return list(self._partitions)
+
+    def disk_usage(self, path):
+        return self._usage
+
+    def disk_io_counters(self, perdisk=False):
+        return sdiskio(10**6, 10**6, 10**12, 10**12, 10**5, 10**5)
+
+    def net_if_addrs(self):
+        return self._addrs
+
+    def net_io_counters(self, pernic=False):
+        return self._netio
+
+    def net_connections(self, kind='inet'):
+        return list(self._connections)
+
+class FakeWriteApi:
+    """write API จำลองที่แปลง record เป็น bytes แบบเดียวกับ client แต่ไม่ส่งไปที่ InfluxDB"""
+
+    def write(self, bucket, org, record, **kwargs):
+        records = record if isinstance(record, list) else [record]
+        for item in records:
+            if hasattr(item, 'to_line_protocol'):
+                item = item.to_line_protocol()
+            if isinstance(item, str):
+                item.encode('utf-8')
+
+def print_header(title):
+    """พิมพ์หัวข้อ"""
+    width = 72
+    print("\n" + "=" * width)
+    print(title.center(width))
+    print("=" * width)
+
+def measure(func, min_time=0.2, repeat=3, setup=None):
+    """
+    วัดเวลาต่อการเรียกหนึ่งครั้ง (ค่าต่ำสุดจากหลายรอบ) และหน่วยความจำสูงสุด
+
+    Args:
+        setup (callable, optional): เรียกก่อนทุกครั้งที่เรียก func โดยไม่นับเวลาและหน่วยความจำ
+            (ใช้เมื่อ func เปลี่ยนสถานะ เช่นการแปลงไฟล์ที่ต้องเริ่มจากสำเนาใหม่ทุกครั้ง)
+
+    Returns:
+        dict: time (วินาทีต่อครั้ง), iterations และ peak_bytes
+    """
+    def run(number):
+        elapsed = 0.0
+        for _ in range(number):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            func()
+            elapsed += time.perf_counter() - start
+        return elapsed
+
+    # หาจำนวนครั้งต่อรอบให้แต่ละรอบใช้เวลาอย่างน้อย min_time
+    number = 1
+    while True:
+        elapsed = run(number)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        best = min(best, run(number) / number)
+
+    # วัดหน่วยความจำแยกรอบ เพราะ tracemalloc ทำให้ช้าลง
+    if setup is not None:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"time": best, "iterations": number, "peak_bytes": peak}
+
+def make_history(size, mounts=4, seed=42):
+    """
+    สร้างประวัติข้อมูลจำลองในรูปแบบ array ของ SeriesRegistry (หนึ่งตัวอย่างต่อวินาที)
+
+    Returns:
+        tuple: (epoch time, dict ของชื่อ series และค่า)
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    start = time.time() - size
+    times = start + np.arange(size, dtype=np.float64)
+    series = {
+        "cpu": np.round(rng.uniform(5, 95, size), 1),
+        "memory": np.round(rng.uniform(20, 80, size), 1)
+    }
+    for index in range(mounts):
+        mountpoint = "/" if index == 0 else f"/mnt/disk{index}"
+        series[f"disk:{mountpoint}"] = np.round(rng.uniform(30, 70, size), 1)
+    return times, series
+
+def write_history_file(path, lines, mounts=4, interfaces=2, seed=42, interval=60, pattern='random'):
+    """
+    เขียนไฟล์ประวัติข้อมูลจำลองในรูปแบบเดียวกับ DataProcessor.save_data
+
+    Args:
+        interval (float): ระยะห่างระหว่างตัวอย่าง (วินาที)
+        pattern (str): 'random' (ค่าสุ่มใหม่ทุกตัวอย่าง เป็นกรณีที่บีบอัดได้น้อยที่สุด) หรือ
+            'walk' (ค่าที่เปลี่ยนช้าแบบเครื่องจริง: CPU แกว่งรอบค่าเดิม memory และ disk แทบไม่เปลี่ยน)
+    """
+    rng = random.Random(seed)
+    start = time.time() - lines * interval
+    counters = {f"eth{index}": 0 for index in range(interfaces)}
+    mountpoints = ["/" if index == 0 else f"/mnt/disk{index}" for index in range(mounts)]
+    cpu, ram, swap = 20.0, 45.0, 1.0
+    disks = {mountpoint: rng.uniform(30, 70) for mountpoint in mountpoints}
+    with open(path, 'w') as f:
+        for i in range(lines):
+            if pattern == 'walk':
+                cpu = min(100.0, max(0.0, cpu + rng.gauss(0, 2)))
+                if rng.random() < 0.1:
+                    ram = min(100.0, max(0.0, ram + rng.choice((-0.1, 0.1))))
+                for mountpoint in disks:
+                    if rng.random() < 0.001:
+                        disks[mountpoint] += 0.1
+                for name in counters:
+                    counters[name] += int(rng.expovariate(1 / 20000) * interval)
+            else:
+                cpu, ram, swap = rng.uniform(5, 95), rng.uniform(20, 80), rng.uniform(0, 5)
+                disks = {mountpoint: rng.uniform(30, 70) for mountpoint in mountpoints}
+                for name in counters:
+                    counters[name] += rng.randint(0, 10 ** 6)
+            entry = {
+                "cpu": {"percent": round(cpu, 1)},
+                "memory": {
+                    "ram": {"percent": round(ram, 1)},
+                    "swap": {"percent": round(swap, 1)}
+                },
+                "disk": {"partitions": [
+                    {"mountpoint": mountpoint, "percent": round(percent, 1)} for mountpoint, percent in disks.items()
+                ]},
+                "network": {"interfaces": {
+                    name: {"io": {"bytes_sent": value, "bytes_recv": value * 2}} for name, value in counters.items()
+                }},
+                "timestamp": datetime.fromtimestamp(start + i * interval).isoformat()
+            }
+            f.write(json.dumps(entry) + '\n')
+
+def make_fake_proc(proc_root, count, seed=42):
+    """สร้าง /proc จำลองที่มี stat, statm, cmdline และ io ของ process จำนวน count ตัว"""
+    rng = random.Random(seed)
+    for pid in range(1, count + 1):
+        base = os.path.join(proc_root, str(pid))
+        os.mkdir(base)
+        fields = ["S", "1", str(pid), str(pid), "0", "-1", "4194560", "0", "0", "0", "0",
+                  str(rng.randint(0, 10 ** 6)), str(rng.randint(0, 10 ** 5)), "0", "0", "20", "0",
+                  str(rng.randint(1, 16)), "0", str(rng.randint(100, 10 ** 7))]
+        with open(os.path.join(base, "stat"), 'w') as f:
+            f.write(f"{pid} (worker {pid}) " + " ".join(fields) + " 0" * 32 + "\n")
+        with open(os.path.join(base, "statm"), 'w') as f:
+            f.write(f"{rng.randint(1000, 10 ** 6)} {rng.randint(100, 10 ** 5)} 0 0 0 0 0\n")
+        with open(os.path.join(base, "cmdline"), 'wb') as f:
+            f.write(b"/usr/bin/worker\0--id\0" + str(pid).encode() + b"\0")
+        with open(os.path.join(base, "io"), 'w') as f:
+            f.write(f"rchar: 0\nwchar: 0\nread_bytes: {rng.randint(0, 10 ** 9)}\n"
+                    f"write_bytes: {rng.randint(0, 10 ** 9)}\ncancelled_write_bytes: 0\n")
+
+def make_fake_hwmon(hwmon_root, sensors):
+    """สร้าง /sys/class/hwmon จำลองที่มี coretemp พร้อม temp*_input, label, max และ crit"""
+    base = os.path.join(hwmon_root, "hwmon0")
+    os.makedirs(base)
+    with open(os.path.join(base, "name"), 'w') as f:
+        f.write("coretemp\n")
+    for i in range(1, sensors + 1):
+        for suffix, value in (("input", 40000 + i % 30 * 1000), ("label", f"Core {i - 1}"),
+                              ("max", 80000), ("crit", 100000)):
+            with open(os.path.join(base, f"temp{i}_{suffix}"), 'w') as f:
+                f.write(f"{value}\n")
+
+def bench_collectors(args):
+    """วัดเวลาของ collectors และ store_in_influxdb ด้วย psutil จำลอง"""
+    import app
+
+    from utils.disk_collector import DiskUsageCollector
+    from utils.hwmon import HwmonReader
+    from utils.process_collector import ProcessCollector
+
+    mount_root = tempfile.mkdtemp(prefix="uhm-bench-")
+    app.psutil = FakePsutil(mount_root, args.partitions, args.interfaces, args.connections)
+    app.disk_usage_collector = DiskUsageCollector(backend=app.psutil)
+    app.subprocess = SimpleNamespace(
+        check_output=lambda *a, **k: "Model name:          Fake CPU @ 2.40GHz\n"
+    )
+    app.write_api = FakeWriteApi()
+    proc_root = os.path.join(mount_root, "proc")
+    os.mkdir(proc_root)
+    make_fake_proc(proc_root, args.processes)
+    app.process_collector = ProcessCollector(proc_root=proc_root)
+    hwmon_root = os.path.join(mount_root, "hwmon")
+    make_fake_hwmon(hwmon_root, args.sensors)
+    app.hwmon_reader = HwmonReader(hwmon_path=hwmon_root, thermal_path=os.path.join(mount_root, "thermal"))
+
+    sample = app.collect_system_data()
+    cases = {
+        "collector.get_cpu_info": app.get_cpu_info,
+        "collector.get_memory_info": app.get_memory_info,
+        "collector.get_disk_info": app.get_disk_info,
+        "collector.get_network_info": app.get_network_info,
+        "collector.get_interface_info": app.get_interface_info,
+        "collector.get_connection_info": app.get_connection_info,
+        "collector.get_temperature_info": app.get_temperature_info,
+        "collector.get_process_info": app.get_process_info,
+        "collector.collect_system_data": app.collect_system_data,
+        "store_in_influxdb": lambda: app.store_in_influxdb(sample)
+    }
+
+    results = {}
+    for name, func in cases.items():
+        results[name] = measure(func, min_time=args.min_time, repeat=args.repeat)
+        report(name, results[name])
+
+    shutil.rmtree(mount_root, ignore_errors=True)
+    return results
+
+def bench_data_processor(args):
+    """วัดเวลาของ DataProcessor analytics กับประวัติข้อมูลหลายขนาด"""
+    from utils.data_processor import DataProcessor
+    from utils.downsample import lttb
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+            processor = DataProcessor(data_file=os.path.join(tmpdir, "missing.log"), max_entries=size)
+            processor.registry.assign(*make_history(size))
+
+            cases = {
+                "get_average": lambda: processor.get_average(hours=24 * 365, series='cpu'),
+                "detect_anomalies": lambda: processor.detect_anomalies(),
+                "predict_usage_trend": lambda: processor.predict_usage_trend(days=7, series='cpu'),
+                "get_peak_usage_times": lambda: processor.get_peak_usage_times(series='cpu'),
+                "detect_change_points": lambda: processor.detect_change_points(hours=None, series=('cpu', 'memory', 'disk')),
+                "predict_usage_trend_all_disks": lambda: processor.predict_usage_trend(days=7, series='disk'),
+                "history_lttb_500": lambda: lttb(*processor.get_series(series='cpu'), 500)
+            }
+
+            # ข้อมูลใหญ่ใช้รอบเดียวเพื่อไม่ให้ใช้เวลานานเกินไป
+            repeat = args.repeat if size <= 100000 else 1
+            for method, func in cases.items():
+                name = f"data_processor.{method}[{size}]"
+                results[name] = measure(func, min_time=args.min_time, repeat=repeat)
+                report(name, results[name])
+
+            del processor
+            gc.collect()
+    return results
+
+def bench_batch_analytics(args):
+    """วัดเวลาของ batch analytics กับไฟล์ประวัติข้อมูลตามจำนวน worker และตรวจว่าผลตรงกับแบบ serial"""
+    from utils.batch_analytics import analyze_history
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "system_data.log")
+        write_history_file(path, args.batch_lines)
+
+        cpus = os.cpu_count() or 1
+        worker_counts = sorted({1, cpus} | {count for count in (2, 4, 8, 16, 32) if count < cpus})
+        serial = None
+        for workers in worker_counts:
+            outputs = []
+            name = f"batch_analytics.workers_{workers}[{args.batch_lines}]"
+            results[name] = measure(lambda: outputs.append(analyze_history(path, workers=workers)), min_time=0, repeat=1)
+            report(name, results[name])
+            if serial is None:
+                serial = results[name]["time"], outputs[0]["series"]
+            elif outputs[0]["series"] != serial[1]:
+                raise AssertionError(f"ผลลัพธ์ของ {workers} workers ไม่ตรงกับแบบ serial")
+            else:
+                print(f"{'':<52} {serial[0] / results[name]['time']:>11.2f}x")
+    return results
+
+def bench_storage(args):
+    """เปรียบเทียบขนาดต่อตัวอย่างและเวลาอ่านของประวัติข้อมูลแบบ JSONL กับ Gorilla block"""
+    from utils.data_processor import DataProcessor
+    from utils.gorilla import BlockFile, decode_block
+
+    results = {}
+    sizes = {}
+    # ค่าสุ่มคือกรณีที่บีบอัดได้น้อยที่สุด ส่วน walk ใกล้เคียงข้อมูลจริงที่บันทึกทุกวินาที
+    for pattern in ("random", "walk"):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "system_data.log")
+            write_history_file(path, args.batch_lines, interval=1, pattern=pattern)
+            with open(path, 'r') as f:
+                lines = f.readlines()
+            jsonl_bytes = os.path.getsize(path)
+
+            # แปลง history แบบ JSONL เดิมเป็น block (เหมือนการเปิดใช้ storage=gorilla ครั้งแรก)
+            # แต่ละครั้งเริ่มจากสำเนาใหม่ เพราะครั้งที่สองจะเจอ store ที่แปลงแล้ว
+            gorilla_path = os.path.join(tmpdir, "gorilla.log")
+            store = BlockFile(os.path.join(tmpdir, "gorilla.gorilla"))
+            processors = []
+
+            def fresh_copy():
+                for leftover in (store.path, gorilla_path + ".migrated"):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+                shutil.copy(path, gorilla_path)
+                processors.clear()
+
+            name = f"storage.migrate_jsonl.{pattern}[{args.batch_lines}]"
+            results[name] = measure(
+                lambda: processors.append(DataProcessor(gorilla_path, max_entries=1000, storage='gorilla')),
+                min_time=0, repeat=1, setup=fresh_copy
+            )
+            report(name, results[name])
+            # ตัวอย่างที่ยังไม่ครบ block_size อยู่ใน journal จึงเขียนเป็น block ก่อนวัดขนาด
+            processors[-1]._flush_block()
+            gorilla_bytes = os.path.getsize(store.path)
+            sizes[pattern] = jsonl_bytes, gorilla_bytes
+
+            name = f"storage.read_jsonl.{pattern}[{args.batch_lines}]"
+            results[name] = measure(lambda: [json.loads(line) for line in lines], args.min_time, args.repeat)
+            report(name, results[name])
+            blocks = list(store)
+            name = f"storage.read_gorilla.{pattern}[{args.batch_lines}]"
+            results[name] = measure(lambda: [decode_block(block) for block in blocks], args.min_time, args.repeat)
+            report(name, results[name])
+            name = f"storage.read_gorilla_cpu.{pattern}[{args.batch_lines}]"
+            results[name] = measure(lambda: [decode_block(block, names=["cpu"]) for block in blocks],
+                                    args.min_time, args.repeat)
+            report(name, results[name])
+
+    # ประมาณขนาดของข้อมูลหนึ่งปีที่บันทึกทุกวินาที
+    year = 365 * 86400
+    for pattern, (jsonl_bytes, gorilla_bytes) in sizes.items():
+        for label, size in (("jsonl", jsonl_bytes), ("gorilla", gorilla_bytes)):
+            per_sample = size / args.batch_lines
+            print(f"{pattern + ' ' + label:<16} {per_sample:>10.1f} bytes/sample "
+                  f"{per_sample * year / 1024**2:>10.0f} MiB/year at 1 Hz")
+        ratio = f"{jsonl_bytes / gorilla_bytes:.1f}x" if gorilla_bytes else "n/a"
+        print(f"{pattern + ' ratio':<16} {ratio:>10}")
+    return results
+
+def bench_startup(args):
+    """วัดเวลาตั้งแต่เริ่ม process จน import app.py เสร็จ (พร้อมทำงาน) ของแต่ละ fleet mode"""
+    import subprocess
+
+    with open(os.path.join(ROOT_DIR, "config", "settings.json.example"), 'r') as f:
+        settings = json.load(f)
+
+    results = {}
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    # os._exit เพื่อไม่นับเวลาปิด interpreter
+    command = [sys.executable, "-c", "import os, app; os._exit(0)"]
+    for mode in ("agent", "standalone"):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.makedirs(os.path.join(tmpdir, "config"))
+            settings["fleet"]["mode"] = mode
+            with open(os.path.join(tmpdir, "config", "settings.json"), 'w') as f:
+                json.dump(settings, f)
+            name = f"startup.{mode}"
+            results[name] = measure(lambda: subprocess.run(command, cwd=tmpdir, env=env, check=True),
+                                    min_time=0, repeat=max(args.repeat, 5))
+            report(name, results[name])
+    return results
+
+def format_time(seconds):
+    """แปลงเวลาเป็นหน่วยที่อ่านง่าย"""
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+def report(name, result):
+    """แสดงผลของ benchmark หนึ่งรายการ"""
+    print(f"{name:<52} {format_time(result['time']):>12} {result['peak_bytes'] / 1024**2:>10.2f} MiB")
+
+def compare_baseline(results, baseline, tolerance, min_delta):
+    """
+    เปรียบเทียบผลกับ baseline
+
+    Returns:
+        list: รายการ benchmark ที่ช้าลงหรือใช้หน่วยความจำมากขึ้นเกิน tolerance
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["time"] > base["time"] * (1 + tolerance) and result["time"] - base["time"] > min_delta:
+            regressions.append(f"{name}: time {format_time(base['time'])} -> {format_time(result['time'])}")
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + tolerance) and \
+                result["peak_bytes"] - base["peak_bytes"] > 64 * 1024:
+            regressions.append(f"{name}: peak memory {base['peak_bytes']} -> {result['peak_bytes']} bytes")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for Ubuntu Health Monitor")
+    parser.add_argument("--only", choices=["collectors", "data_processor", "batch_analytics", "storage", "startup"], help="Run only one group")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"History sizes for DataProcessor benchmarks (default: {DEFAULT_SIZES})")
+    parser.add_argument("--batch-lines", default=100000, type=int,
+                        help="Lines in the history file for batch analytics and storage (default: 100000)")
+    parser.add_argument("--partitions", default=20, type=int, help="Fake disk partitions (default: 20)")
+    parser.add_argument("--interfaces", default=20, type=int, help="Fake network interfaces (default: 20)")
+    parser.add_argument("--connections", default=5000, type=int, help="Fake inet connections (default: 5000)")
+    parser.add_argument("--processes", default=5000, type=int, help="Fake processes in /proc (default: 5000)")
+    parser.add_argument("--sensors", default=16, type=int, help="Fake temperature sensors (default: 16)")
+    parser.add_argument("--min-time", default=0.2, type=float, help="Minimum seconds per timing round (default: 0.2)")
+    parser.add_argument("--repeat", default=3, type=int, help="Timing rounds, best is reported (default: 3)")
+    parser.add_argument("--save", help="Save results as JSON baseline to this file")
+    parser.add_argument("--baseline", help="Fail if results regress past this saved baseline")
+    parser.add_argument("--tolerance", default=0.25, type=float,
+                        help="Allowed relative regression against baseline (default: 0.25)")
+    parser.add_argument("--min-delta", default=0.0005, type=float,
+                        help="Ignore time regressions smaller than this many seconds (default: 0.0005)")
+
+    args = parser.parse_args()
+
+    # app.py อ่านไฟล์ config และเขียน log แบบ relative path
+    os.chdir(ROOT_DIR)
+
+    results = {}
+    if args.only in (None, "collectors"):
+        print_header("Collectors (fake psutil)")
+        results.update(bench_collectors(args))
+    if args.only in (None, "data_processor"):
+        print_header("DataProcessor analytics")
+        results.update(bench_data_processor(args))
+    if args.only in (None, "batch_analytics"):
+        print_header("Batch analytics (history file)")
+        results.update(bench_batch_analytics(args))
+    if args.only in (None, "storage"):
+        print_header("History storage (JSONL vs Gorilla)")
+        results.update(bench_storage(args))
+    if args.only in (None, "startup"):
+        print_header("Startup (import app.py in a new process)")
+        results.update(bench_startup(args))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_baseline(results, baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print_header("Regressions")
+            for line in regressions:
+                print(line)
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance * 100:.0f}%)")
+
+if __name__ == "__main__":
+    main()
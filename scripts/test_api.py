@@ -7,9 +7,14 @@ Ubuntu Health Monitor - API Test Script
 """
 
 import json
+import math
+import random
 import requests
 import argparse
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 
 def format_bytes(bytes_value):
@@ -95,6 +100,9 @@ def print_disk_info(data):
     print("Partitions:")
     for part in partitions:
         print(f"  {part['device']} ({part['mountpoint']}, {part['fstype']}):")
+        if part.get('available') is False:
+            print(f"    Unavailable ({part.get('status')})")
+            continue
         print(f"    Total:   {format_bytes(part['total'])}")
         print(f"    Used:    {format_bytes(part['used'])} ({part['percent']}%)")
         print(f"    Free:    {format_bytes(part['free'])}")
@@ -194,6 +202,195 @@ def print_ai_summary(data):
     print(data["summary"])
     print(f"\nAnalysis timestamp: {datetime.fromisoformat(data['timestamp']).strftime('%Y-%m-%d %H:%M:%S')}")
 
+def parse_mix(mix):
+    """แปลงค่า --mix เช่น "/api/v1/system/info=3,/api/v1/system/cpu=1" เป็น list ของ (endpoint, weight)"""
+    endpoints = []
+    for item in mix.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if "=" in item:
+            endpoint, weight = item.rsplit("=", 1)
+            weight = float(weight)
+        else:
+            endpoint, weight = item, 1.0
+        if weight <= 0:
+            raise ValueError(f"weight ของ {endpoint} ต้องมากกว่า 0")
+        endpoints.append((endpoint, weight))
+    if not endpoints:
+        raise ValueError("ต้องระบุ endpoint อย่างน้อยหนึ่งรายการ")
+    return endpoints
+
+def percentile(sorted_values, pct):
+    """คำนวณ percentile แบบ nearest-rank จากข้อมูลที่เรียงแล้ว"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def run_benchmark(base_url, mix, concurrency=10, duration=None, total_requests=None,
+                  timeout=30, warmup=0, seed=None):
+    """
+    ยิง request พร้อมกันหลาย client ตามสัดส่วน endpoint ที่กำหนด
+
+    หยุดเมื่อครบเวลา duration หรือครบจำนวน total_requests (อย่างใดอย่างหนึ่ง)
+    """
+    endpoints = [endpoint for endpoint, _ in mix]
+    weights = [weight for _, weight in mix]
+    results = {endpoint: {"latencies": [], "bytes": 0, "errors": 0, "status": {}} for endpoint in endpoints}
+    lock = threading.Lock()
+    counter = {"issued": 0}
+    stop = threading.Event()
+    # เริ่มจับเวลาหลังทุก client warmup เสร็จแล้ว (warmup ไม่ถูกนับใน duration และ throughput)
+    ready = threading.Barrier(concurrency + 1)
+
+    def take_ticket():
+        # จำกัดจำนวน request รวมของทุก client
+        with lock:
+            if total_requests is not None and counter["issued"] >= total_requests:
+                return False
+            counter["issued"] += 1
+            return True
+
+    def client(worker_id):
+        rng = random.Random(None if seed is None else seed + worker_id)
+        session = requests.Session()
+        local = {endpoint: {"latencies": [], "bytes": 0, "errors": 0, "status": {}} for endpoint in endpoints}
+
+        # warmup request ไม่ถูกนับในผลลัพธ์
+        try:
+            for _ in range(warmup):
+                try:
+                    session.get(f"{base_url}{rng.choices(endpoints, weights)[0]}", timeout=timeout)
+                except requests.exceptions.RequestException:
+                    pass
+        except BaseException:
+            # ไม่ให้ client อื่นและ thread หลักรอ barrier ตลอดไป
+            ready.abort()
+            raise
+        ready.wait()
+
+        while not stop.is_set() and take_ticket():
+            endpoint = rng.choices(endpoints, weights)[0]
+            stats = local[endpoint]
+            start = time.perf_counter()
+            try:
+                response = session.get(f"{base_url}{endpoint}", timeout=timeout)
+                body = response.content
+                elapsed = time.perf_counter() - start
+                stats["latencies"].append(elapsed)
+                stats["bytes"] += len(body)
+                stats["status"][response.status_code] = stats["status"].get(response.status_code, 0) + 1
+                if response.status_code >= 400:
+                    stats["errors"] += 1
+            except requests.exceptions.RequestException:
+                stats["latencies"].append(time.perf_counter() - start)
+                stats["errors"] += 1
+                stats["status"]["exception"] = stats["status"].get("exception", 0) + 1
+
+        with lock:
+            for endpoint, stats in local.items():
+                merged = results[endpoint]
+                merged["latencies"].extend(stats["latencies"])
+                merged["bytes"] += stats["bytes"]
+                merged["errors"] += stats["errors"]
+                for status, count in stats["status"].items():
+                    merged["status"][status] = merged["status"].get(status, 0) + count
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(client, i) for i in range(concurrency)]
+        try:
+            ready.wait()
+        except threading.BrokenBarrierError:
+            # client ล้มเหลวระหว่าง warmup (ข้อผิดพลาดถูกส่งต่อจาก future.result() ด้านล่าง)
+            pass
+        started = time.perf_counter()
+        # ถ้า request ครบก่อนหมดเวลา client ทั้งหมดจะจบก่อน จึงไม่ต้องรอจนครบ duration
+        wait(futures, timeout=duration)
+        stop.set()
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    return summarize_benchmark(results, elapsed, concurrency)
+
+def summarize_benchmark(results, elapsed, concurrency):
+    """สรุปผล benchmark เป็น throughput, latency percentiles, error rate และขนาด response"""
+    summary = {
+        "timestamp": datetime.now().isoformat(),
+        "duration": elapsed,
+        "concurrency": concurrency,
+        "endpoints": {}
+    }
+    total_requests = 0
+    total_errors = 0
+
+    for endpoint, stats in results.items():
+        latencies = sorted(stats["latencies"])
+        count = len(latencies)
+        total_requests += count
+        total_errors += stats["errors"]
+        if count == 0:
+            continue
+        summary["endpoints"][endpoint] = {
+            "requests": count,
+            "throughput": count / elapsed if elapsed > 0 else None,
+            "errors": stats["errors"],
+            "error_rate": stats["errors"] / count,
+            "status": {str(k): v for k, v in stats["status"].items()},
+            "latency_ms": {
+                "mean": sum(latencies) / count * 1000,
+                "p50": percentile(latencies, 50) * 1000,
+                "p90": percentile(latencies, 90) * 1000,
+                "p99": percentile(latencies, 99) * 1000,
+                "max": latencies[-1] * 1000
+            },
+            "response_bytes": {
+                "total": stats["bytes"],
+                "mean": stats["bytes"] / count
+            }
+        }
+
+    summary["total"] = {
+        "requests": total_requests,
+        "throughput": total_requests / elapsed if elapsed > 0 else None,
+        "errors": total_errors,
+        "error_rate": total_errors / total_requests if total_requests else None
+    }
+    return summary
+
+def print_benchmark(summary, baseline=None):
+    """แสดงผล benchmark และเปรียบเทียบกับ baseline (ถ้ามี)"""
+    print_header("Benchmark Results")
+    total = summary["total"]
+    print(f"Duration:    {summary['duration']:.2f} s")
+    print(f"Concurrency: {summary['concurrency']}")
+    print(f"Requests:    {total['requests']} ({total['throughput'] or 0:.1f} req/s)")
+    if total["requests"]:
+        print(f"Errors:      {total['errors']} ({total['error_rate'] * 100:.2f}%)")
+
+    for endpoint, stats in summary["endpoints"].items():
+        latency = stats["latency_ms"]
+        print(f"\n{endpoint}")
+        print(f"  Requests:   {stats['requests']} ({stats['throughput']:.1f} req/s), "
+              f"errors {stats['errors']} ({stats['error_rate'] * 100:.2f}%)")
+        print(f"  Latency:    p50 {latency['p50']:.2f} ms, p90 {latency['p90']:.2f} ms, "
+              f"p99 {latency['p99']:.2f} ms, max {latency['max']:.2f} ms")
+        print(f"  Response:   {format_bytes(int(stats['response_bytes']['mean']))} avg")
+
+        if baseline and endpoint in baseline.get("endpoints", {}):
+            base = baseline["endpoints"][endpoint]
+            print("  vs baseline:")
+            for key in ("p50", "p90", "p99"):
+                print(f"    {key}:       {format_change(base['latency_ms'][key], latency[key])}")
+            print(f"    throughput: {format_change(base['throughput'], stats['throughput'])}")
+
+def format_change(old, new):
+    """แสดงการเปลี่ยนแปลงเป็นเปอร์เซ็นต์"""
+    if not old:
+        return f"{new:.2f} (no baseline)"
+    return f"{old:.2f} -> {new:.2f} ({(new - old) / old * 100:+.1f}%)"
+
 def main():
     parser = argparse.ArgumentParser(description="Test Ubuntu Health Monitor API")
     parser.add_argument("--host", default="localhost", help="API host (default: localhost)")
@@ -202,11 +399,64 @@ def main():
                         help="API endpoint to test (default: /api/v1/system/info)")
     parser.add_argument("--summary", action="store_true", help="Get AI summary of system status")
     parser.add_argument("--json", action="store_true", help="Output raw JSON")
+    parser.add_argument("--bench", action="store_true", help="Run concurrent load-test/latency benchmark")
+    parser.add_argument("--mix", default="/api/v1/system/info",
+                        help="Endpoints and weights for --bench, e.g. /api/v1/system/info=3,/api/v1/system/cpu=1")
+    parser.add_argument("--concurrency", default=10, type=int, help="Number of concurrent clients (default: 10)")
+    parser.add_argument("--duration", type=float, help="Benchmark duration in seconds (default: 30 if --requests not set)")
+    parser.add_argument("--requests", type=int, help="Total number of requests to send")
+    parser.add_argument("--warmup", default=0, type=int, help="Warmup requests per client, not counted (default: 0)")
+    parser.add_argument("--timeout", default=30, type=float, help="Request timeout in seconds (default: 30)")
+    parser.add_argument("--seed", type=int, help="Random seed for a repeatable endpoint sequence")
+    parser.add_argument("--save", help="Save benchmark results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare benchmark results with a saved JSON file")
     
     args = parser.parse_args()
     
     base_url = f"http://{args.host}:{args.port}"
     
+    if args.bench and args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    
+    if args.bench:
+        try:
+            mix = parse_mix(args.mix)
+        except ValueError as e:
+            print(f"Invalid --mix: {str(e)}")
+            sys.exit(1)
+        
+        duration = args.duration
+        if duration is None and args.requests is None:
+            duration = 30
+        
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        
+        print(f"Benchmarking {base_url} with {args.concurrency} clients...")
+        summary = run_benchmark(
+            base_url, mix,
+            concurrency=args.concurrency,
+            duration=duration,
+            total_requests=args.requests,
+            timeout=args.timeout,
+            warmup=args.warmup,
+            seed=args.seed
+        )
+        
+        if args.json:
+            print(json.dumps(summary, indent=2))
+        else:
+            print_benchmark(summary, baseline)
+        
+        if args.save:
+            with open(args.save, 'w') as f:
+                json.dump(summary, f, indent=2)
+            print(f"\nResults saved to {args.save}")
+        
+        sys.exit(0 if summary["total"]["requests"] else 1)
+    
     if args.summary:
         endpoint = "/api/v1/system/summary"
     else:
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Alert Cooldown
+
+ใช้สำหรับจำกัดการส่งการแจ้งเตือนซ้ำของ host และ threshold เดียวกัน
+"""
+
+import threading
+import time
+
+class AlertCooldown:
+    """
+    คลาสสำหรับกรองการแจ้งเตือนที่เพิ่งส่งไปแล้ว (แยกตาม host และชนิดของการแจ้งเตือน)
+
+    ชนิดของการแจ้งเตือนคือข้อความก่อน ": " เช่น "⚠️ Disk usage is high on /var"
+    ค่าที่วัดได้ (ซึ่งเปลี่ยนทุกรอบ) จึงไม่ทำให้ถือเป็นการแจ้งเตือนใหม่
+    """
+
+    def __init__(self, seconds=300, max_entries=100000):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Alert Cooldown
+
+        Args:
+            seconds (float): ระยะเวลาขั้นต่ำระหว่างการแจ้งเตือนชนิดเดียวกันของ host เดียวกัน (0 คือไม่จำกัด)
+            max_entries (int): จำนวนคู่ host/การแจ้งเตือนสูงสุดที่จำไว้
+        """
+        self.seconds = seconds
+        self.max_entries = max_entries
+        self.last_sent = {}
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, host, alerts):
+        """
+        เลือกเฉพาะการแจ้งเตือนที่พ้นช่วง cooldown แล้ว และบันทึกเวลาส่งของรายการที่ผ่าน
+
+        Args:
+            host (str): ชื่อ host
+            alerts (list): ข้อความแจ้งเตือน
+
+        Returns:
+            list: ข้อความแจ้งเตือนที่ควรส่ง
+        """
+        if not self.seconds:
+            return list(alerts)
+
+        now = time.monotonic()
+        result = []
+        with self._lock:
+            for alert in alerts:
+                key = (host, alert.split(": ", 1)[0])
+                sent = self.last_sent.get(key)
+                if sent is not None and now - sent < self.seconds:
+                    self.suppressed += 1
+                    continue
+                self.last_sent[key] = now
+                result.append(alert)
+
+            if len(self.last_sent) > self.max_entries:
+                self.last_sent = {key: sent for key, sent in self.last_sent.items() if now - sent < self.seconds}
+        return result
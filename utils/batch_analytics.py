@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Batch Analytics
+
+ใช้สำหรับวิเคราะห์ไฟล์ประวัติข้อมูลขนาดใหญ่ (เช่น logs/system_data.log ทั้งปี หรือ logs/system_data.gorilla) แบบขนาน
+ไฟล์ถูกแบ่งเป็นช่วง byte ที่ตรงกับขอบบรรทัด (หรือขอบ block) แต่ละ process parse และรวมข้อมูลเป็น histogram ของค่า
+แยกตาม series และชั่วโมง ซึ่งรวมกันได้แบบไม่สูญเสียความแม่นยำ ผลลัพธ์จึงตรงกับการคำนวณแบบ serial ทุกค่า
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from fractions import Fraction
+
+from utils.gorilla import BlockFile, decode_block
+from utils.series_registry import COUNTER_METRICS, match_series, parse_series_name, series_name, split_sample
+
+def chunk_ranges(path, chunk_size, start=0):
+    """
+    แบ่งไฟล์เป็นช่วง byte ที่สิ้นสุดที่ขอบบรรทัด
+
+    Args:
+        path (str): ไฟล์ประวัติข้อมูล (หนึ่ง JSON ต่อบรรทัด)
+        chunk_size (int): ขนาดโดยประมาณของแต่ละช่วง (bytes)
+        start (int): ตำแหน่งเริ่มต้น (ต้องเป็นจุดเริ่มของบรรทัด)
+
+    Returns:
+        list: รายการ (start, end) ที่ต่อเนื่องกันและครอบคลุมทั้งไฟล์
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as f:
+        while start < size:
+            end = start + chunk_size
+            if end < size:
+                # เลื่อนไปยังจุดเริ่มของบรรทัดถัดไปเพื่อไม่ให้บรรทัดถูกแบ่งครึ่ง
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, min(end, size)))
+            start = min(end, size)
+    return ranges
+
+def block_ranges(path, chunk_size):
+    """
+    แบ่งไฟล์ Gorilla เป็นช่วง byte ที่ตรงกับขอบ block
+
+    Args:
+        path (str): ไฟล์ .gorilla
+        chunk_size (int): ขนาดโดยประมาณของแต่ละช่วง (bytes)
+
+    Returns:
+        list: รายการ (start, end) ที่ต่อเนื่องกัน (ไม่รวม block สุดท้ายที่เขียนไม่ครบ)
+    """
+    ranges = []
+    start = end = 0
+    for _, end in BlockFile(path).iter_from(0):
+        if end - start >= chunk_size:
+            ranges.append((start, end))
+            start = end
+    if end > start:
+        ranges.append((start, end))
+    return ranges
+
+class HistoryPartial:
+    """
+    ผลรวมบางส่วนของไฟล์ประวัติข้อมูลหนึ่งช่วง
+
+    เก็บจำนวนครั้งของแต่ละค่าแยกตาม series และชั่วโมงของวัน (ตามเวลาท้องถิ่น) ค่าเฉลี่ย, ชั่วโมงที่ใช้งานสูงสุด
+    และ quartile คำนวณได้จาก histogram นี้โดยตรง ตัวนับสะสม (network) เก็บค่าแรกและค่าสุดท้ายของช่วงไว้
+    เพื่อคำนวณอัตราที่รอยต่อระหว่างช่วงเมื่อรวมผลลัพธ์
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.first_counters = {}
+        self.last_counters = {}
+        self.lines = 0
+        self.errors = 0
+        self.first_time = None
+        self.last_time = None
+
+    def add(self, name, hour, value):
+        """เพิ่มค่าหนึ่งค่าลงใน histogram ของ series และชั่วโมง"""
+        hours = self.histograms.get(name)
+        if hours is None:
+            hours = self.histograms[name] = [Counter() for _ in range(24)]
+        hours[hour][value] += 1
+
+    def add_counter(self, name, timestamp, hour, value):
+        """เพิ่มค่าของตัวนับสะสมและแปลงเป็นอัตราต่อวินาทีเมื่อมีค่าก่อนหน้า (กติกาเดียวกับ SeriesRegistry)"""
+        previous = self.last_counters.get(name)
+        if previous is None:
+            self.first_counters.setdefault(name, (timestamp, hour, value))
+        elif timestamp > previous[0] and value >= previous[2]:
+            self.add(name, hour, (value - previous[2]) / (timestamp - previous[0]))
+        self.last_counters[name] = (timestamp, hour, value)
+
+    def merge(self, other):
+        """
+        รวมผลของช่วงที่อยู่ถัดไป (ต้องรวมตามลำดับเวลาของช่วง)
+
+        Args:
+            other (HistoryPartial): ผลรวมของช่วงถัดไป
+
+        Returns:
+            HistoryPartial: ตัวเอง
+        """
+        for name, hours in other.histograms.items():
+            mine = self.histograms.get(name)
+            if mine is None:
+                self.histograms[name] = hours
+            else:
+                for counter, extra in zip(mine, hours):
+                    counter.update(extra)
+
+        # ค่าแรกของตัวนับในช่วงถัดไปใช้ค่าสุดท้ายของช่วงนี้เป็นค่าก่อนหน้า
+        for name, (timestamp, hour, value) in other.first_counters.items():
+            previous = self.last_counters.get(name)
+            if previous is None:
+                self.first_counters.setdefault(name, (timestamp, hour, value))
+            elif timestamp > previous[0] and value >= previous[2]:
+                self.add(name, hour, (value - previous[2]) / (timestamp - previous[0]))
+        self.last_counters.update(other.last_counters)
+
+        self.lines += other.lines
+        self.errors += other.errors
+        if other.first_time is not None and (self.first_time is None or other.first_time < self.first_time):
+            self.first_time = other.first_time
+        if other.last_time is not None and (self.last_time is None or other.last_time > self.last_time):
+            self.last_time = other.last_time
+        return self
+
+def aggregate_chunk(task):
+    """
+    parse และรวมข้อมูลของไฟล์หนึ่งช่วง (ทำงานใน worker process)
+
+    Args:
+        task (tuple): (path, start, end, selectors, range_start, range_end)
+
+    Returns:
+        HistoryPartial: ผลรวมของช่วงนี้
+    """
+    path, start, end, selectors, range_start, range_end = task
+    if path.endswith('.gorilla'):
+        return aggregate_blocks(task)
+    partial = HistoryPartial()
+    offsets = {}
+    names = {}
+    add = partial.add
+
+    with open(path, 'rb') as f:
+        f.seek(start)
+        lines = f.read(end - start).splitlines()
+
+    for line in lines:
+        if not line.strip():
+            continue
+        partial.lines += 1
+        try:
+            entry = json.loads(line)
+            timestamp = datetime.fromisoformat(entry['timestamp']).timestamp()
+        except (ValueError, KeyError, TypeError):
+            partial.errors += 1
+            continue
+        if (range_start is not None and timestamp < range_start) or (range_end is not None and timestamp > range_end):
+            continue
+        if partial.first_time is None or timestamp < partial.first_time:
+            partial.first_time = timestamp
+        if partial.last_time is None or timestamp > partial.last_time:
+            partial.last_time = timestamp
+
+        # ชั่วโมงตามเวลาท้องถิ่น (UTC offset คำนวณครั้งเดียวต่อชั่วโมงเหมือน DataProcessor)
+        hour_index = int(timestamp // 3600)
+        offset = offsets.get(hour_index)
+        if offset is None:
+            offset = offsets[hour_index] = time.localtime(hour_index * 3600).tm_gmtoff
+        hour = int((timestamp + offset) // 3600 % 24)
+
+        for metric, label, value in split_sample(entry):
+            if value is None:
+                continue
+            # ชื่อ series และผลการเลือกถูก cache ต่อ (metric, label) เพราะถูกเรียกทุกค่าของทุกบรรทัด
+            key = (metric, label)
+            name = names.get(key)
+            if name is None:
+                name = series_name(metric, label)
+                name = names[key] = name if not selectors or match_series(name, selectors) else False
+            if name is False:
+                continue
+            if metric in COUNTER_METRICS:
+                partial.add_counter(name, timestamp, hour, value)
+            else:
+                add(name, hour, value)
+    return partial
+
+def aggregate_blocks(task):
+    """
+    ถอดรหัสและรวมข้อมูลของ block ในช่วงหนึ่งของไฟล์ Gorilla (ทำงานใน worker process)
+
+    Args:
+        task (tuple): (path, start, end, selectors, range_start, range_end) start และ end เป็นขอบของ block
+
+    Returns:
+        HistoryPartial: ผลรวมของช่วงนี้ (lines คือจำนวนตัวอย่าง)
+    """
+    path, start, end, selectors, range_start, range_end = task
+    partial = HistoryPartial()
+    offsets = {}
+    matches = {}
+
+    for block, offset in BlockFile(path).iter_from(start):
+        if offset > end:
+            break
+        times, series = decode_block(block)
+        times = times.tolist()
+        partial.lines += len(times)
+
+        hours = []
+        for timestamp in times:
+            hour_index = int(timestamp // 3600)
+            offset_seconds = offsets.get(hour_index)
+            if offset_seconds is None:
+                offset_seconds = offsets[hour_index] = time.localtime(hour_index * 3600).tm_gmtoff
+            hours.append(int((timestamp + offset_seconds) // 3600 % 24))
+        selected = [
+            (range_start is None or timestamp >= range_start) and (range_end is None or timestamp <= range_end)
+            for timestamp in times
+        ]
+        for timestamp, keep in zip(times, selected):
+            if not keep:
+                continue
+            if partial.first_time is None or timestamp < partial.first_time:
+                partial.first_time = timestamp
+            if partial.last_time is None or timestamp > partial.last_time:
+                partial.last_time = timestamp
+
+        # ค่าของแต่ละ series อยู่ใน column แยกกัน (NaN คือไม่มีค่าในตัวอย่างนั้น)
+        for name, column in series.items():
+            match = matches.get(name)
+            if match is None:
+                match = matches[name] = not selectors or match_series(name, selectors)
+            if not match:
+                continue
+            counter = parse_series_name(name)[0] in COUNTER_METRICS
+            for timestamp, hour, keep, value in zip(times, hours, selected, column.tolist()):
+                if not keep or value != value:
+                    continue
+                if counter:
+                    partial.add_counter(name, timestamp, hour, value)
+                else:
+                    partial.add(name, hour, value)
+    return partial
+
+def _exact_sum(counter):
+    """
+    ผลรวมแบบ exact ของ histogram เป็นเศษส่วน
+
+    ค่า float ทุกตัวคือจำนวนเต็มหารด้วยกำลังของ 2 จึงรวมเป็นจำนวนเต็มบนตัวส่วนร่วมได้โดยไม่ปัดเศษ
+    """
+    terms = [(value.as_integer_ratio(), count) for value, count in counter.items()]
+    if not terms:
+        return Fraction(0)
+    exponent = max(denominator.bit_length() - 1 for (_, denominator), _ in terms)
+    total = sum(
+        numerator * count << (exponent - denominator.bit_length() + 1)
+        for (numerator, denominator), count in terms
+    )
+    return Fraction(total, 1 << exponent)
+
+def _kth_value(items, k):
+    """ค่าลำดับที่ k (เริ่มที่ 0) จากรายการ (ค่า, จำนวน) ที่เรียงแล้ว"""
+    seen = 0
+    for value, count in items:
+        seen += count
+        if seen > k:
+            return value
+    return items[-1][0]
+
+def summarize_series(task):
+    """
+    รวม histogram ของ series หนึ่งจากทุกช่วงและคำนวณผลวิเคราะห์ (ทำงานใน worker process ได้)
+
+    ผลรวมคำนวณเป็นเศษส่วนแบบ exact แล้วจึงปัดเป็น float ครั้งเดียว จึงไม่ขึ้นกับลำดับหรือจำนวนช่วงที่รวม
+
+    Args:
+        task (tuple): (ชื่อ series, list ของ histogram รายชั่วโมงจากแต่ละช่วง, ตัวคูณ IQR)
+
+    Returns:
+        tuple: (ชื่อ series, ผลวิเคราะห์ หรือ None ถ้าไม่มีข้อมูล)
+    """
+    name, hour_lists, threshold_multiplier = task
+    hours = [Counter() for _ in range(24)]
+    for chunk_hours in hour_lists:
+        for counter, extra in zip(hours, chunk_hours):
+            counter.update(extra)
+
+    hour_counts = [sum(counter.values()) for counter in hours]
+    hour_sums = [_exact_sum(counter) for counter in hours]
+    count = sum(hour_counts)
+    if not count:
+        return name, None
+
+    averages = {hour: float(hour_sums[hour] / hour_counts[hour]) for hour in range(24) if hour_counts[hour]}
+    # เรียงจากค่าเฉลี่ยมากไปน้อย (ชั่วโมงที่เท่ากันเรียงตามชั่วโมง เหมือน DataProcessor)
+    hour_order = sorted(averages, key=lambda hour: -averages[hour])
+
+    total = Counter()
+    for counter in hours:
+        total.update(counter)
+    items = sorted(total.items())
+
+    anomalies = None
+    if count >= 10:
+        q1 = _kth_value(items, count // 4)
+        q3 = _kth_value(items, 3 * count // 4)
+        iqr = q3 - q1
+        lower_bound = q1 - threshold_multiplier * iqr
+        upper_bound = q3 + threshold_multiplier * iqr
+        anomalies = {
+            "q1": q1,
+            "q3": q3,
+            "lower_bound": lower_bound,
+            "upper_bound": upper_bound,
+            "count": sum(n for value, n in items if value < lower_bound or value > upper_bound)
+        }
+
+    return name, {
+        "metric": parse_series_name(name)[0],
+        "count": count,
+        "average": float(sum(hour_sums) / count),
+        "min": items[0][0],
+        "max": items[-1][0],
+        "peak_hours": [{"hour": hour, "average": round(averages[hour], 2)} for hour in hour_order[:5]],
+        "lowest_hour": {"hour": hour_order[-1], "average": round(averages[hour_order[-1]], 2)},
+        "anomalies": anomalies
+    }
+
+def analyze_history(paths, workers=None, chunk_size=None, series=None, start=None, end=None,
+                    threshold_multiplier=1.5):
+    """
+    วิเคราะห์ไฟล์ประวัติข้อมูลแบบขนานด้วย ProcessPoolExecutor
+
+    ขั้นแรกแต่ละช่วงของไฟล์ถูก parse และรวมเป็น histogram พร้อมกัน ขั้นที่สองรวม histogram และคำนวณผลของ
+    แต่ละ series พร้อมกัน process หลักทำเพียงเชื่อมตัวนับที่รอยต่อระหว่างช่วง
+
+    Args:
+        paths (str | list): ไฟล์ประวัติข้อมูล JSONL หรือ .gorilla (ไฟล์ที่ถูก rotate ให้เรียงจากเก่าไปใหม่)
+        workers (int, optional): จำนวน process (ค่าเริ่มต้นคือจำนวน CPU, 1 คือทำงานใน process นี้)
+        chunk_size (int, optional): ขนาดของแต่ละช่วง (bytes) ค่าเริ่มต้นแบ่งให้ได้ประมาณ 4 ช่วงต่อ worker
+        series (str | list, optional): selector ของ series (ค่าเริ่มต้นคือทุก series)
+        start (float, optional): epoch time เริ่มต้น (รวม)
+        end (float, optional): epoch time สิ้นสุด (รวม)
+        threshold_multiplier (float): ตัวคูณ IQR สำหรับขอบเขตค่าผิดปกติ
+
+    Returns:
+        dict: ผลวิเคราะห์ของแต่ละ series พร้อมจำนวนบรรทัด (หรือตัวอย่างของไฟล์ .gorilla), ช่วงเวลาของข้อมูล
+            และจำนวนช่วงที่ใช้
+    """
+    paths = [paths] if isinstance(paths, str) else list(paths)
+    paths = [path for path in paths if os.path.exists(path)]
+    selectors = ((series,) if isinstance(series, str) else tuple(series)) if series else ()
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    if chunk_size is None:
+        total_size = sum(os.path.getsize(path) for path in paths)
+        chunk_size = max(1024 * 1024, -(-total_size // (workers * 4)))
+    tasks = [
+        (path, chunk_start, chunk_end, selectors, start, end)
+        for path in paths
+        for chunk_start, chunk_end in (block_ranges if path.endswith('.gorilla') else chunk_ranges)(path, chunk_size)
+    ]
+    workers = 1 if len(tasks) <= 1 else min(workers, len(tasks))
+
+    def reduce(partials, map_series):
+        # histogram ของแต่ละช่วงถูกส่งต่อไปรวมตาม series ส่วนตัวนับเชื่อมกันตามลำดับของช่วง
+        combined = HistoryPartial()
+        hour_lists = {}
+        for partial in partials:
+            for name, hours in partial.histograms.items():
+                hour_lists.setdefault(name, []).append(hours)
+            partial.histograms = {}
+            combined.merge(partial)
+        for name, hours in combined.histograms.items():
+            hour_lists.setdefault(name, []).append(hours)
+        summaries = map_series(summarize_series, [
+            (name, hour_lists[name], threshold_multiplier) for name in sorted(hour_lists)
+        ])
+        return combined, {name: summary for name, summary in summaries if summary is not None}
+
+    if workers == 1:
+        combined, results = reduce(map(aggregate_chunk, tasks), map)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # executor.map คืนผลตามลำดับของช่วง ซึ่งจำเป็นต่อการคำนวณอัตราของตัวนับที่รอยต่อ
+            combined, results = reduce(executor.map(aggregate_chunk, tasks), executor.map)
+
+    return {
+        "series": results,
+        "lines": combined.lines,
+        "errors": combined.errors,
+        "from": datetime.fromtimestamp(combined.first_time).isoformat() if combined.first_time is not None else None,
+        "to": datetime.fromtimestamp(combined.last_time).isoformat() if combined.last_time is not None else None,
+        "chunks": len(tasks),
+        "workers": workers
+    }
+
+def main(argv=None):
+    """รันการวิเคราะห์จาก command line และพิมพ์ผลลัพธ์เป็น JSON"""
+    parser = argparse.ArgumentParser(description="Parallel analytics over Ubuntu Health Monitor history files")
+    parser.add_argument("paths", nargs="+", help="JSONL history files or .gorilla block files, oldest first")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Chunk size in MiB")
+    parser.add_argument("--series", action="append", help="Series selector, e.g. disk or disk:/var (repeatable)")
+    parser.add_argument("--threshold", type=float, default=1.5, help="IQR multiplier for anomaly bounds")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    result = analyze_history(
+        args.paths,
+        workers=args.workers,
+        chunk_size=args.chunk_size * 1024 * 1024 if args.chunk_size else None,
+        series=args.series,
+        threshold_multiplier=args.threshold
+    )
+    result["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    json.dump(result, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+if __name__ == "__main__":
+    main()
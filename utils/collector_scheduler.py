@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Collector Scheduler
+
+ใช้สำหรับรัน collector แต่ละตัวในรอบเวลาของตัวเอง และรวมผลล่าสุดเป็น snapshot
+"""
+
+import logging
+import random
+import threading
+import time
+
+class _CollectorState:
+    """สถานะของ collector หนึ่งตัว"""
+
+    def __init__(self, name, func, interval, jitter, budget, max_interval):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.effective_interval = interval
+        self.jitter = jitter
+        self.budget = budget
+        self.max_interval = max_interval
+        self.result = None
+        self.collected_at = None
+        self.last_runtime = None
+        self.avg_runtime = None
+        self.runs = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_attempt = None
+        self.lock = threading.Lock()
+
+class CollectorScheduler:
+    """
+    คลาสสำหรับจัดรอบการทำงานของ collectors แยกกัน พร้อมขยายรอบอัตโนมัติเมื่อใช้เวลาเกิน budget
+    """
+
+    def __init__(self, backoff_factor=2.0, smoothing=0.3):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Collector Scheduler
+
+        Args:
+            backoff_factor (float): ตัวคูณที่ใช้ขยาย/ลดรอบเวลาเมื่อเกินหรือกลับมาอยู่ใน budget
+            smoothing (float): น้ำหนักของค่าล่าสุดใน moving average ของเวลาที่ใช้
+        """
+        self.backoff_factor = backoff_factor
+        self.smoothing = smoothing
+        self.collectors = {}
+        self.running = False
+        self._stop = threading.Event()
+        self._threads = []
+
+    def register(self, name, func, interval, jitter=0.1, budget=None, max_interval=None):
+        """
+        ลงทะเบียน collector
+
+        Args:
+            name (str): ชื่อ collector (ใช้เป็นชื่อ section ใน snapshot)
+            func (callable): ฟังก์ชันที่คืนค่าข้อมูลของ collector
+            interval (float): รอบเวลาปกติ (วินาที)
+            jitter (float): สัดส่วนการสุ่มเลื่อนรอบเวลา เช่น 0.1 = ±10%
+            budget (float, optional): เวลาสูงสุดที่ยอมให้ใช้ต่อรอบ (วินาที)
+            max_interval (float, optional): รอบเวลาสูงสุดเมื่อถูกขยาย (ค่าเริ่มต้น 10 เท่าของ interval)
+        """
+        self.collectors[name] = _CollectorState(
+            name, func, interval, jitter, budget,
+            max_interval if max_interval is not None else interval * 10
+        )
+
+    def run(self, name):
+        """
+        รัน collector หนึ่งรอบทันทีและเก็บผลลัพธ์
+
+        Args:
+            name (str): ชื่อ collector
+
+        Returns:
+            object: ผลลัพธ์ล่าสุดของ collector
+        """
+        state = self.collectors[name]
+        with state.lock:
+            state.last_attempt = time.monotonic()
+        started = time.perf_counter()
+        error = None
+        try:
+            result = state.func()
+        except Exception as e:
+            error = e
+            logging.error(f"Collector {name} ล้มเหลว: {str(e)}")
+        runtime = time.perf_counter() - started
+
+        with state.lock:
+            state.runs += 1
+            state.last_runtime = runtime
+            if state.avg_runtime is None:
+                state.avg_runtime = runtime
+            else:
+                state.avg_runtime += self.smoothing * (runtime - state.avg_runtime)
+
+            if error is None:
+                state.result = result
+                state.collected_at = time.time()
+            else:
+                state.errors += 1
+                state.last_error = f"{type(error).__name__}: {error}"
+
+            self._adjust_interval(state)
+
+        return state.result
+
+    def _adjust_interval(self, state):
+        """ขยายรอบเวลาเมื่อใช้เวลาเกิน budget และค่อยๆ ลดกลับเมื่อเร็วขึ้น"""
+        if state.budget is None:
+            return
+        if state.avg_runtime > state.budget:
+            widened = min(state.max_interval, state.effective_interval * self.backoff_factor)
+            if widened != state.effective_interval:
+                logging.warning(
+                    f"Collector {state.name} ใช้เวลา {state.avg_runtime:.3f}s เกิน budget "
+                    f"{state.budget}s ขยายรอบเป็น {widened}s"
+                )
+            state.effective_interval = widened
+        elif state.avg_runtime < state.budget / 2 and state.effective_interval > state.interval:
+            state.effective_interval = max(state.interval, state.effective_interval / self.backoff_factor)
+
+    def _loop(self, state):
+        """รัน collector ตามรอบเวลาจนกว่าจะหยุด"""
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.run(state.name)
+            interval = state.effective_interval
+            if state.jitter:
+                interval *= 1 + random.uniform(-state.jitter, state.jitter)
+            self._stop.wait(max(0, interval - (time.monotonic() - started)))
+
+    def start(self):
+        """เริ่ม thread ของทุก collector"""
+        if self.running:
+            return
+        self._stop.clear()
+        for state in self.collectors.values():
+            thread = threading.Thread(target=self._loop, args=(state,), name=f"collector-{state.name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.running = True
+
+    def stop(self):
+        """หยุด thread ของทุก collector"""
+        self._stop.set()
+        self.running = False
+        self._threads = []
+
+    def latest(self, name):
+        """
+        ดึงผลลัพธ์ล่าสุดของ collector
+
+        ถ้ายังไม่เคยมีผลลัพธ์จะรันทันที แต่ไม่เกินหนึ่งครั้งต่อรอบเวลา (collector ที่ล้มเหลวตลอดจึงไม่ถูกรันซ้ำ
+        ในทุก request) และคืน {"error": ...} แทนจนกว่าจะสำเร็จ
+
+        Args:
+            name (str): ชื่อ collector
+
+        Returns:
+            tuple: (ผลลัพธ์, epoch time ที่เก็บข้อมูล หรือ None ถ้ายังไม่เคยสำเร็จ)
+        """
+        state = self.collectors[name]
+        with state.lock:
+            result, collected_at = state.result, state.collected_at
+            due = state.last_attempt is None or time.monotonic() - state.last_attempt >= state.effective_interval
+            if collected_at is None and due:
+                # จองรอบนี้ไว้ก่อน เพื่อไม่ให้ request ที่เข้ามาพร้อมกันรัน collector ซ้ำ
+                state.last_attempt = time.monotonic()
+        if collected_at is None and due:
+            self.run(name)
+            with state.lock:
+                result, collected_at = state.result, state.collected_at
+        if collected_at is None:
+            with state.lock:
+                error = state.last_error
+            result = {"error": f"collector {name} ยังไม่มีผลลัพธ์" + (f": {error}" if error else "")}
+        return result, collected_at
+
+    def snapshot(self, names=None):
+        """
+        รวมผลลัพธ์ล่าสุดของหลาย collectors
+
+        Args:
+            names (list, optional): รายชื่อ collectors (ค่าเริ่มต้นคือทั้งหมด)
+
+        Returns:
+            tuple: (dict ของผลลัพธ์, dict ของ epoch time แยกตาม section)
+        """
+        results = {}
+        timestamps = {}
+        for name in names or self.collectors:
+            results[name], timestamps[name] = self.latest(name)
+        return results, timestamps
+
+    def stats(self):
+        """
+        สถิติการทำงานของแต่ละ collector
+
+        Returns:
+            dict: รอบเวลา, เวลาที่ใช้ และจำนวนข้อผิดพลาดของแต่ละ collector
+        """
+        result = {}
+        for name, state in self.collectors.items():
+            with state.lock:
+                result[name] = {
+                    "interval": state.interval,
+                    "effective_interval": state.effective_interval,
+                    "budget": state.budget,
+                    "last_runtime": state.last_runtime,
+                    "avg_runtime": state.avg_runtime,
+                    "runs": state.runs,
+                    "errors": state.errors,
+                    "last_error": state.last_error,
+                    "collected_at": state.collected_at
+                }
+        return result
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - CPU Statistics
+
+ใช้สำหรับคำนวณสัดส่วนเวลา CPU (user/system/iowait/steal/...) ของแต่ละ core จาก /proc/stat โดยไม่ต้อง sleep
+"""
+
+import threading
+import time
+
+# ลำดับคอลัมน์ของบรรทัด cpu ใน /proc/stat (guest/guest_nice ถูกนับรวมใน user/nice อยู่แล้ว)
+CPU_TIMES = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal")
+
+class CpuStatCollector:
+    """
+    คลาสสำหรับเก็บ snapshot ของ /proc/stat และคำนวณเปอร์เซ็นต์จากผลต่างกับ snapshot ก่อนหน้า
+
+    การเรียกครั้งแรกจะคำนวณเทียบกับตอนบูต (ค่าเฉลี่ยตั้งแต่เปิดเครื่อง) อัตราต่อวินาทีจะเป็น None
+    """
+
+    def __init__(self, stat_path='/proc/stat'):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ CPU Statistics Collector
+
+        Args:
+            stat_path (str): ตำแหน่งของไฟล์ /proc/stat
+        """
+        self.stat_path = stat_path
+        self.previous = {}
+        self.previous_counters = None
+        self.previous_time = None
+        self.last_result = None
+        # ป้องกันไม่ให้หลาย request คำนวณผลต่างจาก snapshot ก่อนหน้าเดียวกันพร้อมกัน
+        self._lock = threading.Lock()
+
+    def _read(self):
+        """อ่าน cpu times ของทุกบรรทัด cpu และ counters อื่นๆ จาก /proc/stat"""
+        times = {}
+        counters = {}
+        with open(self.stat_path, 'r') as f:
+            for line in f:
+                fields = line.split()
+                if not fields:
+                    continue
+                key = fields[0]
+                if key.startswith('cpu'):
+                    times[key] = tuple(int(value) for value in fields[1:9])
+                elif key in ('ctxt', 'intr', 'procs_running', 'procs_blocked'):
+                    counters[key] = int(fields[1])
+        return times, counters
+
+    def _percentages(self, current, previous):
+        """แปลงผลต่างของ cpu times เป็นเปอร์เซ็นต์"""
+        # core ที่ถูก offline/online หรือ steal ที่ hypervisor ปรับย้อนหลังอาจทำให้ค่าลดลง
+        delta = [max(0, cur - old) for cur, old in zip(current, previous)]
+        total = sum(delta)
+        if total == 0:
+            return None
+        percent = {name: round(value / total * 100, 2) for name, value in zip(CPU_TIMES, delta)}
+        # เหมือน psutil: iowait ถือเป็นเวลาว่าง
+        percent["percent"] = round((total - delta[3] - delta[4]) / total * 100, 2)
+        return percent
+
+    def collect(self):
+        """
+        คำนวณการใช้ CPU รวมและแยกตาม core
+
+        Returns:
+            dict: percent รวม, สัดส่วนเวลาแต่ละประเภท, ข้อมูลแยก core และ context switches/interrupts ต่อวินาที
+        """
+        with self._lock:
+            now = time.monotonic()
+            times, counters = self._read()
+            zeros = (0,) * len(CPU_TIMES)
+
+            aggregate = self._percentages(times.get('cpu', zeros), self.previous.get('cpu', zeros))
+            if aggregate is None:
+                # เรียกถี่กว่า 1 jiffy ยังไม่มีเวลาผ่านไปให้คำนวณ ใช้ผลล่าสุดแทน
+                if self.last_result is not None:
+                    return self.last_result
+                aggregate = {}
+
+            per_core = []
+            for name, current in times.items():
+                if name == 'cpu':
+                    continue
+                core = self._percentages(current, self.previous.get(name, zeros))
+                if core is None:
+                    continue
+                core["core"] = int(name[3:])
+                per_core.append(core)
+            per_core.sort(key=lambda item: item["core"])
+
+            rates = {"ctxt": None, "intr": None}
+            if self.previous_time is not None:
+                elapsed = now - self.previous_time
+                for key in rates:
+                    if elapsed > 0 and key in counters and key in self.previous_counters:
+                        rates[key] = round(max(0, counters[key] - self.previous_counters[key]) / elapsed, 1)
+
+            self.previous = times
+            self.previous_counters = counters
+            self.previous_time = now
+
+            self.last_result = {
+                "percent": aggregate.pop("percent", None),
+                "times_percent": aggregate,
+                "per_core": per_core,
+                "context_switches_per_sec": rates["ctxt"],
+                "interrupts_per_sec": rates["intr"],
+                "procs_running": counters.get("procs_running"),
+                "procs_blocked": counters.get("procs_blocked")
+            }
+            return self.last_result
@@ -9,43 +9,176 @@ Ubuntu Health Monitor - Data Processor
 
 import json
 import logging
+import math
+import os
 import time
-from datetime import datetime, timedelta
-import statistics
+import warnings
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+from utils.gorilla import BlockFile, block_info, decode_block, encode_block
+from utils.series_registry import (COUNTER_METRICS, PERCENT_METRICS, SeriesRegistry, counter_rates, parse_series_name,
+                                   series_name, split_sample)
 
 class DataProcessor:
     """
     คลาสสำหรับประมวลผลข้อมูลระบบ
+
+    ข้อมูลถูกแยกเป็น series ที่มี label (เช่น 'disk:/var', 'network_recv:eth0', 'temperature:coretemp/Core 0')
+    ทุกเมธอดวิเคราะห์รับ selector ของ series ('disk' คือทุก mountpoint) และคำนวณทุก series ที่เลือกพร้อมกัน
     """
     
-    def __init__(self, data_file='logs/system_data.log', max_entries=1000):
+    def __init__(self, data_file='logs/system_data.log', max_entries=1000, storage='jsonl', block_size=3600,
+                 cold_entries=0):
         """
         กำหนดค่าเริ่มต้นสำหรับ Data Processor
         
         Args:
-            data_file (str): ไฟล์ที่จะใช้เก็บข้อมูลระบบ
+            data_file (str): ไฟล์ที่จะใช้เก็บข้อมูลระบบ (ในโหมด gorilla ใช้เป็น journal ของตัวอย่างที่ยังไม่ครบ block)
             max_entries (int): จำนวนข้อมูลสูงสุดที่จะเก็บไว้
+            storage (str): 'jsonl' (หนึ่ง JSON ต่อบรรทัด) หรือ 'gorilla' (block ที่บีบอัดใน <data_file>.gorilla)
+            block_size (int): จำนวนตัวอย่างต่อ block ในโหมด gorilla
+            cold_entries (int): จำนวนตัวอย่างเก่าที่เก็บไว้ในหน่วยความจำแบบบีบอัด (cold tier) สำหรับ get_series
         """
+        if storage not in ('jsonl', 'gorilla'):
+            raise ValueError(f"ไม่รองรับ storage: {storage}")
         self.data_file = data_file
         self.max_entries = max_entries
-        self.data = []
+        self.storage = storage
+        self.block_size = block_size
+        self.cold_entries = cold_entries
+        self.registry = SeriesRegistry(max_entries)
+        self.block_file = BlockFile(os.path.splitext(data_file)[0] + '.gorilla') if storage == 'gorilla' else None
+        self._pending = []
+        self._cold = deque()
+        self._cold_count = 0
         self.load_data()
     
     def load_data(self):
         """โหลดข้อมูลจากไฟล์"""
+        if self.storage == 'gorilla':
+            self._load_blocks()
+            self._replay_journal()
+            return
         try:
             with open(self.data_file, 'r') as f:
                 lines = f.readlines()
                 # โหลดเฉพาะข้อมูลล่าสุดตามจำนวนที่กำหนด
                 for line in lines[-self.max_entries:]:
                     try:
-                        entry = json.loads(line.strip())
-                        self.data.append(entry)
+                        self.add_entry(json.loads(line.strip()))
+                    except json.JSONDecodeError:
+                        logging.warning(f"ไม่สามารถ parse ข้อมูล: {line}")
+                        continue
+        except FileNotFoundError:
+            logging.info(f"ไม่พบไฟล์ {self.data_file} สร้างไฟล์ใหม่")
+    
+    def _load_blocks(self):
+        """โหลด block ล่าสุดที่ครอบคลุม max_entries (และ cold_entries) ตัวอย่างจากท้ายไฟล์"""
+        trimmed = self.block_file.repair()
+        if trimmed:
+            logging.warning(f"ตัด block ที่เขียนไม่ครบ {trimmed} bytes ออกจาก {self.block_file.path}")
+        
+        blocks = []
+        count = 0
+        for block in self.block_file.iter_reverse():
+            blocks.append(block)
+            count += block_info(block)["count"]
+            if count >= self.max_entries + self.cold_entries:
+                break
+        
+        skip = count - self.max_entries
+        for block in reversed(blocks):
+            size = block_info(block)["count"]
+            if self.cold_entries:
+                self._add_cold(block)
+            if skip >= size:
+                skip -= size
+                continue
+            times, series = decode_block(block)
+            names = list(series)
+            columns = [series[name].tolist() for name in names]
+            for index in range(max(0, skip), size):
+                self.registry.append_values(times[index], [
+                    (name, column[index]) for name, column in zip(names, columns) if column[index] == column[index]
+                ])
+            skip = 0
+    
+    def _replay_journal(self):
+        """
+        โหลดตัวอย่างใน journal ที่ยังไม่อยู่ใน block (และแปลง history แบบ JSONL เดิมเป็น block)
+        
+        block เก็บเฉพาะค่าของแต่ละ series ส่วน field อื่น (load, uptime ฯลฯ) จะหายไปเมื่อ journal ถูกล้าง
+        ไฟล์ JSONL เดิมจึงถูกเปลี่ยนชื่อเป็น <data_file>.migrated ก่อนแปลง แทนการเขียนทับ
+        """
+        stored_until = self.registry.last_timestamp()
+        # ยังไม่มีไฟล์ block แสดงว่า data_file เป็น history แบบ JSONL เดิม ไม่ใช่ journal
+        first_run = not os.path.exists(self.block_file.path)
+        pending_lines = []
+        flushed = False
+        try:
+            with open(self.data_file, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
                     except json.JSONDecodeError:
                         logging.warning(f"ไม่สามารถ parse ข้อมูล: {line}")
                         continue
+                    # ตัวอย่างที่ถูกเขียนลง block แล้วแต่ journal ยังไม่ถูกล้าง (เช่นหยุดทำงานระหว่าง flush)
+                    # เวลาใน block ละเอียดระดับ millisecond จึงเทียบหลังปัดเศษแบบเดียวกัน
+                    if stored_until is not None and round(self._entry_time(entry, None), 3) <= stored_until:
+                        continue
+                    self._pending.append(self.add_entry(entry))
+                    pending_lines.append(line if line.endswith('\n') else line + '\n')
+                    if len(self._pending) >= self.block_size:
+                        self._flush_block(truncate=False)
+                        pending_lines = []
+                        flushed = True
         except FileNotFoundError:
             logging.info(f"ไม่พบไฟล์ {self.data_file} สร้างไฟล์ใหม่")
+            open(self.block_file.path, 'ab').close()
+            return
+        
+        # journal ปกติมีไม่ถึงหนึ่ง block ถ้ามีมากกว่านั้นแสดงว่าเป็น history แบบ JSONL (เช่นเคยสลับกลับไปใช้ jsonl)
+        if (first_run or flushed) and os.path.getsize(self.data_file):
+            migrated = self._migrated_path()
+            os.replace(self.data_file, migrated)
+            logging.warning(f"แปลง history แบบ JSONL เป็น block แล้ว ไฟล์เดิมถูกเก็บไว้ที่ {migrated}")
+        open(self.block_file.path, 'ab').close()
+        
+        # เขียน journal ใหม่ให้เหลือเฉพาะตัวอย่างที่ยังไม่อยู่ใน block (บรรทัดเดิมทั้งบรรทัด)
+        temp_file = self.data_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            f.writelines(pending_lines)
+        os.replace(temp_file, self.data_file)
+    
+    def _migrated_path(self):
+        """ชื่อไฟล์สำหรับเก็บ history แบบ JSONL เดิม (ไม่เขียนทับไฟล์ที่เคยเก็บไว้)"""
+        path = self.data_file + '.migrated'
+        if os.path.exists(path):
+            path = f"{path}.{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        return path
+    
+    def add_entry(self, entry):
+        """
+        เพิ่มข้อมูลหนึ่งรายการลงใน registry โดยไม่บันทึกลงไฟล์
+        
+        Args:
+            entry (dict): ข้อมูลระบบที่มี timestamp แบบ ISO
+            
+        Returns:
+            tuple: (epoch time, dict ของชื่อ series และค่าดิบ)
+        """
+        timestamp = self._entry_time(entry, self.registry.last_timestamp())
+        values = {
+            series_name(metric, label): value
+            for metric, label, value in split_sample(entry)
+            if value is not None
+        }
+        self.registry.append_values(timestamp, values.items())
+        return timestamp, values
     
     def save_data(self, system_data):
         """
@@ -56,244 +189,453 @@ class DataProcessor:
         """
         # เพิ่ม timestamp
         system_data['timestamp'] = datetime.now().isoformat()
-        
-        # เพิ่มข้อมูลลงใน list
-        self.data.append(system_data)
-        
-        # ตัดข้อมูลเก่าออกถ้ามีมากเกินไป
-        if len(self.data) > self.max_entries:
-            self.data = self.data[-self.max_entries:]
+        sample = self.add_entry(system_data)
         
         # บันทึกข้อมูลลงไฟล์
         try:
             with open(self.data_file, 'a') as f:
                 f.write(json.dumps(system_data) + '\n')
+            if self.storage == 'gorilla':
+                self._pending.append(sample)
+                if len(self._pending) >= self.block_size:
+                    self._flush_block()
         except Exception as e:
             logging.error(f"ไม่สามารถบันทึกข้อมูลลงไฟล์: {str(e)}")
     
-    def get_average(self, hours=24, metric='cpu'):
+    def _flush_block(self, truncate=True):
         """
-        คำนวณค่าเฉลี่ยของเมตริกที่ระบุในช่วงเวลาที่กำหนด
+        เข้ารหัสตัวอย่างที่รออยู่เป็นหนึ่ง block แล้วต่อท้าย block file
         
         Args:
-            hours (int): จำนวนชั่วโมงย้อนหลังที่จะคำนวณ
-            metric (str): เมตริกที่จะคำนวณ ('cpu', 'memory', 'disk')
+            truncate (bool): ล้าง journal หลังเขียน block สำเร็จ
+        """
+        if not self._pending:
+            return
+        names = sorted({name for _, values in self._pending for name in values})
+        times = np.array([timestamp for timestamp, _ in self._pending])
+        series = {name: np.full(len(self._pending), np.nan) for name in names}
+        for index, (_, values) in enumerate(self._pending):
+            for name, value in values.items():
+                series[name][index] = value
+        
+        block = encode_block(times, series)
+        self.block_file.append(block)
+        if self.cold_entries:
+            self._add_cold(block)
+        self._pending = []
+        if truncate:
+            open(self.data_file, 'w').close()
+    
+    def _add_cold(self, block):
+        """เก็บ block ไว้ใน cold tier และตัด block เก่าที่เกิน cold_entries ออก"""
+        self._cold.append(block)
+        self._cold_count += block_info(block)["count"]
+        while self._cold and self._cold_count - block_info(self._cold[0])["count"] >= self.cold_entries:
+            self._cold_count -= block_info(self._cold.popleft())["count"]
+    
+    @staticmethod
+    def _entry_time(entry, previous):
+        """
+        แปลง timestamp ของ entry เป็น epoch time
+        
+        entry ที่ไม่มีเวลาหรือเวลาไม่ถูกต้องจะใช้เวลาของ entry ก่อนหน้า เพื่อให้แกนเวลายังเรียงลำดับ
+        """
+        try:
+            return datetime.fromisoformat(entry['timestamp']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return previous if previous is not None else 0.0
+    
+    def version(self):
+        """ค่าที่เปลี่ยนทุกครั้งที่มีข้อมูลใหม่ (ใช้เป็น key ของ cache)"""
+        return self.registry.appended
+    
+    def last_timestamp(self):
+        """epoch time ของข้อมูลล่าสุด (None ถ้ายังไม่มีข้อมูล)"""
+        return self.registry.last_timestamp()
+    
+    def series_names(self):
+        """ชื่อ series ทั้งหมดที่มีข้อมูล"""
+        return self.registry.series_names()
+    
+    def get_series(self, series='cpu', start=None, end=None):
+        """
+        ดึง time series หนึ่ง series ในช่วงเวลาที่กำหนด
+        
+        Args:
+            series (str): ชื่อ series เช่น 'cpu' หรือ 'disk:/var'
+            start (float, optional): epoch time เริ่มต้น (รวม)
+            end (float, optional): epoch time สิ้นสุด (รวม)
             
         Returns:
-            float: ค่าเฉลี่ยของเมตริก
+            tuple: (list ของ epoch time, list ของค่า) เรียงตามเวลา
         """
-        if not self.data:
-            return None
-        
-        # กำหนดเวลาเริ่มต้น
-        start_time = datetime.now() - timedelta(hours=hours)
-        
-        # กรองข้อมูลตามช่วงเวลา
-        filtered_data = []
-        for entry in self.data:
-            try:
-                entry_time = datetime.fromisoformat(entry['timestamp'])
-                if entry_time >= start_time:
-                    if metric == 'cpu' and 'cpu' in entry:
-                        filtered_data.append(entry['cpu']['percent'])
-                    elif metric == 'memory' and 'memory' in entry:
-                        filtered_data.append(entry['memory']['ram']['percent'])
-                    elif metric == 'disk' and 'disk' in entry:
-                        # ใช้พาร์ติชันแรกเป็นตัวแทน
-                        if entry['disk']['partitions']:
-                            filtered_data.append(entry['disk']['partitions'][0]['percent'])
-            except (KeyError, ValueError) as e:
-                logging.warning(f"ข้อมูลไม่ถูกต้อง: {str(e)}")
+        times, values, names = self.registry.window(series, start, end)
+        if series in names:
+            row = values[names.index(series)]
+            mask = ~np.isnan(row)
+            times, values = times[mask].tolist(), row[mask].tolist()
+        else:
+            times, values = [], []
+        
+        # ช่วงที่เก่ากว่าข้อมูลในหน่วยความจำดึงจาก cold tier (ถอดรหัสเฉพาะ series นี้)
+        hot_start = self.registry.first_timestamp()
+        if self._cold and (hot_start is None or start is None or start < hot_start):
+            cold_times, cold_values = self._cold_series(series, start, end, hot_start)
+            times, values = cold_times + times, cold_values + values
+        return times, values
+    
+    def _cold_series(self, series, start, end, before):
+        """ค่าของหนึ่ง series จาก cold tier ในช่วง [start, end] ที่เก่ากว่า before"""
+        time_parts, value_parts = [], []
+        for block in list(self._cold):
+            info = block_info(block)
+            if (start is not None and info["last"] < start) or (before is not None and info["first"] >= before):
                 continue
+            times, decoded = decode_block(block, names=[series])
+            time_parts.append(times)
+            value_parts.append(decoded.get(series, np.full(len(times), np.nan)))
+        if not time_parts:
+            return [], []
         
-        # คำนวณค่าเฉลี่ย
-        if filtered_data:
-            return statistics.mean(filtered_data)
+        times, values = np.concatenate(time_parts), np.concatenate(value_parts)
+        if parse_series_name(series)[0] in COUNTER_METRICS:
+            times, values = counter_rates(times, values)
         else:
-            return None
+            present = ~np.isnan(values)
+            times, values = times[present], values[present]
+        keep = np.ones(len(times), dtype=bool)
+        if start is not None:
+            keep &= times >= start
+        if end is not None:
+            keep &= times <= end
+        if before is not None:
+            keep &= times < before
+        return times[keep].tolist(), values[keep].tolist()
+    
+    def _window(self, series, hours=None):
+        """ข้อมูลของ series ที่เลือก (ย้อนหลัง hours ชั่วโมงถ้ากำหนด) พร้อม mask ของค่าที่มีอยู่ (series x เวลา)"""
+        start = time.time() - hours * 3600 if hours is not None else None
+        times, values, names = self.registry.window(series, start)
+        return times, values, ~np.isnan(values), names
     
-    def detect_anomalies(self, threshold_multiplier=1.5):
+    def get_average(self, hours=24, series='cpu'):
+        """
+        คำนวณค่าเฉลี่ยของ series ที่เลือกในช่วงเวลาที่กำหนด
+        
+        Args:
+            hours (int): จำนวนชั่วโมงย้อนหลังที่จะคำนวณ
+            series (str | list): selector ของ series ('cpu', 'memory', 'disk', 'disk:/var', ...)
+            
+        Returns:
+            dict: ค่าเฉลี่ยของแต่ละ series (None ถ้าไม่มีข้อมูลในช่วงเวลา)
+        """
+        _, values, mask, names = self._window(series, hours)
+        counts = mask.sum(axis=1).tolist()
+        sums = np.where(mask, values, 0.0).sum(axis=1).tolist()
+        return {
+            name: total / count if count else None
+            for name, total, count in zip(names, sums, counts)
+        }
+    
+    def detect_anomalies(self, threshold_multiplier=1.5, series=('cpu', 'memory', 'disk')):
         """
         ตรวจหาค่าผิดปกติในข้อมูลโดยใช้ IQR (Interquartile Range)
         
         Args:
             threshold_multiplier (float): ตัวคูณสำหรับ IQR เพื่อกำหนดขอบเขต
+            series (str | list): selector ของ series
             
         Returns:
-            dict: รายการค่าผิดปกติแยกตามเมตริก
+            dict: รายการค่าผิดปกติแยกตาม series
         """
-        if len(self.data) < 10:
+        if len(self.registry) < 10:
             return {"error": "ข้อมูลไม่เพียงพอสำหรับการวิเคราะห์"}
         
-        # เตรียมข้อมูลสำหรับวิเคราะห์
-        cpu_data = []
-        memory_data = []
-        disk_data = []
-        
-        for entry in self.data:
-            try:
-                if 'cpu' in entry:
-                    cpu_data.append(entry['cpu']['percent'])
-                if 'memory' in entry:
-                    memory_data.append(entry['memory']['ram']['percent'])
-                if 'disk' in entry and entry['disk']['partitions']:
-                    disk_data.append(entry['disk']['partitions'][0]['percent'])
-            except KeyError:
-                continue
+        _, values, mask, names = self._window(series)
+        if not names:
+            return {}
         
-        # ฟังก์ชันสำหรับคำนวณค่าผิดปกติ
-        def find_anomalies(data):
-            if len(data) < 10:
-                return []
-            
-            # คำนวณ quartiles
-            sorted_data = sorted(data)
-            q1 = sorted_data[len(sorted_data) // 4]
-            q3 = sorted_data[3 * len(sorted_data) // 4]
-            iqr = q3 - q1
-            
-            # กำหนดขอบเขต
-            lower_bound = q1 - threshold_multiplier * iqr
-            upper_bound = q3 + threshold_multiplier * iqr
-            
-            # ค้นหาค่าผิดปกติ
-            anomalies = [x for x in data if x < lower_bound or x > upper_bound]
-            return anomalies
+        # np.sort วาง NaN ไว้ท้าย จึงหา quartile จาก index ตามจำนวนค่าที่มีอยู่ของแต่ละ series ได้
+        counts = mask.sum(axis=1)
+        sorted_values = np.sort(values, axis=1)
+        rows = np.arange(len(names))
+        q1 = sorted_values[rows, counts // 4]
+        q3 = sorted_values[rows, np.minimum(3 * counts // 4, values.shape[1] - 1)]
+        iqr = q3 - q1
+        lower_bound = (q1 - threshold_multiplier * iqr)[:, None]
+        upper_bound = (q3 + threshold_multiplier * iqr)[:, None]
+        anomalies = ((values < lower_bound) | (values > upper_bound)) & (counts >= 10)[:, None]
         
-        # ค้นหาค่าผิดปกติสำหรับแต่ละเมตริก
-        return {
-            "cpu": find_anomalies(cpu_data),
-            "memory": find_anomalies(memory_data),
-            "disk": find_anomalies(disk_data)
-        }
+        # ดึงค่าผิดปกติของทุก series ในครั้งเดียว (เรียงตาม series แล้วตามเวลา) แล้วแบ่งตามจำนวนของแต่ละ series
+        flagged = values[anomalies]
+        splits = np.cumsum(anomalies.sum(axis=1))[:-1]
+        return {name: chunk.tolist() for name, chunk in zip(names, np.split(flagged, splits))}
     
-    def predict_usage_trend(self, days=7, metric='cpu'):
+    def detect_change_points(self, hours=24 * 7, series=('cpu', 'memory', 'swap', 'disk'), penalty=None,
+                             min_shift=0.0, min_size=10, max_changes=5, resolution=2000):
         """
-        ทำนายแนวโน้มการใช้งานในอนาคต
+        ตรวจหาจุดที่ระดับค่าเฉลี่ยของ series เปลี่ยนไปอย่างถาวร (เช่น memory ขยับจาก 40% เป็น 70% หลัง deploy)
+        ด้วย binary segmentation บน cost แบบ Gaussian mean-shift
+        
+        ข้อมูลถูกรวมเป็นช่วงไม่เกิน resolution ช่วงก่อน (ผลรวมและจำนวนค่าของแต่ละช่วง) แล้วหาจุดแบ่งของทุก series
+        พร้อมกันจาก cumulative sum จากนั้นจึงหาตำแหน่งที่แน่นอนจากข้อมูลดิบรอบจุดแบ่งนั้น
         
         Args:
-            days (int): จำนวนวันที่จะทำนาย
-            metric (str): เมตริกที่จะทำนาย ('cpu', 'memory', 'disk')
+            hours (int, optional): จำนวนชั่วโมงย้อนหลังที่จะวิเคราะห์ (None คือข้อมูลทั้งหมด)
+            series (str | list): selector ของ series
+            penalty (float, optional): ค่า z^2 ขั้นต่ำของการแบ่ง (ค่าเริ่มต้น 2 * ln(จำนวนช่วง) แบบ BIC)
+            min_shift (float): ขนาดการเปลี่ยนแปลงขั้นต่ำในหน่วยของ series (เช่น 5 คือ 5 percentage points)
+            min_size (int): จำนวนตัวอย่างขั้นต่ำของแต่ละ segment
+            max_changes (int): จำนวนจุดเปลี่ยนสูงสุดต่อ series
+            resolution (int): จำนวนช่วงสูงสุดที่ใช้ค้นหาจุดแบ่ง
             
         Returns:
-            dict: ข้อมูลแนวโน้มการใช้งาน
+            dict: รายการจุดเปลี่ยนของแต่ละ series เรียงตามเวลา
+                (time, timestamp, mean_before, mean_after, change และ confidence 0-1)
         """
-        if len(self.data) < 2:
-            return {"error": "ข้อมูลไม่เพียงพอสำหรับการทำนาย"}
+        times, values, mask, names = self._window(series, hours)
+        total = len(times)
+        if total < 2 * min_size:
+            return {"error": "ข้อมูลไม่เพียงพอสำหรับการวิเคราะห์"}
+        if not names:
+            return {}
         
-        # เตรียมข้อมูลสำหรับวิเคราะห์
-        timestamps = []
-        values = []
-        
-        for entry in self.data:
-            try:
-                timestamp = datetime.fromisoformat(entry['timestamp'])
-                timestamps.append(timestamp.timestamp())
-                
-                if metric == 'cpu' and 'cpu' in entry:
-                    values.append(entry['cpu']['percent'])
-                elif metric == 'memory' and 'memory' in entry:
-                    values.append(entry['memory']['ram']['percent'])
-                elif metric == 'disk' and 'disk' in entry and entry['disk']['partitions']:
-                    values.append(entry['disk']['partitions'][0]['percent'])
-                else:
-                    continue
-            except (KeyError, ValueError):
-                continue
+        # ผลรวมและจำนวนค่าของแต่ละช่วง (series x ช่วง)
+        block = -(-total // resolution)
+        starts = np.arange(0, total, block)
+        blocks = len(starts)
+        block_sums = np.add.reduceat(np.where(mask, values, 0.0), starts, axis=1)
+        block_counts = np.add.reduceat(mask, starts, axis=1).astype(np.float64)
         
-        if len(timestamps) < 2:
-            return {"error": "ข้อมูลไม่เพียงพอสำหรับการทำนาย"}
+        cum_sums = np.zeros((len(names), blocks + 1))
+        cum_counts = np.zeros((len(names), blocks + 1))
+        np.cumsum(block_sums, axis=1, out=cum_sums[:, 1:])
+        np.cumsum(block_counts, axis=1, out=cum_counts[:, 1:])
+        rows = np.arange(len(names))
         
-        # คำนวณแนวโน้มอย่างง่าย (linear regression)
-        n = len(timestamps)
-        sum_x = sum(timestamps)
-        sum_y = sum(values)
-        sum_xy = sum(x * y for x, y in zip(timestamps, values))
-        sum_xx = sum(x * x for x in timestamps)
+        # ความแปรปรวนต่อตัวอย่างประมาณจาก MAD ของผลต่างระหว่างค่าเฉลี่ยของสองช่วงที่ติดกัน (ยาวช่วงละ length ช่วง)
+        # ที่ทุกตำแหน่ง จุดเปลี่ยนกระทบผลต่างเพียงส่วนน้อยจึงไม่ทำให้ค่าประมาณสูงเกินจริง ใช้ค่าที่มากกว่าระหว่าง
+        # ช่วงสั้นและช่วงยาว (ประมาณ 1/32 ของข้อมูล) เพื่อรวม autocorrelation ของเมตริกจริงไว้ด้วย
+        def sample_variance(length):
+            sums = cum_sums[:, length:] - cum_sums[:, :-length]
+            counts = cum_counts[:, length:] - cum_counts[:, :-length]
+            with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                means = np.where(counts > 0, sums / counts, np.nan)
+                spread = 1.4826 * np.nanmedian(np.abs(means[:, length:] - means[:, :-length]), axis=1)
+                per_window = np.nanmedian(np.where(counts > 0, counts, np.nan), axis=1)
+            return np.nan_to_num(spread * spread / 2 * per_window)
         
-        # คำนวณค่า slope และ intercept
-        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x * sum_x)
-        intercept = (sum_y - slope * sum_x) / n
+        variance = np.zeros(len(names))
+        for length in {1, max(1, blocks // 32)}:
+            if blocks >= 2 * length + 1:
+                variance = np.maximum(variance, sample_variance(length))
+        scale = np.where(variance > 0, variance, 1e-18)[:, None]
+        per_block = cum_counts[:, -1] / np.maximum(1, (block_counts > 0).sum(axis=1))
+        min_count = np.maximum(min_size, 2 * per_block)[:, None]
+        if penalty is None:
+            penalty = 2 * math.log(max(blocks, 2))
         
-        # ทำนายค่าในอนาคต
-        future_predictions = []
-        last_timestamp = timestamps[-1]
+        def split_scores(bounds):
+            """z^2 ของการแบ่งที่ทุกตำแหน่ง โดยเทียบกับ segment ปัจจุบันที่ตำแหน่งนั้นอยู่"""
+            index = np.arange(blocks + 1)
+            left = np.maximum.accumulate(np.where(bounds, index, 0), axis=1)
+            right = np.minimum.accumulate(np.where(bounds, index, blocks)[:, ::-1], axis=1)[:, ::-1]
+            row_index = rows[:, None]
+            sum_before = cum_sums - cum_sums[row_index, left]
+            sum_after = cum_sums[row_index, right] - cum_sums
+            count_before = cum_counts - cum_counts[row_index, left]
+            count_after = cum_counts[row_index, right] - cum_counts
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean_before = sum_before / count_before
+                mean_after = sum_after / count_after
+                gain = (sum_before * mean_before + sum_after * mean_after
+                        - (sum_before + sum_after) ** 2 / (count_before + count_after))
+                scores = gain / scale
+            valid = ((count_before >= min_count) & (count_after >= min_count)
+                     & (np.abs(mean_after - mean_before) >= min_shift))
+            return np.where(valid, scores, -np.inf)
         
-        for i in range(1, days + 1):
-            future_time = last_timestamp + i * 86400  # เพิ่มทีละวัน (86400 วินาที)
-            prediction = slope * future_time + intercept
-            
-            # ปรับค่าให้อยู่ในช่วง 0-100
-            prediction = max(0, min(100, prediction))
+        # แบ่ง segment ที่ให้ z^2 สูงสุดของแต่ละ series ทีละจุดจนไม่มีจุดใดผ่าน penalty
+        bounds = np.zeros((len(names), blocks + 1), dtype=bool)
+        bounds[:, [0, blocks]] = True
+        for _ in range(max_changes):
+            scores = split_scores(bounds)
+            best = np.argmax(scores, axis=1)
+            accepted = scores[rows, best] > penalty
+            if not accepted.any():
+                break
+            bounds[rows[accepted], best[accepted]] = True
+        
+        def describe(row, previous, position, following):
+            """ค่าเฉลี่ยก่อน/หลัง, z^2 และ index ของตัวอย่างแรกหลังจุดเปลี่ยน เทียบกับ segment ที่อยู่ติดกัน"""
+            sum_before = cum_sums[row, position] - cum_sums[row, previous]
+            sum_after = cum_sums[row, following] - cum_sums[row, position]
+            count_before = cum_counts[row, position] - cum_counts[row, previous]
+            count_after = cum_counts[row, following] - cum_counts[row, position]
+            before = sum_before / count_before
+            after = sum_after / count_after
+            score = count_before * count_after / (count_before + count_after) * (after - before) ** 2 / scale[row, 0]
             
-            future_date = datetime.fromtimestamp(future_time).strftime('%Y-%m-%d')
-            future_predictions.append({
-                "date": future_date,
-                "prediction": round(prediction, 2)
-            })
-        
-        # คำนวณความแม่นยำของโมเดล (R-squared)
-        mean_y = sum_y / n
-        ss_total = sum((y - mean_y) ** 2 for y in values)
-        ss_residual = sum((y - (slope * x + intercept)) ** 2 for x, y in zip(timestamps, values))
-        r_squared = 1 - (ss_residual / ss_total) if ss_total != 0 else 0
+            # ตำแหน่งที่แน่นอน: cost ต่ำสุดเมื่อแบ่งตัวอย่างดิบในสองช่วงรอบจุดแบ่งเป็นค่าเดิมและค่าใหม่
+            lo = starts[position - 1]
+            hi = starts[position + 1] if position + 1 < blocks else total
+            present = np.flatnonzero(mask[row, lo:hi]) + lo
+            x = values[row, present]
+            prefix = np.concatenate(([0.0], np.cumsum((x - before) ** 2 - (x - after) ** 2)))
+            exact = int(np.argmin(prefix))
+            index = int(present[exact]) if exact < len(present) else hi - 1
+            return float(before), float(after), float(score), index
         
-        return {
-            "metric": metric,
-            "current_value": values[-1] if values else None,
-            "trend": "increasing" if slope > 0.0001 else "decreasing" if slope < -0.0001 else "stable",
-            "slope": slope,
-            "r_squared": r_squared,
-            "predictions": future_predictions
-        }
+        results = {name: [] for name in names}
+        for row in range(len(names)):
+            edges = np.flatnonzero(bounds[row]).tolist()
+            while True:
+                points = [describe(row, *edges[i - 1:i + 2]) for i in range(1, len(edges) - 1)]
+                # ช่วงที่คร่อมการเปลี่ยนแปลงอาจถูกแยกเป็นสองจุดที่อยู่ชิดกัน ให้เหลือเฉพาะจุดที่ชัดกว่า
+                merge = next((i for i in range(len(points) - 1)
+                              if points[i + 1][3] - points[i][3] < min_count[row, 0]), None)
+                if merge is None:
+                    break
+                del edges[1 + (merge if points[merge][2] < points[merge + 1][2] else merge + 1)]
+            
+            for before, after, score, index in points:
+                timestamp = float(times[index])
+                results[names[row]].append({
+                    "time": datetime.fromtimestamp(timestamp).isoformat(),
+                    "timestamp": timestamp,
+                    "mean_before": round(before, 2),
+                    "mean_after": round(after, 2),
+                    "change": round(after - before, 2),
+                    # ความน่าจะเป็นที่ไม่ใช่ noise (ปรับ Bonferroni ตามจำนวนตำแหน่งที่ค้นหา)
+                    "confidence": round(max(0.0, 1.0 - blocks * math.erfc(math.sqrt(score / 2))), 3)
+                })
+        return results
     
-    def get_peak_usage_times(self, metric='cpu'):
+    def predict_usage_trend(self, days=7, series='cpu'):
         """
-        ค้นหาช่วงเวลาที่มีการใช้งานสูงสุด
+        ทำนายแนวโน้มการใช้งานในอนาคตด้วย linear regression
         
         Args:
-            metric (str): เมตริกที่จะวิเคราะห์ ('cpu', 'memory', 'disk')
+            days (int): จำนวนวันที่จะทำนาย
+            series (str | list): selector ของ series
             
         Returns:
-            dict: ข้อมูลช่วงเวลาที่มีการใช้งานสูงสุด
+            dict: ข้อมูลแนวโน้มของแต่ละ series
         """
-        if not self.data:
-            return {"error": "ไม่มีข้อมูลสำหรับการวิเคราะห์"}
+        times, values, mask, names = self._window(series)
+        if len(times) < 2:
+            return {"error": "ข้อมูลไม่เพียงพอสำหรับการทำนาย"}
         
-        # เตรียมข้อมูลตามช่วงเวลา
-        hourly_data = {i: [] for i in range(24)}  # 0-23 ชั่วโมง
-        
-        for entry in self.data:
-            try:
-                timestamp = datetime.fromisoformat(entry['timestamp'])
-                hour = timestamp.hour
-                
-                if metric == 'cpu' and 'cpu' in entry:
-                    hourly_data[hour].append(entry['cpu']['percent'])
-                elif metric == 'memory' and 'memory' in entry:
-                    hourly_data[hour].append(entry['memory']['ram']['percent'])
-                elif metric == 'disk' and 'disk' in entry and entry['disk']['partitions']:
-                    hourly_data[hour].append(entry['disk']['partitions'][0]['percent'])
-            except (KeyError, ValueError):
+        # เลื่อนแกนเวลาให้เริ่มที่ 0 มิฉะนั้น sum_xx จะใหญ่ระดับ 1e18 และสูญเสียความแม่นยำของ float
+        # ผลรวมทุกตัวคำนวณเป็น matrix-vector product ของทุก series พร้อมกัน (ค่าที่ไม่มีถูกแทนด้วย 0)
+        origin = times[0]
+        x = times - origin
+        y = np.where(mask, values, 0.0)
+        weights = mask.astype(np.float64)
+        n = mask.sum(axis=1)
+        sum_x = weights @ x
+        sum_xx = weights @ (x * x)
+        sum_y = y.sum(axis=1)
+        sum_xy = y @ x
+        sum_yy = np.einsum('ij,ij->i', y, y)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = (n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x * sum_x)
+            intercept = (sum_y - slope * sum_x) / n
+            mean_y = sum_y / n
+            ss_total = sum_yy - n * mean_y * mean_y
+            # series ที่ค่าคงที่อาจเหลือเศษจากการปัดเศษแทนที่จะเป็น 0
+            ss_total[ss_total <= sum_yy * 1e-12] = 0.0
+            ss_residual = np.maximum(0.0, sum_yy - 2 * intercept * sum_y - 2 * slope * sum_xy + n * intercept * intercept
+                                     + 2 * intercept * slope * sum_x + slope * slope * sum_xx)
+        
+        # ค่าล่าสุดของแต่ละ series
+        last_index = len(times) - 1 - np.argmax(mask[:, ::-1], axis=1)
+        last_x = times[last_index] - origin
+        current_values = values[np.arange(len(names)), last_index]
+        
+        # ค่าทำนายของทุก series (series x วัน) และจำกัดช่วงของเมตริกที่เป็นเปอร์เซ็นต์
+        future_times = last_x[:, None] + np.arange(1, days + 1) * 86400  # เพิ่มทีละวัน (86400 วินาที)
+        upper = np.array([100 if parse_series_name(name)[0] in PERCENT_METRICS else np.inf for name in names])
+        predictions = np.round(np.clip(slope[:, None] * future_times + intercept[:, None], 0, upper[:, None]), 2)
+        
+        # series ส่วนใหญ่มีค่าล่าสุดที่เวลาเดียวกัน จึงแปลงวันที่ครั้งเดียวต่อเวลา
+        date_cache = {}
+        results = {}
+        for i, name in enumerate(names):
+            if n[i] < 2 or not np.isfinite(slope[i]):
+                results[name] = {"error": "ข้อมูลไม่เพียงพอสำหรับการทำนาย"}
                 continue
+            dates = date_cache.get(last_x[i])
+            if dates is None:
+                dates = date_cache[last_x[i]] = [
+                    datetime.fromtimestamp(origin + future).strftime('%Y-%m-%d')
+                    for future in future_times[i].tolist()
+                ]
+            results[name] = {
+                "series": name,
+                "current_value": float(current_values[i]),
+                "trend": "increasing" if slope[i] > 0.0001 else "decreasing" if slope[i] < -0.0001 else "stable",
+                "slope": float(slope[i]),
+                "r_squared": float(1 - ss_residual[i] / ss_total[i]) if ss_total[i] != 0 else 0,
+                "predictions": [
+                    {"date": date, "prediction": prediction}
+                    for date, prediction in zip(dates, predictions[i].tolist())
+                ]
+            }
+        return results
+    
+    @staticmethod
+    def _local_hours(times):
+        """ชั่วโมงตามเวลาท้องถิ่นของแต่ละ timestamp (คำนวณ UTC offset ครั้งเดียวต่อชั่วโมงเพื่อรองรับ DST)"""
+        first_hour = int(times[0] // 3600)
+        hour_index = (times // 3600).astype(np.int64) - first_hour
+        offsets = np.array([
+            time.localtime(hour * 3600).tm_gmtoff
+            for hour in range(first_hour, int(times[-1] // 3600) + 1)
+        ], dtype=np.float64)
+        return ((times + offsets[hour_index]) // 3600 % 24).astype(np.int64)
+    
+    def get_peak_usage_times(self, series='cpu'):
+        """
+        ค้นหาช่วงเวลาที่มีการใช้งานสูงสุด
         
-        # คำนวณค่าเฉลี่ยของแต่ละช่วงเวลา
-        hourly_averages = {}
-        for hour, values in hourly_data.items():
-            if values:
-                hourly_averages[hour] = sum(values) / len(values)
+        Args:
+            series (str | list): selector ของ series
+            
+        Returns:
+            dict: ข้อมูลช่วงเวลาที่มีการใช้งานสูงสุดของแต่ละ series
+        """
+        times, values, mask, names = self._window(series)
+        if not len(times):
+            return {"error": "ไม่มีข้อมูลสำหรับการวิเคราะห์"}
         
-        # เรียงลำดับตามค่าเฉลี่ยจากมากไปน้อย
-        sorted_hours = sorted(hourly_averages.items(), key=lambda x: x[1], reverse=True)
+        # ตัวอย่างเรียงตามเวลา ชั่วโมงเดียวกันจึงอยู่ติดกัน รวมค่าของทุก series ในแต่ละช่วงด้วย reduceat
+        # แล้วรวมช่วงที่เป็นชั่วโมงเดียวกัน (ต่างวัน) ด้วย matrix product กับ one-hot ของชั่วโมง
+        hours = self._local_hours(times)
+        starts = np.flatnonzero(np.diff(hours, prepend=-1))
+        one_hot = np.zeros((len(starts), 24))
+        one_hot[np.arange(len(starts)), hours[starts]] = 1.0
+        sums = np.add.reduceat(np.where(mask, values, 0.0), starts, axis=1) @ one_hot
+        counts = np.add.reduceat(mask, starts, axis=1) @ one_hot
         
-        # สร้างผลลัพธ์
-        peak_hours = [{"hour": hour, "average": round(avg, 2)} for hour, avg in sorted_hours[:5]]
+        # เรียงชั่วโมงตามค่าเฉลี่ยจากมากไปน้อยของทุก series พร้อมกัน (ชั่วโมงที่ไม่มีข้อมูลอยู่ท้ายสุด)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            averages = np.where(counts > 0, sums / counts, -np.inf)
+        ranking = np.argsort(-averages, axis=1, kind='stable')
+        rounded = np.round(averages, 2).tolist()
+        available = (counts > 0).sum(axis=1).tolist()
         
-        return {
-            "metric": metric,
-            "peak_hours": peak_hours,
-            "lowest_hour": {"hour": sorted_hours[-1][0], "average": round(sorted_hours[-1][1], 2)} if sorted_hours else None
-        }
+        results = {}
+        for i, name in enumerate(names):
+            hour_order = ranking[i, :available[i]].tolist()
+            results[name] = {
+                "series": name,
+                "peak_hours": [{"hour": hour, "average": rounded[i][hour]} for hour in hour_order[:5]],
+                "lowest_hour": {"hour": hour_order[-1], "average": rounded[i][hour_order[-1]]} if hour_order else None
+            }
+        return results
 
 if __name__ == "__main__":
     # ตัวอย่างการใช้งาน
@@ -301,7 +643,7 @@ if __name__ == "__main__":
     
     # สร้างข้อมูลทดสอบ
     import random
-    from datetime import datetime, timedelta
+    from datetime import timedelta
     
     # สร้างข้อมูลจำลองย้อนหลัง 7 วัน
     start_date = datetime.now() - timedelta(days=7)
@@ -313,22 +655,30 @@ if __name__ == "__main__":
             },
             "memory": {
                 "ram": {
-                    "percent": random.uniform(20, 80)
+                    # baseline ขยับขึ้นหลังวันที่ 4 (เช่นหลัง deploy)
+                    "percent": random.uniform(35, 45) + (30 if i >= 4 * 24 else 0)
                 }
             },
             "disk": {
                 "partitions": [
                     {
+                        "mountpoint": "/",
                         "percent": random.uniform(30, 70)
+                    },
+                    {
+                        "mountpoint": "/var",
+                        "percent": 40 + i * 0.1
                     }
                 ]
             },
             "timestamp": test_date.isoformat()
         }
-        processor.save_data(test_data)
+        processor.add_entry(test_data)
     
     # ทดสอบฟังก์ชันต่างๆ
-    print("Average CPU (24h):", processor.get_average(hours=24, metric='cpu'))
+    print("Average CPU (24h):", processor.get_average(hours=24, series='cpu'))
+    print("Average disk (24h):", processor.get_average(hours=24, series='disk'))
     print("Anomalies:", processor.detect_anomalies())
-    print("CPU Trend prediction:", processor.predict_usage_trend(days=3, metric='cpu'))
-    print("Peak usage times:", processor.get_peak_usage_times(metric='cpu'))
+    print("Change points:", processor.detect_change_points(series=('memory', 'disk')))
+    print("Disk trend prediction:", processor.predict_usage_trend(days=3, series='disk:/var'))
+    print("Peak usage times:", processor.get_peak_usage_times(series='cpu'))
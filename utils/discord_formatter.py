@@ -110,6 +110,9 @@ class DiscordFormatter:
         lowest_free_percent = 100
         
         for partition in system_data['disk']['partitions']:
+            if partition.get('percent') is None:
+                continue
+            
             if partition['percent'] < lowest_free_percent:
                 lowest_free_percent = partition['percent']
                 lowest_free_partition = partition['mountpoint']
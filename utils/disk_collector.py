@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Disk Usage Collector
+
+ใช้สำหรับดึงข้อมูลพื้นที่ดิสก์โดยไม่ให้ mount ที่ค้าง (เช่น NFS/CIFS) ทำให้ API ค้างตาม
+"""
+
+import logging
+import os
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import psutil
+
+class _MountState:
+    """สถานะของ mountpoint หนึ่งจุด"""
+
+    __slots__ = ('pending', 'executor', 'started', 'timeouts', 'quarantined_until')
+
+    def __init__(self):
+        self.pending = None
+        self.executor = None
+        self.started = None
+        self.timeouts = 0
+        self.quarantined_until = 0
+
+class DiskUsageCollector:
+    """
+    คลาสสำหรับเรียก statvfs ของทุก mountpoint พร้อมกันใน worker pool โดยมี timeout ต่อ mount
+    """
+
+    def __init__(self, timeout=2.0, max_workers=8, quarantine_after=3, quarantine_seconds=300,
+                 mountinfo_path='/proc/self/mountinfo', refresh_interval=60, backend=psutil):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Disk Usage Collector
+
+        Args:
+            timeout (float): เวลารอสูงสุดของ statvfs ต่อ mount นับจากเวลาที่ worker เริ่มทำงาน (วินาที)
+            max_workers (int): จำนวน thread สูงสุดที่ใช้เรียก statvfs
+            quarantine_after (int): จำนวนครั้งที่ timeout ติดกันก่อนจะกัก mount ไว้
+            quarantine_seconds (float): ระยะเวลาที่กัก mount ก่อนลองใหม่ (วินาที)
+            mountinfo_path (str): ไฟล์ที่ใช้ตรวจจับการเปลี่ยนแปลงของ mount table
+            refresh_interval (float): รอบเวลาอ่านรายการ mount ใหม่เมื่อใช้ poll() ไม่ได้ (วินาที)
+            backend: module ที่มี disk_partitions() และ disk_usage() (ค่าเริ่มต้นคือ psutil)
+        """
+        self.timeout = timeout
+        self.quarantine_after = quarantine_after
+        self.quarantine_seconds = quarantine_seconds
+        self.refresh_interval = refresh_interval
+        self.backend = backend
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="statvfs")
+        self.mounts = {}
+        self._partitions = None
+        self._refreshed_at = 0
+        self._lock = threading.Lock()
+        self._poller = None
+        self._mountinfo_fd = None
+        self._watch_mountinfo(mountinfo_path)
+
+    def _watch_mountinfo(self, path):
+        """
+        เปิด mountinfo ไว้เพื่อใช้ poll() ตรวจจับการ mount/umount
+
+        kernel จะแจ้ง POLLPRI/POLLERR เมื่อ mount table ของ namespace เปลี่ยน
+        """
+        try:
+            self._mountinfo_fd = os.open(path, os.O_RDONLY)
+            self._poller = select.poll()
+            self._poller.register(self._mountinfo_fd, select.POLLPRI | select.POLLERR)
+            # poll ครั้งแรกเพื่อเคลียร์สถานะเริ่มต้น
+            self._poller.poll(0)
+        except (OSError, AttributeError) as e:
+            logging.info(f"ไม่สามารถติดตาม {path} ด้วย poll(): {str(e)} จะอ่านรายการ mount ใหม่ทุก {self.refresh_interval} วินาที")
+            self._poller = None
+
+    def _mounts_changed(self):
+        """ตรวจสอบว่า mount table เปลี่ยนแปลงตั้งแต่ครั้งก่อนหรือไม่"""
+        if self._poller is not None:
+            return bool(self._poller.poll(0))
+        return time.monotonic() - self._refreshed_at > self.refresh_interval
+
+    def partitions(self):
+        """
+        รายการ partitions (อ่านใหม่เฉพาะเมื่อ mount table เปลี่ยน)
+
+        Returns:
+            list: รายการ partition จาก disk_partitions(all=False)
+        """
+        with self._lock:
+            if self._partitions is None or self._mounts_changed():
+                self._partitions = self.backend.disk_partitions(all=False)
+                self._refreshed_at = time.monotonic()
+                # ลบสถานะของ mount ที่ไม่มีอยู่แล้ว
+                current = {part.mountpoint for part in self._partitions}
+                for mountpoint in list(self.mounts):
+                    if mountpoint not in current and self.mounts[mountpoint].pending is None:
+                        del self.mounts[mountpoint]
+            return self._partitions
+
+    def _usage(self, mountpoint, state):
+        """เรียก statvfs ของ mountpoint (ทำงานใน worker thread)"""
+        # timeout นับจากเวลาที่ worker เริ่มทำงานจริง ไม่ใช่เวลาที่รออยู่ในคิว
+        state.started = time.monotonic()
+        if not os.path.exists(mountpoint):
+            return None
+        return self.backend.disk_usage(mountpoint)
+
+    def collect(self):
+        """
+        ดึงข้อมูลพื้นที่ของทุก partition
+
+        Returns:
+            list: ข้อมูลแต่ละ partition พร้อม status ('ok', 'timeout', 'quarantined' หรือ 'error')
+        """
+        now = time.monotonic()
+        partitions = self.partitions()
+        submitted = []
+        results = {}
+
+        with self._lock:
+            self._replace_saturated_executor()
+            for part in partitions:
+                state = self.mounts.setdefault(part.mountpoint, _MountState())
+
+                if state.pending is not None and not state.pending.done():
+                    # statvfs รอบก่อนยังค้างอยู่ ไม่ส่งงานซ้ำเพื่อไม่ให้ worker ถูกใช้หมด
+                    if state.started is None:
+                        # ยังรอ worker ว่างอยู่ในคิว ไม่ใช่ความผิดของ mount นี้
+                        results[part.mountpoint] = "queued"
+                    elif state.quarantined_until > now:
+                        results[part.mountpoint] = "quarantined"
+                    else:
+                        self._record_timeout(part.mountpoint, state, now)
+                        results[part.mountpoint] = "quarantined" if state.quarantined_until > now else "timeout"
+                    continue
+
+                if state.quarantined_until > now and state.pending is None:
+                    results[part.mountpoint] = "quarantined"
+                    continue
+
+                state.started = None
+                state.executor = self.executor
+                state.pending = self.executor.submit(self._usage, part.mountpoint, state)
+                submitted.append((part, state))
+
+        if submitted:
+            futures = [state.pending for _, state in submitted]
+            wait(futures, timeout=self.timeout)
+            # งานที่ได้ worker ช้าเพราะรอในคิว (เช่นหลัง mount ที่ค้าง) ได้เวลาครบ timeout ของตัวเอง
+            late = [state.started for _, state in submitted
+                    if not state.pending.done() and state.started is not None]
+            if late:
+                remaining = min(self.timeout, max(late) + self.timeout - time.monotonic())
+                if remaining > 0:
+                    wait(futures, timeout=remaining)
+
+        partitions_info = []
+        now = time.monotonic()
+        with self._lock:
+            for part in partitions:
+                state = self.mounts[part.mountpoint]
+                status = results.get(part.mountpoint)
+                usage = None
+
+                if status is None:
+                    future = state.pending
+                    if future.done():
+                        state.pending = None
+                        state.timeouts = 0
+                        state.quarantined_until = 0
+                        try:
+                            usage = future.result()
+                            status = "ok"
+                        except Exception as e:
+                            logging.warning(f"ไม่สามารถดึงข้อมูลพื้นที่ของ {part.mountpoint}: {str(e)}")
+                            status = "error"
+                        if status == "ok" and usage is None:
+                            # mountpoint ไม่มีอยู่จริง (เหมือนพฤติกรรมเดิมที่ข้ามไป)
+                            continue
+                    elif state.started is None:
+                        status = "queued"
+                    elif now - state.started >= self.timeout:
+                        self._record_timeout(part.mountpoint, state, now)
+                        status = "quarantined" if state.quarantined_until > now else "timeout"
+                    else:
+                        # เริ่มทำงานช้าเพราะรอในคิว และยังไม่ครบ timeout ของตัวเอง
+                        status = "timeout"
+
+                partitions_info.append({
+                    "device": part.device,
+                    "mountpoint": part.mountpoint,
+                    "fstype": part.fstype,
+                    "total": usage.total if usage else None,
+                    "used": usage.used if usage else None,
+                    "free": usage.free if usage else None,
+                    "percent": usage.percent if usage else None,
+                    "available": usage is not None,
+                    "status": status
+                })
+
+        return partitions_info
+
+    def _replace_saturated_executor(self):
+        """
+        สร้าง worker pool ใหม่เมื่อทุก worker ค้างอยู่ใน statvfs ของ mount ที่ไม่ตอบสนอง
+
+        thread ที่ค้างใน kernel ยกเลิกไม่ได้ จึงปล่อยไว้ใน pool เดิม (แต่ละ mount ค้างได้ไม่เกินหนึ่ง thread
+        เพราะไม่ส่งงานซ้ำระหว่างที่รอบก่อนยังค้างอยู่) งานที่ยังรอในคิวของ pool เดิมถูกยกเลิกและส่งใหม่ในรอบนี้
+        """
+        stuck = sum(
+            1 for state in self.mounts.values()
+            if state.executor is self.executor and state.pending is not None
+            and not state.pending.done() and state.started is not None
+        )
+        if stuck < self.max_workers:
+            return
+        logging.warning(f"statvfs ค้างครบทั้ง {stuck} worker สร้าง worker pool ใหม่")
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="statvfs")
+        for state in self.mounts.values():
+            if state.pending is not None and state.pending.cancelled():
+                state.pending = None
+
+    def _record_timeout(self, mountpoint, state, now):
+        """นับจำนวน timeout และกัก mount ที่ค้างติดกันหลายครั้ง"""
+        state.timeouts += 1
+        if state.timeouts >= self.quarantine_after and state.quarantined_until <= now:
+            state.quarantined_until = now + self.quarantine_seconds
+            logging.warning(f"กัก mount {mountpoint} เป็นเวลา {self.quarantine_seconds} วินาที เนื่องจาก statvfs ค้าง {state.timeouts} ครั้งติดกัน")
+
+    def stats(self):
+        """
+        สถานะของ mount ที่มีปัญหา
+
+        Returns:
+            dict: จำนวน timeout และเวลาที่เหลือของการกักแยกตาม mountpoint
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                mountpoint: {
+                    "timeouts": state.timeouts,
+                    "pending": state.pending is not None and not state.pending.done(),
+                    "quarantined_for": max(0, state.quarantined_until - now)
+                }
+                for mountpoint, state in self.mounts.items()
+                if state.timeouts or state.quarantined_until > now
+            }
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Disk Hotspots
+
+ใช้สำหรับหาไดเรกทอรีที่ใช้พื้นที่มากที่สุดและโตเร็วที่สุดของ partition ที่เกิน threshold
+โดยสแกนด้วย os.scandir หลาย thread พร้อมกันและไม่ข้ามไปยัง filesystem อื่น
+"""
+
+import heapq
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+class _Directory:
+    """ผลการสแกนไดเรกทอรีหนึ่งจุด (ใช้ซ้ำได้ถ้า inode และ mtime ไม่เปลี่ยน)"""
+
+    __slots__ = ('ino', 'mtime_ns', 'own_bytes', 'files', 'children', 'tracked')
+
+    def __init__(self, ino, mtime_ns, own_bytes, files, children, tracked):
+        self.ino = ino
+        self.mtime_ns = mtime_ns
+        self.own_bytes = own_bytes
+        self.files = files
+        self.children = children
+        self.tracked = tracked
+
+class DiskHotspotAnalyzer:
+    """
+    คลาสสำหรับคำนวณขนาดรวมของแต่ละไดเรกทอรีใน mountpoint (เหมือน du -x) แบบขนานใน thread pool
+
+    ผลของแต่ละไดเรกทอรีถูก cache ไว้ตาม inode และ mtime ในการสแกนครั้งถัดไป ไดเรกทอรีที่ไม่เปลี่ยน
+    จะไม่ถูกอ่านรายการไฟล์และ stat ไฟล์ใหม่ทั้งหมด ยกเว้นไฟล์ที่ติดตามไว้ซึ่งถูก stat ใหม่ทุกครั้ง
+    เพราะไฟล์ที่ถูกเขียนต่อท้าย (เช่น log) ไม่ทำให้ mtime ของไดเรกทอรีเปลี่ยน ไฟล์ที่ติดตามคือไฟล์ขนาดใหญ่
+    (track_bytes ขึ้นไป) รวมกับไฟล์ที่ใหญ่ที่สุดและไฟล์ที่ถูกแก้ไขล่าสุด track_files ไฟล์ของแต่ละไดเรกทอรี
+    log ที่เพิ่งเริ่มโตจึงไม่หลุดการตรวจจนถึงการสแกนใหม่ทั้งหมด
+    """
+
+    def __init__(self, workers=8, top_n=10, depth=4, min_interval=3600, max_seconds=600,
+                 full_rescan_interval=86400, track_bytes=16 * 1024 ** 2, track_files=16):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Disk Hotspot Analyzer
+
+        Args:
+            workers (int): จำนวน thread ที่ใช้สแกน
+            top_n (int): จำนวนไดเรกทอรีในแต่ละอันดับ
+            depth (int): ความลึกสูงสุด (นับจาก mountpoint) ของไดเรกทอรีที่แสดงในอันดับ
+            min_interval (float): ระยะเวลาขั้นต่ำระหว่างการสแกน mountpoint เดิม (วินาที)
+            max_seconds (float): เวลาสูงสุดของการสแกนหนึ่งครั้ง ถ้าเกินผลลัพธ์จะถูกทำเครื่องหมายว่า partial
+            full_rescan_interval (float): ระยะเวลาที่จะสแกนใหม่ทั้งหมดโดยไม่ใช้ cache (วินาที)
+            track_bytes (int): ไฟล์ที่มีขนาดตั้งแต่ค่านี้ขึ้นไปจะถูก stat ใหม่ทุกครั้งแม้ไดเรกทอรีไม่เปลี่ยน
+            track_files (int): จำนวนไฟล์ที่ใหญ่ที่สุดและจำนวนไฟล์ที่ถูกแก้ไขล่าสุดของแต่ละไดเรกทอรีที่ถูก stat ใหม่ทุกครั้งไม่ว่าขนาดเท่าใด
+        """
+        self.workers = workers
+        self.top_n = top_n
+        self.depth = depth
+        self.min_interval = min_interval
+        self.max_seconds = max_seconds
+        self.full_rescan_interval = full_rescan_interval
+        self.track_bytes = track_bytes
+        self.track_files = track_files
+        self.results = {}
+        self._cache = {}
+        self._totals = {}
+        self._full_scan_at = {}
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def request_scan(self, mountpoint, force=False):
+        """
+        เริ่มสแกน mountpoint ใน thread เบื้องหลัง (ไม่รอผล)
+
+        Args:
+            mountpoint (str): mountpoint ที่จะสแกน
+            force (bool): สแกนแม้เพิ่งสแกนไปไม่ถึง min_interval
+
+        Returns:
+            bool: True ถ้าเริ่มสแกน, False ถ้ากำลังสแกนอยู่หรือเพิ่งสแกนไปไม่ถึง min_interval
+        """
+        with self._lock:
+            if mountpoint in self._running:
+                return False
+            result = self.results.get(mountpoint)
+            if not force and result and time.time() - result["finished_at"] < self.min_interval:
+                return False
+            self._running.add(mountpoint)
+
+        thread = threading.Thread(target=self._scan_in_background, args=(mountpoint,),
+                                  name="disk-hotspots", daemon=True)
+        thread.start()
+        return True
+
+    def _scan_in_background(self, mountpoint):
+        try:
+            self.scan(mountpoint)
+        except Exception as e:
+            logging.error(f"ไม่สามารถวิเคราะห์พื้นที่ดิสก์ของ {mountpoint}: {str(e)}")
+        finally:
+            with self._lock:
+                self._running.discard(mountpoint)
+
+    def is_scanning(self, mountpoint):
+        """True ถ้ากำลังสแกน mountpoint นี้อยู่"""
+        with self._lock:
+            return mountpoint in self._running
+
+    def scanning(self):
+        """รายชื่อ mountpoint ที่กำลังสแกนอยู่"""
+        with self._lock:
+            return sorted(self._running)
+
+    def scan(self, mountpoint):
+        """
+        สแกน mountpoint และคำนวณอันดับไดเรกทอรีที่ใหญ่ที่สุดและโตเร็วที่สุด
+
+        Args:
+            mountpoint (str): mountpoint ที่จะสแกน
+
+        Returns:
+            dict: สรุปผลการสแกน (เก็บไว้ใน results ด้วย)
+        """
+        started_at = time.time()
+        started = time.perf_counter()
+        root_stat = os.lstat(mountpoint)
+        full = started_at - self._full_scan_at.get(mountpoint, 0) >= self.full_rescan_interval
+        cache = {} if full else self._cache.get(mountpoint, {})
+
+        directories, stats = self._walk(mountpoint, root_stat, cache, started + self.max_seconds)
+        totals = self._subtree_totals(mountpoint, directories)
+        finished_at = time.time()
+
+        # เก็บขนาดรวมของไดเรกทอรีที่แสดงในอันดับไว้เทียบกับการสแกนครั้งถัดไป
+        ranked = {
+            path: total for path, total in totals.items()
+            if 1 <= self._depth_of(mountpoint, path) <= self.depth
+        }
+        largest = sorted(ranked.items(), key=lambda item: item[1], reverse=True)[:self.top_n]
+        growing = []
+        previous = self._totals.get(mountpoint)
+        if previous and not stats["partial"]:
+            previous_at, previous_totals = previous
+            hours = max(finished_at - previous_at, 1) / 3600
+            growth = [
+                (path, total, total - previous_totals[path])
+                for path, total in ranked.items()
+                if path in previous_totals and total > previous_totals[path]
+            ]
+            growth.sort(key=lambda item: item[2], reverse=True)
+            growing = [
+                {"path": path, "bytes": total, "growth_bytes": delta, "growth_per_hour": delta / hours}
+                for path, total, delta in growth[:self.top_n]
+            ]
+
+        result = {
+            "mountpoint": mountpoint,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "duration_seconds": time.perf_counter() - started,
+            "total_bytes": totals.get(mountpoint, 0),
+            "directories": len(directories),
+            "files": stats["files"],
+            "reused_directories": stats["reused"],
+            "errors": stats["errors"],
+            "full_rescan": full,
+            "partial": stats["partial"],
+            "previous_scan_at": previous[0] if previous else None,
+            "largest": [{"path": path, "bytes": total} for path, total in largest],
+            "growing": growing
+        }
+
+        with self._lock:
+            self._cache[mountpoint] = directories
+            if not stats["partial"]:
+                self._totals[mountpoint] = (finished_at, ranked)
+                if full:
+                    self._full_scan_at[mountpoint] = started_at
+            self.results[mountpoint] = result
+        return result
+
+    def _walk(self, mountpoint, root_stat, cache, deadline):
+        """
+        สแกนทุกไดเรกทอรีใต้ mountpoint ใน thread pool
+
+        Returns:
+            tuple: (dict ของ path และ _Directory, สถิติ files/reused/errors/partial)
+        """
+        device = root_stat.st_dev
+        seen_links = set()
+        links_lock = threading.Lock()
+        directories = {}
+        stats = {"files": 0, "reused": 0, "errors": 0, "partial": False}
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hotspots") as executor:
+            def submit(path, stat):
+                return executor.submit(self._scan_directory, path, stat, device, cache.get(path),
+                                       seen_links, links_lock)
+
+            pending = {submit(mountpoint, root_stat): mountpoint}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    directory, reused, errors = future.result()
+                    stats["errors"] += errors
+                    if directory is None:
+                        continue
+                    directories[path] = directory
+                    stats["files"] += directory.files
+                    stats["reused"] += reused
+                    if time.perf_counter() > deadline:
+                        stats["partial"] = True
+                        continue
+                    for name, stat in directory.children:
+                        child = os.path.join(path, name)
+                        pending[submit(child, stat)] = child
+
+        # เก็บเฉพาะชื่อของไดเรกทอรีย่อยใน cache (stat ถูกอ่านใหม่ทุกครั้ง)
+        for directory in directories.values():
+            directory.children = tuple(name for name, _ in directory.children)
+        return directories, stats
+
+    def _scan_directory(self, path, stat, device, cached, seen_links, links_lock):
+        """
+        อ่านไดเรกทอรีหนึ่งจุด
+
+        Returns:
+            tuple: (_Directory ที่ children เป็นคู่ (ชื่อ, stat) หรือ None ถ้าอ่านไม่ได้, ใช้ cache หรือไม่, จำนวนข้อผิดพลาด)
+        """
+        errors = 0
+        if cached is not None and cached.ino == stat.st_ino and cached.mtime_ns == stat.st_mtime_ns:
+            own_bytes = cached.own_bytes
+            tracked = {}
+            for name, size in cached.tracked.items():
+                try:
+                    current = os.lstat(os.path.join(path, name)).st_blocks * 512
+                except OSError:
+                    current = 0
+                own_bytes += current - size
+                tracked[name] = current
+            children = []
+            for name in cached.children:
+                try:
+                    child_stat = os.lstat(os.path.join(path, name))
+                except OSError:
+                    errors += 1
+                    continue
+                children.append((name, child_stat))
+            return _Directory(stat.st_ino, stat.st_mtime_ns, own_bytes, cached.files, children, tracked), 1, errors
+
+        # รวมพื้นที่ของตัวไดเรกทอรีเองด้วย (เหมือน du)
+        own_bytes = stat.st_blocks * 512
+        files = 0
+        children = []
+        tracked = {}
+        small = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            child_stat = entry.stat(follow_symlinks=False)
+                            # ไม่ข้ามไปยัง filesystem อื่นที่ mount อยู่ข้างใน (เหมือน du -x)
+                            if child_stat.st_dev == device:
+                                children.append((entry.name, child_stat))
+                            continue
+                        entry_stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        errors += 1
+                        continue
+                    # hard link นับเพียงครั้งเดียว
+                    if entry_stat.st_nlink > 1:
+                        with links_lock:
+                            if entry_stat.st_ino in seen_links:
+                                continue
+                            seen_links.add(entry_stat.st_ino)
+                    size = entry_stat.st_blocks * 512
+                    own_bytes += size
+                    files += 1
+                    if size >= self.track_bytes:
+                        tracked[entry.name] = size
+                    else:
+                        small.append((size, entry_stat.st_mtime_ns, entry.name))
+        except OSError:
+            return None, 0, errors + 1
+        # ไฟล์เล็กที่ใหญ่ที่สุดและที่ถูกเขียนล่าสุด (เช่น log ที่เพิ่งเริ่มโต) ก็ต้อง stat ใหม่ในรอบที่ใช้ cache
+        if small and self.track_files > 0:
+            for size, _, name in heapq.nlargest(self.track_files, small):
+                tracked[name] = size
+            for size, _, name in heapq.nlargest(self.track_files, small, key=lambda item: item[1]):
+                tracked[name] = size
+        return _Directory(stat.st_ino, stat.st_mtime_ns, own_bytes, files, children, tracked), 0, errors
+
+    @staticmethod
+    def _depth_of(mountpoint, path):
+        """ความลึกของ path นับจาก mountpoint (mountpoint เองคือ 0)"""
+        if path == mountpoint:
+            return 0
+        return path.count(os.sep) - mountpoint.rstrip(os.sep).count(os.sep)
+
+    @classmethod
+    def _subtree_totals(cls, mountpoint, directories):
+        """คำนวณขนาดรวมของแต่ละไดเรกทอรี (รวมไดเรกทอรีย่อยทั้งหมด) จากล่างขึ้นบน"""
+        totals = {}
+        for path in sorted(directories, key=lambda item: cls._depth_of(mountpoint, item), reverse=True):
+            directory = directories[path]
+            totals[path] = directory.own_bytes + sum(
+                totals.get(os.path.join(path, name), 0) for name in directory.children
+            )
+        return totals
+
+    def summary(self, mountpoint, limit=5):
+        """
+        ข้อความสั้นๆ ของผลการสแกนล่าสุด (ใช้ในการแจ้งเตือน)
+
+        Args:
+            mountpoint (str): mountpoint
+            limit (int): จำนวนไดเรกทอรีสูงสุดในแต่ละอันดับ
+
+        Returns:
+            str: ข้อความ หรือ None ถ้ายังไม่มีผลการสแกน
+        """
+        with self._lock:
+            result = self.results.get(mountpoint)
+        if result is None:
+            return None
+        lines = [f"{entry['path']}: {format_bytes(entry['bytes'])}" for entry in result["largest"][:limit]]
+        if result["growing"]:
+            lines.append("โตเร็วที่สุด:")
+            lines.extend(
+                f"{entry['path']}: +{format_bytes(entry['growth_bytes'])} ({format_bytes(entry['growth_per_hour'])}/ชม.)"
+                for entry in result["growing"][:limit]
+            )
+        return "\n".join(lines)
+
+def format_bytes(size):
+    """แปลงจำนวน byte เป็นหน่วยที่อ่านง่าย"""
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(size) < 1024 or unit == "TiB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+
+if __name__ == '__main__':
+    # ตัวอย่าง: python -m utils.disk_hotspots /var (สแกนสองครั้งเพื่อดูผลของ cache)
+    analyzer = DiskHotspotAnalyzer()
+    target = sys.argv[1] if len(sys.argv) > 1 else '/'
+    for attempt in range(2):
+        result = analyzer.scan(target)
+        print(f"สแกน {target} ครั้งที่ {attempt + 1}: {result['directories']} ไดเรกทอรี, {result['files']} ไฟล์, "
+              f"ใช้ cache {result['reused_directories']} ไดเรกทอรี, {result['duration_seconds']:.2f} วินาที")
+    print(analyzer.summary(target, limit=10))
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Disk Statistics
+
+ใช้สำหรับคำนวณ IOPS, throughput, await, queue size และ %util ของแต่ละ block device จาก /proc/diskstats
+"""
+
+import logging
+import os
+import threading
+import time
+
+# /proc/diskstats นับเป็น sector ขนาด 512 bytes เสมอ ไม่ขึ้นกับขนาด sector จริงของอุปกรณ์
+SECTOR_SIZE = 512
+
+class DiskStatsCollector:
+    """
+    คลาสสำหรับอ่าน /proc/diskstats และคำนวณอัตราต่างๆ จากผลต่างระหว่างสองรอบ (แบบเดียวกับ iostat -x)
+    """
+
+    def __init__(self, diskstats_path='/proc/diskstats', sys_block_path='/sys/block', refresh_interval=60):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Disk Statistics Collector
+
+        Args:
+            diskstats_path (str): ตำแหน่งของไฟล์ diskstats
+            sys_block_path (str): ตำแหน่งของ /sys/block ที่ใช้หาดิสก์จริง
+            refresh_interval (float): รอบเวลาค้นหารายการดิสก์ใหม่ (วินาที)
+        """
+        self.diskstats_path = diskstats_path
+        self.sys_block_path = sys_block_path
+        self.refresh_interval = refresh_interval
+        self.devices = None
+        self.discovered_at = 0
+        self.previous = {}
+        self.previous_time = None
+        # ป้องกันไม่ให้หลาย request คำนวณผลต่างจาก snapshot ก่อนหน้าเดียวกันพร้อมกัน
+        self._lock = threading.Lock()
+
+    def _discover(self):
+        """
+        หาดิสก์จริง (มี /sys/block/<name>/device)
+
+        partition, device-mapper, loop และ zram ไม่มี device link จึงถูกตัดออก
+        ค่าของดิสก์รวม I/O ของทุก partition บนดิสก์นั้นอยู่แล้ว
+        """
+        now = time.monotonic()
+        if self.devices is not None and now - self.discovered_at < self.refresh_interval:
+            return self.devices
+
+        devices = set()
+        try:
+            for name in os.listdir(self.sys_block_path):
+                if os.path.exists(os.path.join(self.sys_block_path, name, 'device')):
+                    devices.add(name)
+        except OSError as e:
+            logging.warning(f"ไม่สามารถอ่าน {self.sys_block_path}: {str(e)}")
+
+        self.devices = devices
+        self.discovered_at = now
+        return devices
+
+    def _read(self, devices):
+        """อ่าน counters ของดิสก์ที่ต้องการจาก diskstats"""
+        counters = {}
+        with open(self.diskstats_path, 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 14 or fields[2] not in devices:
+                    continue
+                counters[fields[2]] = (
+                    int(fields[3]),   # reads completed
+                    int(fields[5]),   # sectors read
+                    int(fields[6]),   # ms reading
+                    int(fields[7]),   # writes completed
+                    int(fields[9]),   # sectors written
+                    int(fields[10]),  # ms writing
+                    int(fields[11]),  # I/Os in progress
+                    int(fields[12]),  # ms doing I/O
+                    int(fields[13])   # weighted ms doing I/O
+                )
+        return counters
+
+    def collect(self):
+        """
+        ดึงสถิติ I/O ของแต่ละดิสก์
+
+        Returns:
+            dict: สถิติแยกตามชื่ออุปกรณ์ (อัตราเป็น None ในรอบแรกหรือเมื่อ counter ถูก reset)
+        """
+        with self._lock:
+            now = time.monotonic()
+            counters = self._read(self._discover())
+            elapsed = now - self.previous_time if self.previous_time is not None else None
+
+            devices = {}
+            for name, current in counters.items():
+                prev = self.previous.get(name)
+                stats = {
+                    "reads_per_sec": None,
+                    "writes_per_sec": None,
+                    "read_bytes_per_sec": None,
+                    "write_bytes_per_sec": None,
+                    "read_await_ms": None,
+                    "write_await_ms": None,
+                    "await_ms": None,
+                    "avg_queue_size": None,
+                    "util_percent": None,
+                    "in_flight": current[6]
+                }
+
+                if elapsed and prev is not None:
+                    delta = [cur - old for cur, old in zip(current, prev)]
+                    # counter ลดลงแปลว่าถูก reset หรือ wrap (kernel 32-bit) ข้ามรอบนี้
+                    if min(delta[:6] + delta[7:]) >= 0:
+                        reads, read_sectors, read_ms, writes, write_sectors, write_ms, _, io_ms, weighted_ms = delta
+                        interval_ms = elapsed * 1000
+                        stats.update({
+                            "reads_per_sec": round(reads / elapsed, 2),
+                            "writes_per_sec": round(writes / elapsed, 2),
+                            "read_bytes_per_sec": round(read_sectors * SECTOR_SIZE / elapsed, 1),
+                            "write_bytes_per_sec": round(write_sectors * SECTOR_SIZE / elapsed, 1),
+                            "read_await_ms": round(read_ms / reads, 3) if reads else 0.0,
+                            "write_await_ms": round(write_ms / writes, 3) if writes else 0.0,
+                            "await_ms": round((read_ms + write_ms) / (reads + writes), 3) if reads + writes else 0.0,
+                            "avg_queue_size": round(weighted_ms / interval_ms, 3),
+                            "util_percent": round(min(100.0, io_ms / interval_ms * 100), 2)
+                        })
+
+                devices[name] = stats
+
+            self.previous = counters
+            self.previous_time = now
+            return devices
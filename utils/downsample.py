@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Downsampling
+
+ใช้สำหรับลดจำนวนจุดของ time series ก่อนส่งให้กราฟ โดยยังคงรูปร่างของข้อมูลไว้
+"""
+
+def lttb(timestamps, values, threshold):
+    """
+    ลดจำนวนจุดด้วย Largest-Triangle-Three-Buckets
+
+    เลือกจุดแรกและจุดสุดท้ายเสมอ ส่วนจุดอื่นเลือกจุดในแต่ละ bucket ที่สร้างสามเหลี่ยมพื้นที่มากที่สุด
+    กับจุดที่เลือกไว้ใน bucket ก่อนหน้าและค่าเฉลี่ยของ bucket ถัดไป
+
+    Args:
+        timestamps (list): เวลาของแต่ละจุด (เรียงจากน้อยไปมาก)
+        values (list): ค่าของแต่ละจุด
+        threshold (int): จำนวนจุดสูงสุดของผลลัพธ์
+
+    Returns:
+        tuple: (timestamps, values) ที่มีไม่เกิน threshold จุด
+    """
+    length = len(values)
+    if threshold >= length:
+        return list(timestamps), list(values)
+    if threshold < 3:
+        indices = [0, length - 1][:threshold]
+        return [timestamps[i] for i in indices], [values[i] for i in indices]
+
+    sampled_x = [timestamps[0]]
+    sampled_y = [values[0]]
+    every = (length - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # ค่าเฉลี่ยของ bucket ถัดไป
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, length)
+        count = next_end - next_start
+        avg_x = sum(timestamps[next_start:next_end]) / count
+        avg_y = sum(values[next_start:next_end]) / count
+
+        # หาจุดใน bucket ปัจจุบันที่ให้สามเหลี่ยมใหญ่ที่สุด
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax = timestamps[a]
+        ay = values[a]
+        dx = ax - avg_x
+        dy = avg_y - ay
+        max_area = -1.0
+        chosen = start
+        for j in range(start, end):
+            area = abs(dx * (values[j] - ay) - (ax - timestamps[j]) * dy)
+            if area > max_area:
+                max_area = area
+                chosen = j
+
+        sampled_x.append(timestamps[chosen])
+        sampled_y.append(values[chosen])
+        a = chosen
+
+    sampled_x.append(timestamps[-1])
+    sampled_y.append(values[-1])
+    return sampled_x, sampled_y
+
+def minmax(timestamps, values, threshold):
+    """
+    ลดจำนวนจุดโดยเก็บค่าต่ำสุดและสูงสุดของแต่ละ bucket (เหมาะกับการดู spike)
+
+    Args:
+        timestamps (list): เวลาของแต่ละจุด (เรียงจากน้อยไปมาก)
+        values (list): ค่าของแต่ละจุด
+        threshold (int): จำนวนจุดสูงสุดของผลลัพธ์
+
+    Returns:
+        tuple: (timestamps, values) ที่มีไม่เกิน threshold จุด เรียงตามเวลา
+    """
+    length = len(values)
+    if threshold >= length:
+        return list(timestamps), list(values)
+
+    buckets = threshold // 2
+    if buckets == 0:
+        return list(timestamps[:threshold]), list(values[:threshold])
+
+    sampled_x = []
+    sampled_y = []
+    every = length / buckets
+    for i in range(buckets):
+        start = int(i * every)
+        end = int((i + 1) * every)
+        if start >= end:
+            continue
+        low = high = start
+        for j in range(start + 1, end):
+            if values[j] < values[low]:
+                low = j
+            elif values[j] > values[high]:
+                high = j
+        for j in sorted({low, high}):
+            sampled_x.append(timestamps[j])
+            sampled_y.append(values[j])
+    return sampled_x, sampled_y
+
+METHODS = {
+    "lttb": lttb,
+    "minmax": minmax
+}
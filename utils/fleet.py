@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Fleet Agent/Aggregator
+
+ใช้สำหรับส่งข้อมูลจากหลายเซิร์ฟเวอร์ (agent) มารวมที่ aggregator ตัวเดียว
+"""
+
+import gzip
+import io
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from utils.startup import lazy_import
+
+# โหลดเมื่อส่งข้อมูลครั้งแรก (aggregator และการเริ่ม agent ไม่ต้องใช้)
+requests = lazy_import("requests")
+
+# จำนวนตัวอย่างสูงสุดต่อ batch ที่ aggregator ยอมรับ
+MAX_BATCH_SAMPLES = 1000
+
+# ขนาด body สูงสุดหลัง decompress (ป้องกัน gzip bomb)
+MAX_BATCH_BYTES = 16 * 1024 * 1024
+
+def encode_batch(samples):
+    """
+    แปลงรายการตัวอย่างเป็น body แบบ gzip สำหรับส่งไปยัง aggregator
+
+    Args:
+        samples (list): รายการข้อมูลระบบ
+
+    Returns:
+        bytes: JSON ที่ถูกบีบอัดด้วย gzip
+    """
+    payload = json.dumps({"samples": samples}, separators=(',', ':')).encode('utf-8')
+    return gzip.compress(payload, compresslevel=5)
+
+def decode_batch(body, content_encoding=None):
+    """
+    แปลง body ที่ได้รับจาก agent กลับเป็นรายการตัวอย่าง
+
+    Args:
+        body (bytes): body ของ request
+        content_encoding (str, optional): ค่า Content-Encoding header
+
+    Returns:
+        list: รายการตัวอย่าง
+
+    Raises:
+        ValueError: ถ้า body ไม่ถูกต้องหรือใหญ่เกินไป
+    """
+    if content_encoding == 'gzip':
+        try:
+            decompressor = gzip.GzipFile(fileobj=io.BytesIO(body))
+            body = decompressor.read(MAX_BATCH_BYTES + 1)
+        except (OSError, EOFError) as e:
+            raise ValueError(f"gzip ไม่ถูกต้อง: {str(e)}")
+
+    if len(body) > MAX_BATCH_BYTES:
+        raise ValueError("batch มีขนาดใหญ่เกินไป")
+
+    try:
+        payload = json.loads(body)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"JSON ไม่ถูกต้อง: {str(e)}")
+
+    if not isinstance(payload, dict) or not isinstance(payload.get("samples"), list):
+        raise ValueError("batch ต้องมี key 'samples' เป็น list")
+
+    if len(payload["samples"]) > MAX_BATCH_SAMPLES:
+        raise ValueError(f"batch มีตัวอย่างเกิน {MAX_BATCH_SAMPLES} รายการ")
+
+    return payload["samples"]
+
+# status ของ aggregator ที่ไม่ได้เกิดจากตัว batch (ส่งใหม่ภายหลังได้) ส่วน 4xx อื่นหมายถึง batch เสีย
+RETRY_STATUSES = (401, 403, 404, 408, 429)
+
+# field ของ I/O แต่ละดิสก์และแต่ละ core ที่ store_in_influxdb อ่าน
+DEVICE_FIELDS = ("reads_per_sec", "writes_per_sec", "read_bytes_per_sec", "write_bytes_per_sec",
+                 "await_ms", "avg_queue_size", "util_percent")
+CORE_FIELDS = ("percent", "user", "system", "iowait", "irq", "softirq", "steal")
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _is_optional_number(value):
+    return value is None or _is_number(value)
+
+def _validate_cpu(cpu):
+    """ตรวจสอบ section cpu (คืนข้อความแสดงข้อผิดพลาด หรือ None)"""
+    if not isinstance(cpu, dict) or not _is_number(cpu.get("percent")):
+        return "ข้อมูล cpu ไม่ถูกต้อง"
+    load_average = cpu.get("load_average")
+    if not isinstance(load_average, dict) or \
+            not all(_is_number(load_average.get(key)) for key in ("1min", "5min", "15min")):
+        return "ข้อมูล cpu.load_average ไม่ถูกต้อง"
+    times_percent = cpu.get("times_percent")
+    if times_percent is not None and (not isinstance(times_percent, dict)
+                                      or not all(_is_number(value) for value in times_percent.values())):
+        return "ข้อมูล cpu.times_percent ไม่ถูกต้อง"
+    for key in ("context_switches_per_sec", "interrupts_per_sec"):
+        if not _is_optional_number(cpu.get(key)):
+            return f"ข้อมูล cpu.{key} ไม่ถูกต้อง"
+    per_core = cpu.get("per_core", [])
+    if not isinstance(per_core, list):
+        return "ข้อมูล cpu.per_core ไม่ถูกต้อง"
+    for core in per_core:
+        if not isinstance(core, dict) or "core" not in core or \
+                not all(_is_number(core.get(key)) for key in CORE_FIELDS):
+            return "ข้อมูล cpu.per_core ไม่ถูกต้อง"
+    return None
+
+def _validate_disk(disk):
+    """ตรวจสอบ section disk (คืนข้อความแสดงข้อผิดพลาด หรือ None)"""
+    if not isinstance(disk, dict) or not isinstance(disk.get("partitions"), list):
+        return "ข้อมูล disk ไม่ถูกต้อง"
+    for partition in disk["partitions"]:
+        if not isinstance(partition, dict) or not isinstance(partition.get("mountpoint"), str) \
+                or not _is_optional_number(partition.get("percent")):
+            return "ข้อมูล disk.partitions ไม่ถูกต้อง"
+    devices = disk.get("devices", {})
+    if not isinstance(devices, dict):
+        return "ข้อมูล disk.devices ไม่ถูกต้อง"
+    for stats in devices.values():
+        if not isinstance(stats, dict) or not _is_optional_number(stats.get("util_percent")):
+            return "ข้อมูล disk.devices ไม่ถูกต้อง"
+        if stats["util_percent"] is not None and not all(_is_number(stats.get(key)) for key in DEVICE_FIELDS):
+            return "ข้อมูล disk.devices ไม่ถูกต้อง"
+    return None
+
+def _validate_network(network):
+    """ตรวจสอบ section network (คืนข้อความแสดงข้อผิดพลาด หรือ None)"""
+    if not isinstance(network, dict) or not isinstance(network.get("interfaces"), dict):
+        return "ข้อมูล network ไม่ถูกต้อง"
+    for interface in network["interfaces"].values():
+        if not isinstance(interface, dict):
+            return "ข้อมูล network.interfaces ไม่ถูกต้อง"
+        io_stats = interface.get("io")
+        if "io" in interface and (not isinstance(io_stats, dict) or not _is_number(io_stats.get("bytes_sent"))
+                                  or not _is_number(io_stats.get("bytes_recv"))):
+            return "ข้อมูล network.interfaces ไม่ถูกต้อง"
+    return None
+
+def _validate_temperature(temperature):
+    """ตรวจสอบ section temperature (dict ของ chip -> รายการ sensor หรือ {"error": ...})"""
+    if not isinstance(temperature, dict):
+        return "ข้อมูล temperature ไม่ถูกต้อง"
+    if "error" in temperature:
+        return None
+    for sensors in temperature.values():
+        if not isinstance(sensors, list):
+            continue
+        for sensor in sensors:
+            if not isinstance(sensor, dict) or not _is_optional_number(sensor.get("current")):
+                return "ข้อมูล temperature ไม่ถูกต้อง"
+    return None
+
+def _validate_logs(logs):
+    """ตรวจสอบ section logs (ไม่บังคับ) ที่ใช้เฉพาะจำนวนสะสม"""
+    if logs is None:
+        return None
+    if not isinstance(logs, dict) or not isinstance(logs.get("lifetime", {}), dict):
+        return "ข้อมูล logs ไม่ถูกต้อง"
+    for units in logs.get("lifetime", {}).values():
+        if not isinstance(units, dict) or not all(_is_number(count) for count in units.values()):
+            return "ข้อมูล logs ไม่ถูกต้อง"
+    return None
+
+def _validate_plugins(plugins):
+    """ตรวจสอบ section plugins (ไม่บังคับ) ตามรูปแบบที่ plugin_points และ plugin_alerts อ่าน"""
+    if plugins is None:
+        return None
+    if not isinstance(plugins, dict):
+        return "ข้อมูล plugins ไม่ถูกต้อง"
+    for plugin in plugins.values():
+        if not isinstance(plugin, dict):
+            return "ข้อมูล plugins ไม่ถูกต้อง"
+        mapping = plugin.get("influxdb")
+        thresholds = plugin.get("thresholds")
+        data = plugin.get("data")
+        if mapping is not None and not isinstance(mapping, dict):
+            return "ข้อมูล plugins ไม่ถูกต้อง"
+        if plugin.get("schema") is not None and not isinstance(plugin["schema"], dict):
+            return "ข้อมูล plugins ไม่ถูกต้อง"
+        if thresholds is not None and (not isinstance(thresholds, dict) or not all(
+                isinstance(limits, dict) and _is_optional_number(limits.get("max"))
+                and _is_optional_number(limits.get("min")) for limits in thresholds.values())):
+            return "ข้อมูล plugins ไม่ถูกต้อง"
+        if data is None:
+            continue
+        if not isinstance(data, dict):
+            return "ข้อมูล plugins ไม่ถูกต้อง"
+        rows = data.values() if (mapping or {}).get("tag") else (data,)
+        for fields in rows:
+            if not isinstance(fields, dict) or not all(
+                    isinstance(value, (int, float, str)) for value in fields.values()):
+                return "ข้อมูล plugins ไม่ถูกต้อง"
+    return None
+
+def validate_sample(sample):
+    """
+    ตรวจสอบโครงสร้างของตัวอย่างที่ได้รับจาก agent
+
+    Args:
+        sample (dict): ข้อมูลระบบหนึ่งตัวอย่าง
+
+    Returns:
+        str: ข้อความแสดงข้อผิดพลาด หรือ None ถ้าข้อมูลถูกต้อง
+    """
+    if not isinstance(sample, dict):
+        return "ตัวอย่างต้องเป็น object"
+
+    system = sample.get("system")
+    if not isinstance(system, dict):
+        return "ไม่มีข้อมูล system"
+    if not isinstance(system.get("hostname"), str) or not system["hostname"]:
+        return "ไม่มี hostname"
+    if not isinstance(system.get("uptime"), dict) or not isinstance(system["uptime"].get("formatted"), str):
+        return "ข้อมูล system.uptime ไม่ถูกต้อง"
+
+    if not _is_number(sample.get("collected_at")):
+        return "ไม่มี collected_at"
+
+    memory = sample.get("memory")
+    if not isinstance(memory, dict) or not isinstance(memory.get("ram"), dict) \
+            or not _is_number(memory["ram"].get("percent")):
+        return "ข้อมูล memory ไม่ถูกต้อง"
+    if not isinstance(memory.get("swap"), dict) or not _is_number(memory["swap"].get("percent")):
+        return "ข้อมูล memory.swap ไม่ถูกต้อง"
+
+    # ตรวจทุก field ที่ store_in_influxdb และ check_thresholds อ่าน เพื่อไม่ให้ worker ล้มหลังตอบว่ารับแล้ว
+    return (_validate_cpu(sample.get("cpu"))
+            or _validate_disk(sample.get("disk"))
+            or _validate_network(sample.get("network"))
+            or _validate_temperature(sample.get("temperature"))
+            or _validate_logs(sample.get("logs"))
+            or _validate_plugins(sample.get("plugins")))
+
+class FleetAgent:
+    """
+    คลาสสำหรับเก็บข้อมูลระบบเป็นระยะและส่งเป็น batch ไปยัง aggregator
+    """
+
+    def __init__(self, collect_func, aggregator_url, token="", interval=1,
+                 batch_size=10, max_buffer=3600, timeout=10):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Fleet Agent
+
+        Args:
+            collect_func (callable): ฟังก์ชันที่คืนค่าข้อมูลระบบหนึ่งตัวอย่าง
+            aggregator_url (str): URL ของ aggregator
+            token (str): token สำหรับยืนยันตัวตนกับ aggregator
+            interval (float): ระยะเวลาระหว่างการเก็บข้อมูล (วินาที)
+            batch_size (int): จำนวนตัวอย่างต่อการส่งหนึ่งครั้ง
+            max_buffer (int): จำนวนตัวอย่างสูงสุดที่เก็บไว้ระหว่างรอส่ง
+            timeout (float): timeout ของการส่งข้อมูล (วินาที)
+        """
+        self.collect_func = collect_func
+        self.ingest_url = aggregator_url.rstrip('/') + '/api/v1/fleet/ingest'
+        self.interval = interval
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.buffer = deque(maxlen=max_buffer)
+        self.dropped = 0
+        self.headers = {
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip"
+        }
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        self.session = None
+        self._stop = threading.Event()
+
+    def sample(self):
+        """เก็บข้อมูลหนึ่งตัวอย่างและเพิ่มลงใน buffer"""
+        sample = self.collect_func()
+        sample["collected_at"] = time.time()
+        self.buffer.append(sample)
+
+    def flush(self):
+        """
+        ส่งข้อมูลทั้งหมดใน buffer ไปยัง aggregator ทีละ batch (ไม่เกิน MAX_BATCH_SAMPLES ต่อ batch)
+
+        batch ที่ aggregator ปฏิเสธด้วย 4xx (ยกเว้น RETRY_STATUSES) ถือว่าเสียและถูกทิ้ง
+        เพื่อไม่ให้ค้างอยู่หน้า buffer ตลอดไป
+
+        Returns:
+            bool: True ถ้าส่งครบ, False ถ้าล้มเหลว (ข้อมูลที่ยังไม่ได้ส่งอยู่ใน buffer)
+        """
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers.update(self.headers)
+
+        batch_size = max(1, min(self.batch_size, MAX_BATCH_SAMPLES))
+        while self.buffer:
+            samples = [self.buffer[index] for index in range(min(batch_size, len(self.buffer)))]
+            try:
+                response = self.session.post(
+                    self.ingest_url,
+                    data=encode_batch(samples),
+                    timeout=self.timeout
+                )
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status is None or status >= 500 or status in RETRY_STATUSES:
+                    logging.error(f"ไม่สามารถส่งข้อมูลไปยัง aggregator: {str(e)}")
+                    return False
+                self.dropped += len(samples)
+                logging.error(f"aggregator ปฏิเสธ batch ({len(samples)} ตัวอย่าง) จึงทิ้ง batch นี้: {str(e)}")
+            except requests.exceptions.RequestException as e:
+                logging.error(f"ไม่สามารถส่งข้อมูลไปยัง aggregator: {str(e)}")
+                return False
+
+            # ลบเฉพาะตัวอย่างที่อยู่ใน batch นี้ (sample() อาจเพิ่มตัวอย่างใหม่ต่อท้ายระหว่างส่ง)
+            for _ in range(len(samples)):
+                self.buffer.popleft()
+        return True
+
+    def run(self):
+        """เก็บและส่งข้อมูลไปเรื่อยๆ จนกว่าจะเรียก stop()"""
+        logging.info(f"Fleet agent เริ่มส่งข้อมูลไปยัง {self.ingest_url}")
+        next_tick = time.monotonic()
+
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logging.error(f"ไม่สามารถเก็บข้อมูลระบบ: {str(e)}")
+
+            if len(self.buffer) >= self.batch_size:
+                self.flush()
+
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                # เก็บข้อมูลช้ากว่า interval ให้เริ่มนับใหม่แทนการเร่งตามให้ทัน
+                next_tick = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+        self.flush()
+
+    def stop(self):
+        """หยุดการทำงานของ agent"""
+        self._stop.set()
+
+class FleetAggregator:
+    """
+    คลาสสำหรับรับข้อมูลจาก agent หลายเครื่องและส่งต่อไปยัง InfluxDB และระบบแจ้งเตือน
+    """
+
+    def __init__(self, handlers=None, stale_after=30, queue_size=10000):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Fleet Aggregator
+
+        Args:
+            handlers (list, optional): ฟังก์ชันที่จะเรียกกับทุกตัวอย่างที่ผ่านการตรวจสอบ
+            stale_after (float): จำนวนวินาทีที่ถือว่า host ขาดการติดต่อ
+            queue_size (int): จำนวนตัวอย่างสูงสุดที่รอการประมวลผล
+        """
+        self.handlers = handlers or []
+        self.stale_after = stale_after
+        self.latest = {}
+        self.last_seen = {}
+        self.stats = {"accepted": 0, "rejected": 0, "dropped": 0}
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._process, name="fleet-aggregator", daemon=True)
+        self._worker.start()
+
+    def ingest(self, samples):
+        """
+        รับ batch ของตัวอย่างจาก agent
+
+        Args:
+            samples (list): รายการตัวอย่างที่ decode แล้ว
+
+        Returns:
+            dict: จำนวนตัวอย่างที่รับ ปฏิเสธ และข้อผิดพลาด
+
+        Raises:
+            queue.Full: ถ้าคิวเต็ม (agent ควรส่งใหม่ภายหลัง)
+        """
+        accepted = []
+        errors = []
+        for index, sample in enumerate(samples):
+            error = validate_sample(sample)
+            if error:
+                errors.append({"index": index, "error": error})
+            else:
+                accepted.append(sample)
+
+        now = time.time()
+        with self._lock:
+            # ตรวจสอบพื้นที่และใส่ลงคิวภายใต้ lock เดียวกัน (worker ทำได้เพียงลดขนาดคิว)
+            # เพื่อไม่ให้ batch ถูกรับไปเพียงบางส่วนเมื่อหลาย request เข้ามาพร้อมกัน
+            if self.queue.maxsize - self.queue.qsize() < len(accepted):
+                self.stats["dropped"] += len(accepted)
+                raise queue.Full()
+            for sample in accepted:
+                self.queue.put_nowait(sample)
+
+            for sample in accepted:
+                hostname = sample["system"]["hostname"]
+                current = self.latest.get(hostname)
+                if current is None or current["collected_at"] <= sample["collected_at"]:
+                    self.latest[hostname] = sample
+                self.last_seen[hostname] = now
+            self.stats["accepted"] += len(accepted)
+            self.stats["rejected"] += len(errors)
+
+        return {
+            "accepted": len(accepted),
+            "rejected": len(errors),
+            "errors": errors[:20]
+        }
+
+    def _process(self):
+        """ส่งตัวอย่างจากคิวไปยัง handlers ทีละรายการ"""
+        while True:
+            sample = self.queue.get()
+            for handler in self.handlers:
+                try:
+                    handler(sample)
+                except Exception as e:
+                    logging.error(f"Fleet handler ล้มเหลวสำหรับ {sample['system']['hostname']}: {str(e)}")
+            self.queue.task_done()
+
+    def hosts(self):
+        """
+        สรุปสถานะล่าสุดของทุก host
+
+        Returns:
+            list: ข้อมูลสรุปของแต่ละ host
+        """
+        now = time.time()
+        result = []
+        with self._lock:
+            items = list(self.latest.items())
+            last_seen = dict(self.last_seen)
+
+        for hostname, sample in sorted(items):
+            disk_percents = [p["percent"] for p in sample["disk"]["partitions"]
+                             if isinstance(p, dict) and _is_number(p.get("percent"))]
+            result.append({
+                "hostname": hostname,
+                "collected_at": sample["collected_at"],
+                "last_seen": last_seen.get(hostname),
+                "stale": now - last_seen.get(hostname, 0) > self.stale_after,
+                "cpu_percent": sample["cpu"]["percent"],
+                "memory_percent": sample["memory"]["ram"]["percent"],
+                "disk_max_percent": max(disk_percents) if disk_percents else None
+            })
+        return result
+
+    def host(self, hostname):
+        """
+        ดึงตัวอย่างล่าสุดของ host ที่ระบุ
+
+        Args:
+            hostname (str): ชื่อ host
+
+        Returns:
+            dict: ตัวอย่างล่าสุด หรือ None ถ้าไม่พบ
+        """
+        with self._lock:
+            return self.latest.get(hostname)
+
+    def summary(self):
+        """
+        สรุปภาพรวมของ fleet
+
+        Returns:
+            dict: จำนวน host และสถิติการรับข้อมูล
+        """
+        hosts = self.hosts()
+        with self._lock:
+            stats = dict(self.stats)
+        return {
+            "hosts": len(hosts),
+            "stale_hosts": sum(1 for h in hosts if h["stale"]),
+            "queue_depth": self.queue.qsize(),
+            "stats": stats
+        }
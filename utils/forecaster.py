@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Forecaster
+
+ใช้สำหรับพยากรณ์การใช้ทรัพยากร (เช่น หน่วยความจำและพื้นที่ดิสก์) ด้วย Holt-Winters แบบ additive
+(level, trend และ seasonality รายวัน) ที่อัปเดตทีละตัวอย่าง และประมาณเวลาที่จะถึงค่า threshold
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+STATE_VERSION = 1
+
+class HoltWinters:
+    """
+    สถานะ Holt-Winters ของหนึ่ง series
+
+    ตัวอย่างจะถูกเฉลี่ยสะสมในช่วงของวัน (season slot) ปัจจุบัน และเมื่อขึ้นช่วงใหม่จะนำค่าเฉลี่ยไปอัปเดต
+    level, trend และ seasonality หนึ่งครั้ง trend เก็บเป็นหน่วยต่อวินาทีเพื่อรองรับช่วงที่ขาดหายไป
+    """
+
+    __slots__ = ('level', 'trend', 'season', 'season_counts', 'variance', 'first_time', 'last_time',
+                 'last_value', 'samples', 'updates', 'bucket_start', 'bucket_sum', 'bucket_count')
+
+    def __init__(self, season_slots=24):
+        self.level = 0.0
+        self.trend = 0.0
+        self.season = [0.0] * season_slots
+        self.season_counts = [0] * season_slots
+        self.variance = 0.0
+        self.first_time = None
+        self.last_time = None
+        self.last_value = None
+        self.samples = 0
+        self.updates = 0
+        self.bucket_start = None
+        self.bucket_sum = 0.0
+        self.bucket_count = 0
+
+    @property
+    def slot_seconds(self):
+        return 86400 / len(self.season)
+
+    def slot(self, timestamp):
+        """ช่วงของวัน (index ของ seasonality) ที่เวลานี้อยู่ (ตามเวลา UTC)"""
+        return int(timestamp % 86400 // self.slot_seconds) % len(self.season)
+
+    def add(self, timestamp, value, alpha, beta, gamma):
+        """
+        เพิ่มตัวอย่าง (O(1)) และอัปเดตโมเดลเมื่อช่วงก่อนหน้าสิ้นสุด
+
+        Args:
+            timestamp (float): epoch time ของตัวอย่าง
+            value (float): ค่าของตัวอย่าง
+            alpha (float): smoothing ของ level
+            beta (float): smoothing ของ trend
+            gamma (float): smoothing ของ seasonality
+
+        Returns:
+            bool: True ถ้าใช้ตัวอย่างนี้ (ตัวอย่างที่ย้อนไปก่อนช่วงปัจจุบันจะถูกข้าม)
+        """
+        bucket_start = timestamp // self.slot_seconds * self.slot_seconds
+        if self.bucket_start is not None and bucket_start < self.bucket_start:
+            return False
+        if self.bucket_start is not None and bucket_start > self.bucket_start and self.bucket_count:
+            # ใช้เวลากลางช่วงเป็นตัวแทนของค่าเฉลี่ย
+            self._apply(self.bucket_start + self.slot_seconds / 2, self.bucket_sum / self.bucket_count, alpha, beta, gamma)
+            self.bucket_sum = 0.0
+            self.bucket_count = 0
+        self.bucket_start = bucket_start
+        self.bucket_sum += value
+        self.bucket_count += 1
+        self.last_value = value
+        self.samples += 1
+        return True
+
+    def _apply(self, timestamp, value, alpha, beta, gamma):
+        """อัปเดต level, trend และ seasonality ด้วยค่าเฉลี่ยของหนึ่งช่วง"""
+        slot = self.slot(timestamp)
+        if self.updates == 0:
+            self.level = value
+            self.first_time = self.last_time = timestamp
+            self.updates = 1
+            self.season_counts[slot] = 1
+            return
+
+        dt = timestamp - self.last_time
+        seasonal = self.season[slot]
+        residual = value - (self.level + self.trend * dt + seasonal)
+        self.variance = residual * residual if self.updates == 1 else self.variance + alpha * (residual * residual - self.variance)
+
+        previous_level = self.level
+        self.level = alpha * (value - seasonal) + (1 - alpha) * (self.level + self.trend * dt)
+        self.trend = beta * (self.level - previous_level) / dt + (1 - beta) * self.trend
+        # รอบแรกๆ ของแต่ละช่วงใช้ค่าเฉลี่ยสะสมแทน gamma เพื่อให้ seasonality ตั้งตัวได้เร็ว
+        self.season_counts[slot] += 1
+        weight = max(gamma, 1 / self.season_counts[slot])
+        self.season[slot] = weight * (value - self.level) + (1 - weight) * seasonal
+
+        self.last_time = timestamp
+        self.updates += 1
+
+    def predict(self, timestamp):
+        """ค่าพยากรณ์ ณ เวลาที่กำหนด"""
+        return self.level + self.trend * (timestamp - self.last_time) + self.season[self.slot(timestamp)]
+
+    def stddev(self, timestamp, alpha, beta):
+        """
+        ส่วนเบี่ยงเบนมาตรฐานของค่าพยากรณ์ ณ เวลาที่กำหนด
+
+        ใช้สูตรความแปรปรวนของ Holt's linear method: sigma^2 * (1 + sum_{j=1}^{k} alpha^2 * (1 + j * beta)^2)
+        โดย k คือจำนวนช่วงที่อยู่ระหว่างการอัปเดตล่าสุดกับเวลาที่พยากรณ์
+        """
+        k = max(0.0, (timestamp - self.last_time) / self.slot_seconds - 1)
+        growth = alpha * alpha * (k + beta * k * (k + 1) + beta * beta * k * (k + 1) * (2 * k + 1) / 6)
+        return math.sqrt(self.variance * (1 + growth))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data, season_slots):
+        state = cls(season_slots)
+        for name in cls.__slots__:
+            if name in data:
+                setattr(state, name, data[name])
+        if len(state.season) != season_slots or len(state.season_counts) != season_slots:
+            # จำนวนช่วงของวันเปลี่ยน เก็บ level/trend ไว้แต่เรียนรู้ seasonality ใหม่
+            state.season = [0.0] * season_slots
+            state.season_counts = [0] * season_slots
+            state.bucket_start = None
+            state.bucket_sum = 0.0
+            state.bucket_count = 0
+        return state
+
+class Forecaster:
+    """
+    คลาสสำหรับจัดการ Holt-Winters หลาย series พร้อมบันทึกสถานะลงไฟล์เพื่อใช้ต่อหลังรีสตาร์ท
+    """
+
+    def __init__(self, state_file=None, alpha=0.2, beta=0.02, gamma=0.1, season_slots=24,
+                 z=1.96, bounds=(0.0, 100.0), save_interval=300):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Forecaster
+
+        Args:
+            state_file (str, optional): ไฟล์ JSON สำหรับเก็บสถานะ (None คือไม่บันทึก)
+            alpha (float): smoothing ของ level ต่อหนึ่งช่วง
+            beta (float): smoothing ของ trend ต่อหนึ่งช่วง
+            gamma (float): smoothing ของ seasonality ต่อหนึ่งช่วง
+            season_slots (int): จำนวนช่วงของ seasonality ในหนึ่งวัน (24 คือรายชั่วโมง)
+            z (float): ค่า z ของช่วงความเชื่อมั่น (1.96 คือ 95%)
+            bounds (tuple): ขอบเขตของค่าพยากรณ์ (None คือไม่จำกัด)
+            save_interval (float): ระยะเวลาขั้นต่ำระหว่างการบันทึกสถานะ (วินาที)
+        """
+        self.state_file = state_file
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.season_slots = season_slots
+        self.z = z
+        self.bounds = bounds
+        self.save_interval = save_interval
+        self.series = {}
+        self.updates = 0
+        self.saved_updates = 0
+        self.saved_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """โหลดสถานะจากไฟล์ (ถ้ามี)"""
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"ไม่สามารถโหลดสถานะการพยากรณ์จาก {self.state_file}: {str(e)}")
+            return
+        if data.get("version") != STATE_VERSION:
+            logging.warning(f"ไม่รองรับสถานะการพยากรณ์เวอร์ชัน {data.get('version')} เริ่มต้นใหม่")
+            return
+        with self._lock:
+            self.series = {
+                name: HoltWinters.from_dict(state, self.season_slots)
+                for name, state in data.get("series", {}).items()
+            }
+
+    def save(self):
+        """บันทึกสถานะลงไฟล์ (เขียนไฟล์ชั่วคราวแล้ว rename เพื่อไม่ให้ไฟล์เสียถ้าหยุดกลางคัน)"""
+        if not self.state_file:
+            return
+        with self._lock:
+            data = {
+                "version": STATE_VERSION,
+                "saved_at": time.time(),
+                "series": {name: state.to_dict() for name, state in self.series.items()}
+            }
+            updates = self.updates
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(temp_file, self.state_file)
+        self.saved_updates = updates
+        self.saved_at = time.monotonic()
+
+    def maybe_save(self):
+        """บันทึกสถานะถ้ามีการอัปเดตและครบ save_interval แล้ว"""
+        if self.updates != self.saved_updates and time.monotonic() - self.saved_at >= self.save_interval:
+            self.save()
+
+    def update(self, name, value, timestamp=None):
+        """
+        เพิ่มตัวอย่างให้ series
+
+        Args:
+            name (str): ชื่อ series เช่น 'memory' หรือ 'disk:/var'
+            value (float): ค่าของตัวอย่าง
+            timestamp (float, optional): epoch time (ค่าเริ่มต้นคือเวลาปัจจุบัน)
+        """
+        if value is None:
+            return
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            state = self.series.get(name)
+            if state is None:
+                state = self.series[name] = HoltWinters(self.season_slots)
+            if state.add(timestamp, float(value), self.alpha, self.beta, self.gamma):
+                self.updates += 1
+
+    def version(self):
+        """เลขเวอร์ชันที่เปลี่ยนทุกครั้งที่มีการอัปเดต (ใช้เป็น cache key)"""
+        return self.updates
+
+    def _clamp(self, value):
+        if self.bounds is None:
+            return value
+        return max(self.bounds[0], min(self.bounds[1], value))
+
+    def _time_to_threshold(self, state, threshold, start, horizon, upper):
+        """
+        หาเวลาแรกที่ค่าพยากรณ์ (หรือขอบบนของช่วงความเชื่อมั่น) ถึง threshold ภายใน horizon
+
+        ภายในแต่ละช่วงของ seasonality ค่าพยากรณ์เป็นเส้นตรง จึงหาจุดตัดได้โดยตรง ส่วนขอบบนตรวจที่ต้นและปลายแต่ละช่วง
+        """
+        slot_seconds = 86400 / self.season_slots
+        end = start + horizon
+        segment_start = start
+        while segment_start < end:
+            segment_end = min(end, (math.floor(segment_start / slot_seconds) + 1) * slot_seconds)
+            if upper:
+                for ts in (segment_start, segment_end):
+                    if state.predict(ts) + self.z * state.stddev(ts, self.alpha, self.beta) >= threshold:
+                        return ts
+            else:
+                if state.predict(segment_start) >= threshold:
+                    return segment_start
+                if state.trend > 0:
+                    seasonal = state.season[state.slot(segment_start)]
+                    crossing = state.last_time + (threshold - state.level - seasonal) / state.trend
+                    if segment_start <= crossing <= segment_end:
+                        return crossing
+            segment_start = segment_end
+        return None
+
+    def forecast(self, name, horizon=30 * 86400, threshold=None, points=48):
+        """
+        พยากรณ์ค่าของ series
+
+        Args:
+            name (str): ชื่อ series
+            horizon (float): ระยะเวลาที่พยากรณ์ (วินาที)
+            threshold (float, optional): ค่าที่ต้องการประมาณเวลาที่จะถึง
+            points (int): จำนวนจุดของค่าพยากรณ์ที่ส่งกลับ
+
+        Returns:
+            dict: ค่าพยากรณ์พร้อมช่วงความเชื่อมั่นและเวลาที่จะถึง threshold หรือ None ถ้าไม่มี series นี้
+        """
+        with self._lock:
+            state = self.series.get(name)
+            if state is None:
+                return None
+            state = HoltWinters.from_dict(state.to_dict(), self.season_slots)
+
+        result = {
+            "series": name,
+            "samples": state.samples,
+            "last_value": state.last_value,
+            "last_update": state.last_time,
+            "level": round(state.level, 4),
+            "trend_per_day": round(state.trend * 86400, 4),
+            "residual_stddev": round(math.sqrt(state.variance), 4),
+            # ต้องมีข้อมูลอย่างน้อยหนึ่งวันก่อน seasonality จะมีความหมาย
+            "warming_up": state.updates < 2 or state.last_time - state.first_time < 86400,
+            "forecast": []
+        }
+        if state.updates < 2:
+            return result
+
+        step = horizon / points
+        for i in range(1, points + 1):
+            ts = state.last_time + i * step
+            value = state.predict(ts)
+            spread = self.z * state.stddev(ts, self.alpha, self.beta)
+            result["forecast"].append({
+                "timestamp": int(ts),
+                "value": round(self._clamp(value), 2),
+                "lower": round(self._clamp(value - spread), 2),
+                "upper": round(self._clamp(value + spread), 2)
+            })
+
+        if threshold is not None:
+            expected = self._time_to_threshold(state, threshold, state.last_time, horizon, upper=False)
+            earliest = self._time_to_threshold(state, threshold, state.last_time, horizon, upper=True)
+            result["threshold"] = threshold
+            result["time_to_threshold"] = {
+                # None หมายถึงไม่ถึง threshold ภายใน horizon
+                "expected_seconds": round(expected - state.last_time) if expected is not None else None,
+                "earliest_seconds": round(earliest - state.last_time) if earliest is not None else None,
+                "expected_at": int(expected) if expected is not None else None,
+                "earliest_at": int(earliest) if earliest is not None else None
+            }
+        return result
+
+    def names(self):
+        """ชื่อ series ทั้งหมด"""
+        with self._lock:
+            return sorted(self.series)
+
+if __name__ == "__main__":
+    # ตัวอย่าง: ดิสก์ที่เพิ่มขึ้นวันละ 1% พร้อมรูปแบบรายวันและ noise
+    import random
+
+    rng = random.Random(1)
+    forecaster = Forecaster()
+    start = 1_700_000_000
+    for i in range(14 * 1440):
+        ts = start + i * 60
+        daily = 3 * math.sin(2 * math.pi * (ts % 86400) / 86400)
+        forecaster.update("disk:/var", 60 + i / 1440 + daily + rng.gauss(0, 0.3), ts)
+
+    result = forecaster.forecast("disk:/var", horizon=60 * 86400, threshold=90)
+    print(f"level={result['level']} trend/day={result['trend_per_day']} stddev={result['residual_stddev']}")
+    print(f"ถึง 90% ในอีก {result['time_to_threshold']['expected_seconds'] / 86400:.1f} วัน "
+          f"(เร็วสุด {result['time_to_threshold']['earliest_seconds'] / 86400:.1f} วัน)")
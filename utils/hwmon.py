@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Hwmon Temperature Reader
+
+ใช้สำหรับอ่านอุณหภูมิจาก /sys/class/hwmon โดยค้นหา sensors เพียงครั้งเดียวและเปิดไฟล์ค้างไว้
+"""
+
+import errno
+import logging
+import os
+import re
+import threading
+
+_TEMP_INPUT = re.compile(r'^temp(\d+)_input$')
+
+def _read_text(path):
+    """อ่านไฟล์ sysfs เป็นข้อความ (None ถ้าอ่านไม่ได้)"""
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except (OSError, ValueError):
+        return None
+
+def _read_celsius(path):
+    """อ่านค่าอุณหภูมิ (millidegree) เป็นองศา Celsius"""
+    value = _read_text(path)
+    try:
+        return int(value) / 1000.0 if value else None
+    except ValueError:
+        return None
+
+class _Sensor:
+    """sensor หนึ่งตัวที่เปิดไฟล์ input ค้างไว้"""
+
+    __slots__ = ('chip', 'device', 'label', 'fd', 'high', 'critical')
+
+    def __init__(self, chip, device, label, fd, high, critical):
+        self.chip = chip
+        self.device = device
+        self.label = label
+        self.fd = fd
+        self.high = high
+        self.critical = critical
+
+class HwmonReader:
+    """
+    คลาสสำหรับอ่านอุณหภูมิจาก hwmon โดยอ่านเฉพาะ temp*_input ในแต่ละรอบ
+
+    ชื่อ label และค่า max/crit ถูกอ่านครั้งเดียวตอนค้นหา และจะค้นหาใหม่เมื่อมี hwmon device เพิ่มหรือหายไปเท่านั้น
+    รูปแบบผลลัพธ์เหมือนกับ psutil.sensors_temperatures() (ถ้าไม่มี hwmon จะใช้ /sys/class/thermal แทน)
+    """
+
+    def __init__(self, hwmon_path='/sys/class/hwmon', thermal_path='/sys/class/thermal'):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Hwmon Reader
+
+        Args:
+            hwmon_path (str): ตำแหน่งของ hwmon class directory
+            thermal_path (str): ตำแหน่งของ thermal class directory (ใช้เมื่อไม่มี hwmon)
+        """
+        self.hwmon_path = hwmon_path
+        self.thermal_path = thermal_path
+        self.sensors = []
+        self.devices = None
+        self.discoveries = 0
+        self._lock = threading.Lock()
+
+    def _list_devices(self):
+        """รายชื่อ hwmon และ thermal zone ที่มีอยู่ปัจจุบัน"""
+        devices = []
+        for path in (self.hwmon_path, self.thermal_path):
+            try:
+                devices.extend(os.path.join(path, name) for name in os.listdir(path))
+            except OSError:
+                pass
+        return frozenset(devices)
+
+    def _open(self, path):
+        """เปิดไฟล์ input ค้างไว้ (None ถ้าเปิดไม่ได้)"""
+        try:
+            return os.open(path, os.O_RDONLY)
+        except OSError:
+            return None
+
+    def _discover_hwmon(self):
+        """ค้นหา temp*_input ของทุก hwmon device พร้อม label และค่า max/crit"""
+        sensors = []
+        try:
+            names = sorted(os.listdir(self.hwmon_path))
+        except OSError:
+            return sensors
+
+        for name in names:
+            base = os.path.join(self.hwmon_path, name)
+            chip = _read_text(os.path.join(base, 'name')) or name
+            # driver เก่าบางตัววางไฟล์ไว้ใน device/ แทน
+            for directory in (base, os.path.join(base, 'device')):
+                try:
+                    entries = sorted(os.listdir(directory))
+                except OSError:
+                    continue
+                for entry in entries:
+                    match = _TEMP_INPUT.match(entry)
+                    if not match:
+                        continue
+                    prefix = os.path.join(directory, f"temp{match.group(1)}_")
+                    fd = self._open(prefix + 'input')
+                    if fd is None:
+                        continue
+                    sensors.append(_Sensor(
+                        chip,
+                        name,
+                        _read_text(prefix + 'label') or '',
+                        fd,
+                        _read_celsius(prefix + 'max'),
+                        _read_celsius(prefix + 'crit')
+                    ))
+        return sensors
+
+    def _discover_thermal(self):
+        """ค้นหา thermal zones (ใช้เมื่อไม่มี hwmon) พร้อม trip point แบบ high/critical"""
+        sensors = []
+        try:
+            names = sorted(name for name in os.listdir(self.thermal_path) if name.startswith('thermal_zone'))
+        except OSError:
+            return sensors
+
+        for name in names:
+            base = os.path.join(self.thermal_path, name)
+            fd = self._open(os.path.join(base, 'temp'))
+            if fd is None:
+                continue
+            high = critical = None
+            try:
+                entries = os.listdir(base)
+            except OSError:
+                entries = []
+            for entry in entries:
+                if not (entry.startswith('trip_point_') and entry.endswith('_type')):
+                    continue
+                trip_type = _read_text(os.path.join(base, entry))
+                trip_temp = _read_celsius(os.path.join(base, entry[:-len('type')] + 'temp'))
+                if trip_type == 'critical':
+                    critical = trip_temp
+                elif trip_type == 'high':
+                    high = trip_temp
+            sensors.append(_Sensor(_read_text(os.path.join(base, 'type')) or name, name, '', fd, high, critical))
+        return sensors
+
+    def _discover(self, devices):
+        """ปิดไฟล์เดิมและค้นหา sensors ใหม่"""
+        self.close()
+        sensors = self._discover_hwmon()
+        if not sensors:
+            sensors = self._discover_thermal()
+        self.sensors = sensors
+        self.devices = devices
+        self.discoveries += 1
+        logging.info(f"พบ temperature sensors {len(sensors)} ตัว")
+
+    def read(self):
+        """
+        อ่านอุณหภูมิปัจจุบันของทุก sensor
+
+        Returns:
+            dict: รายการ sensors แยกตาม chip ในรูปแบบ {"label", "device", "current", "high", "critical"}
+                (chip ที่ชื่อซ้ำกัน เช่น NVMe หลายตัว ถูกรวมไว้ใน list เดียวและแยกกันด้วย device เช่น 'hwmon2')
+        """
+        with self._lock:
+            devices = self._list_devices()
+            if devices != self.devices:
+                self._discover(devices)
+
+            temps = {}
+            stale = False
+            for sensor in self.sensors:
+                try:
+                    current = int(os.pread(sensor.fd, 32, 0)) / 1000.0
+                except ValueError:
+                    current = None
+                except OSError as e:
+                    # sensor บางตัวคืน ENODATA/EAGAIN ชั่วคราว ส่วน device ที่ถูกถอดต้องค้นหาใหม่
+                    current = None
+                    if e.errno in (errno.ENODEV, errno.ENOENT, errno.ENXIO):
+                        stale = True
+                temps.setdefault(sensor.chip, []).append({
+                    "label": sensor.label,
+                    "device": sensor.device,
+                    "current": current,
+                    "high": sensor.high,
+                    "critical": sensor.critical
+                })
+
+            if stale:
+                self.devices = None
+            return temps
+
+    def close(self):
+        """ปิดไฟล์ input ทั้งหมดที่เปิดค้างไว้"""
+        for sensor in self.sensors:
+            try:
+                os.close(sensor.fd)
+            except OSError:
+                pass
+        self.sensors = []
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - InfluxDB Analytics
+
+ใช้สำหรับคำนวณค่าเฉลี่ย, percentiles, ช่วงเวลาที่ใช้งานสูงสุด และแนวโน้มใน InfluxDB ด้วย Flux
+เพื่อให้ได้เฉพาะแถวที่ aggregate แล้วกลับมา แทนการโหลดข้อมูลดิบทั้งหมดเข้า Python
+"""
+
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# measurement และ field ของแต่ละเมตริก (ตรงกับที่ store_in_influxdb เขียนไว้)
+METRICS = {
+    "cpu": ("cpu_metrics", "cpu_percent"),
+    "memory": ("memory_metrics", "memory_percent"),
+    "swap": ("memory_metrics", "swap_percent"),
+    "disk": ("disk_metrics", "disk_percent")
+}
+
+_DURATION = re.compile(r'^(\d+)([mhdw])$')
+_UNIT_SECONDS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+def parse_duration(value):
+    """
+    แปลงช่วงเวลาแบบ Flux (เช่น '30m', '24h', '7d', '4w') เป็นวินาที
+
+    Raises:
+        ValueError: ถ้ารูปแบบไม่ถูกต้อง
+    """
+    match = _DURATION.match(value or "")
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"ช่วงเวลาไม่ถูกต้อง: {value}")
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+def flux_string(value):
+    """escape ข้อความเพื่อใช้เป็น string literal ใน Flux"""
+    escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('${', '\\${')
+    return f'"{escaped}"'
+
+class TTLCache:
+    """
+    cache ผลลัพธ์ของ query ที่หมดอายุตามเวลา (จำกัดจำนวน entry)
+    """
+
+    def __init__(self, ttl=300, max_entries=256):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ TTL Cache
+
+        Args:
+            ttl (float): อายุของผลลัพธ์ (วินาที)
+            max_entries (int): จำนวน entry สูงสุด
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """
+        ดึงผลลัพธ์จาก cache หรือเรียก build() ถ้ายังไม่มีหรือหมดอายุ
+
+        Args:
+            key: key ของผลลัพธ์
+            build (callable): ฟังก์ชันที่คืนค่าผลลัพธ์ใหม่
+
+        Returns:
+            object: ผลลัพธ์
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = build()
+
+        with self._lock:
+            if len(self.entries) >= self.max_entries:
+                # ลบ entry ที่หมดอายุก่อน ถ้ายังเต็มให้ลบตัวที่จะหมดอายุเร็วที่สุด
+                for stale in [k for k, (expires, _) in self.entries.items() if expires <= now]:
+                    del self.entries[stale]
+                if len(self.entries) >= self.max_entries:
+                    del self.entries[min(self.entries, key=lambda k: self.entries[k][0])]
+            self.entries[key] = (now + self.ttl, value)
+        return value
+
+    def stats(self):
+        """สถิติของ cache"""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "ttl": self.ttl}
+
+class InfluxAnalytics:
+    """
+    คลาสสำหรับสร้างและรัน Flux queries สำหรับการวิเคราะห์ข้อมูลระยะยาว
+
+    query_api ต้องมีเมธอด query(query, org=...) ที่คืนค่า list ของ tables ซึ่งแต่ละ table มี records
+    และแต่ละ record มี dict ชื่อ values (เหมือน QueryApi ของ influxdb_client) จึงใช้ stub แทนได้ในการทดสอบ
+    """
+
+    def __init__(self, query_api, bucket, org, ttl=300, time_bucket=60, location="UTC"):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ InfluxDB Analytics
+
+        Args:
+            query_api: QueryApi ของ influxdb_client หรือ object ที่มีเมธอด query() แบบเดียวกัน
+            bucket (str): ชื่อ bucket
+            org (str): ชื่อองค์กร
+            ttl (float): อายุของผลลัพธ์ใน cache (วินาที)
+            time_bucket (int): ความละเอียดของเวลาที่ใช้ใน cache key (วินาที)
+            location (str): timezone ที่ใช้คำนวณชั่วโมงของวัน เช่น 'Asia/Bangkok'
+        """
+        self.query_api = query_api
+        self.bucket = bucket
+        self.org = org
+        self.time_bucket = time_bucket
+        self.location = location
+        self.cache = TTLCache(ttl=ttl)
+
+    def _source(self, metric, range_seconds, host=None, mountpoint=None):
+        """ส่วนต้นของ query: เลือก bucket, ช่วงเวลา, measurement, field และ tags"""
+        if metric not in METRICS:
+            raise ValueError(f"ไม่รองรับเมตริก: {metric}")
+        measurement, field = METRICS[metric]
+        lines = [
+            f'from(bucket: {flux_string(self.bucket)})',
+            f'  |> range(start: -{range_seconds}s)',
+            f'  |> filter(fn: (r) => r._measurement == {flux_string(measurement)} and r._field == {flux_string(field)})'
+        ]
+        if host:
+            lines.append(f'  |> filter(fn: (r) => r.host == {flux_string(host)})')
+        if metric == "disk":
+            lines.append(f'  |> filter(fn: (r) => r.mountpoint == {flux_string(mountpoint or "/")})')
+        return lines
+
+    def _header(self):
+        """imports และ option location สำหรับฟังก์ชันที่ขึ้นกับ timezone"""
+        return [
+            'import "date"',
+            'import "timezone"',
+            f'option location = timezone.location(name: {flux_string(self.location)})',
+            ''
+        ]
+
+    def _run(self, query):
+        """รัน query (ผ่าน cache ตาม query และช่วงเวลาปัจจุบัน) และคืนค่า records เป็น list ของ dict"""
+        key = (query, int(time.time() // self.time_bucket))
+
+        def build():
+            started = time.perf_counter()
+            tables = self.query_api.query(query, org=self.org)
+            rows = [dict(record.values) for table in tables for record in table.records]
+            logging.debug(f"Flux query ใช้เวลา {time.perf_counter() - started:.3f}s ได้ {len(rows)} แถว")
+            return rows
+
+        return self.cache.get(key, build)
+
+    def get_average(self, metric='cpu', range_seconds=86400, host=None, mountpoint=None, hours=None):
+        """
+        ค่าเฉลี่ย ต่ำสุด และสูงสุดของเมตริกในช่วงเวลาที่กำหนด
+
+        Args:
+            metric (str): เมตริก ('cpu', 'memory', 'swap', 'disk')
+            range_seconds (int): ช่วงเวลาย้อนหลัง (วินาที)
+            host (str, optional): เลือกเฉพาะ host
+            mountpoint (str, optional): mountpoint ของเมตริก disk (ค่าเริ่มต้น '/')
+            hours (tuple, optional): (start, stop) ชั่วโมงของวันที่ต้องการ เช่น (9, 17) ด้วย hourSelection
+
+        Returns:
+            dict: mean, min, max และจำนวนตัวอย่าง
+        """
+        source = self._source(metric, range_seconds, host, mountpoint)
+        if hours is not None:
+            source.append(f'  |> hourSelection(start: {int(hours[0])}, stop: {int(hours[1])})')
+        source.append('  |> group()')
+        data = "\n".join(source)
+        query = "\n".join(self._header() + [
+            f'data = {data}',
+            '',
+            'union(tables: [',
+            '  data |> mean() |> set(key: "stat", value: "mean"),',
+            '  data |> min() |> set(key: "stat", value: "min"),',
+            '  data |> max() |> set(key: "stat", value: "max"),',
+            '  data |> count() |> toFloat() |> set(key: "stat", value: "count")',
+            '])',
+            '  |> keep(columns: ["stat", "_value"])'
+        ])
+        stats = {row["stat"]: row["_value"] for row in self._run(query)}
+        return {
+            "metric": metric,
+            "mean": stats.get("mean"),
+            "min": stats.get("min"),
+            "max": stats.get("max"),
+            "samples": int(stats["count"]) if stats.get("count") is not None else 0
+        }
+
+    def get_percentiles(self, metric='cpu', range_seconds=86400, host=None, mountpoint=None,
+                        quantiles=(0.5, 0.9, 0.95, 0.99)):
+        """
+        percentiles ของเมตริก (คำนวณด้วย quantile แบบ t-digest ใน InfluxDB)
+
+        Returns:
+            dict: ค่าแยกตาม percentile เช่น {"p50": 23.1, "p95": 71.4}
+        """
+        data = "\n".join(self._source(metric, range_seconds, host, mountpoint) + ['  |> group()'])
+        parts = ",\n".join(
+            f'  data |> quantile(q: {float(q)}, method: "estimate_tdigest") |> set(key: "q", value: "{float(q)}")'
+            for q in quantiles
+        )
+        query = "\n".join(self._header() + [f'data = {data}', '', 'union(tables: [', parts,
+            '])',
+            '  |> keep(columns: ["q", "_value"])'
+        ])
+        result = {}
+        for row in self._run(query):
+            label = f"p{float(row['q']) * 100:g}"
+            result[label] = row["_value"]
+        return {"metric": metric, "percentiles": result}
+
+    def get_series(self, metric='cpu', range_seconds=86400, every=3600, host=None, mountpoint=None, fn="mean"):
+        """
+        ค่าที่ aggregate แล้วตามช่วงเวลา (aggregateWindow)
+
+        Args:
+            every (int): ความกว้างของแต่ละช่วง (วินาที)
+            fn (str): ฟังก์ชัน aggregate ('mean', 'max', 'min')
+
+        Returns:
+            list: รายการ (epoch time, ค่า) เรียงตามเวลา
+        """
+        if fn not in ("mean", "max", "min"):
+            raise ValueError(f"ไม่รองรับฟังก์ชัน: {fn}")
+        query = "\n".join(self._header() + self._source(metric, range_seconds, host, mountpoint) + [
+            '  |> group()',
+            f'  |> aggregateWindow(every: {int(every)}s, fn: {fn}, createEmpty: false)',
+            '  |> keep(columns: ["_time", "_value"])'
+        ])
+        series = []
+        for row in self._run(query):
+            if row.get("_value") is None:
+                continue
+            ts = row["_time"]
+            series.append((ts.timestamp() if isinstance(ts, datetime) else float(ts), row["_value"]))
+        series.sort()
+        return series
+
+    def get_peak_usage_times(self, metric='cpu', range_seconds=7 * 86400, host=None, mountpoint=None):
+        """
+        ค่าเฉลี่ยแยกตามชั่วโมงของวัน (ตาม timezone ที่กำหนด)
+
+        Returns:
+            dict: 5 ชั่วโมงที่ใช้งานสูงสุดและชั่วโมงที่ใช้งานต่ำสุด (รูปแบบเดียวกับ DataProcessor)
+        """
+        query = "\n".join(self._header() + self._source(metric, range_seconds, host, mountpoint) + [
+            '  |> group()',
+            '  |> aggregateWindow(every: 1h, fn: mean, createEmpty: false)',
+            '  |> map(fn: (r) => ({_value: r._value, hour: date.hour(t: r._time)}))',
+            '  |> group(columns: ["hour"])',
+            '  |> mean()',
+            '  |> group()'
+        ])
+        hourly = sorted(
+            ((int(row["hour"]), row["_value"]) for row in self._run(query) if row.get("_value") is not None),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        if not hourly:
+            return {"error": "ไม่มีข้อมูลสำหรับการวิเคราะห์"}
+        return {
+            "metric": metric,
+            "peak_hours": [{"hour": hour, "average": round(avg, 2)} for hour, avg in hourly[:5]],
+            "lowest_hour": {"hour": hourly[-1][0], "average": round(hourly[-1][1], 2)}
+        }
+
+    def predict_usage_trend(self, metric='cpu', range_seconds=30 * 86400, days=7, host=None, mountpoint=None):
+        """
+        ทำนายแนวโน้มด้วย linear regression บนค่าเฉลี่ยรายชั่วโมงจาก InfluxDB
+
+        Returns:
+            dict: แนวโน้ม, slope (ต่อวินาที), R-squared และค่าทำนายรายวัน (รูปแบบเดียวกับ DataProcessor)
+        """
+        series = self.get_series(metric, range_seconds, 3600, host, mountpoint)
+        if len(series) < 2:
+            return {"error": "ข้อมูลไม่เพียงพอสำหรับการทำนาย"}
+
+        n = len(series)
+        # เลื่อนแกนเวลาให้เริ่มที่ 0 เพื่อลดความคลาดเคลื่อนของ floating point
+        origin = series[0][0]
+        xs = [ts - origin for ts, _ in series]
+        ys = [value for _, value in series]
+        mean_x = sum(xs) / n
+        mean_y = sum(ys) / n
+        sxx = sum((x - mean_x) ** 2 for x in xs)
+        if sxx == 0:
+            return {"error": "ข้อมูลไม่เพียงพอสำหรับการทำนาย"}
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sxx
+        intercept = mean_y - slope * mean_x
+
+        ss_total = sum((y - mean_y) ** 2 for y in ys)
+        ss_residual = sum((y - (slope * x + intercept)) ** 2 for x, y in zip(xs, ys))
+        r_squared = 1 - (ss_residual / ss_total) if ss_total != 0 else 0
+
+        last = xs[-1]
+        predictions = []
+        for i in range(1, days + 1):
+            future = last + i * 86400
+            prediction = max(0, min(100, slope * future + intercept))
+            predictions.append({
+                "date": datetime.fromtimestamp(origin + future).strftime('%Y-%m-%d'),
+                "prediction": round(prediction, 2)
+            })
+
+        return {
+            "metric": metric,
+            "current_value": ys[-1],
+            "trend": "increasing" if slope > 0.0001 else "decreasing" if slope < -0.0001 else "stable",
+            "slope": slope,
+            "r_squared": r_squared,
+            "samples": n,
+            "predictions": predictions
+        }
+
+if __name__ == "__main__":
+    # ตัวอย่างการใช้งานกับ query API จำลอง (แสดง Flux ที่สร้างขึ้น)
+    import random
+    from types import SimpleNamespace
+
+    class StubQueryApi:
+        def query(self, query, org=None):
+            print(query)
+            print("-" * 72)
+            now = datetime.now(timezone.utc)
+            if 'stat' in query:
+                rows = [{"stat": s, "_value": v} for s, v in (("mean", 42.0), ("min", 3.0), ("max", 97.0), ("count", 1440.0))]
+            elif 'quantile' in query:
+                rows = [{"q": q, "_value": random.uniform(20, 90)} for q in ("0.5", "0.9", "0.95", "0.99")]
+            elif 'date.hour' in query:
+                rows = [{"hour": h, "_value": random.uniform(10, 90)} for h in range(24)]
+            else:
+                rows = [{"_time": now - timedelta(hours=h), "_value": 40 + h * 0.01} for h in range(720)]
+            return [SimpleNamespace(records=[SimpleNamespace(values=row) for row in rows])]
+
+    analytics = InfluxAnalytics(StubQueryApi(), "system_metrics", "my-org", location="Asia/Bangkok")
+    print(analytics.get_average('cpu', parse_duration('7d'), hours=(9, 17)))
+    print(analytics.get_percentiles('memory', parse_duration('30d')))
+    print(analytics.get_peak_usage_times('cpu'))
+    print(analytics.predict_usage_trend('disk', mountpoint='/'))
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Line Protocol Encoder
+
+ใช้สำหรับแปลงข้อมูลหนึ่ง snapshot เป็น InfluxDB line protocol ในครั้งเดียว โดย cache ส่วนหัว
+(measurement และ tags ที่ escape แล้ว) ของแต่ละ series ไว้ ผลลัพธ์ตรงกับ Point.to_line_protocol() ทุก byte
+"""
+
+import math
+from datetime import datetime, timedelta, timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# ตาราง escape เดียวกับ influxdb_client
+_ESCAPE_MEASUREMENT = str.maketrans({',': r'\,', ' ': r'\ ', '\n': r'\n', '\t': r'\t', '\r': r'\r'})
+_ESCAPE_KEY = str.maketrans({',': r'\,', '=': r'\=', ' ': r'\ ', '\n': r'\n', '\t': r'\t', '\r': r'\r'})
+_ESCAPE_STRING = str.maketrans({'"': r'\"', '\\': r'\\'})
+
+def escape_tag_value(value):
+    """escape ค่า tag (ค่าที่ลงท้ายด้วย backslash ต้องเติมช่องว่างเหมือน client library)"""
+    escaped = str(value).translate(_ESCAPE_KEY)
+    if escaped.endswith('\\'):
+        escaped += ' '
+    return escaped
+
+def format_field_value(value):
+    """
+    แปลงค่า field เป็นข้อความ line protocol พร้อมตรวจสอบชนิดข้อมูล
+
+    Args:
+        value: float, int, bool หรือ str (ค่าจาก numpy จะถูกแปลงเป็นชนิดของ Python)
+
+    Returns:
+        str: ค่าในรูปแบบ line protocol หรือ None ถ้าต้องข้าม field นี้ (None, NaN, inf)
+
+    Raises:
+        ValueError: ถ้าชนิดข้อมูลไม่รองรับ
+    """
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        text = str(value)
+        return text[:-2] if text.endswith('.0') else text
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return f"{value}i"
+    if isinstance(value, str):
+        return f'"{value.translate(_ESCAPE_STRING)}"'
+    if hasattr(value, 'dtype') and hasattr(value, 'item'):
+        return format_field_value(value.item())
+    raise ValueError(f'Type: "{type(value)}" of field value is not supported.')
+
+def to_nanoseconds(timestamp):
+    """
+    แปลงเวลาเป็น epoch nanoseconds (int)
+
+    Args:
+        timestamp: datetime (ถ้าไม่มี timezone จะถือเป็น UTC) หรือ int ที่เป็น nanoseconds อยู่แล้ว
+
+    Returns:
+        int: epoch nanoseconds
+    """
+    if isinstance(timestamp, int):
+        return timestamp
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        delta = timestamp - EPOCH
+        return (delta.days * 86400 + delta.seconds) * 10 ** 9 + delta.microseconds * 1000
+    raise ValueError(f"ไม่รองรับ timestamp ชนิด {type(timestamp)}")
+
+class LineProtocolEncoder:
+    """
+    คลาสสำหรับสร้าง line protocol โดย cache ส่วนหัวของแต่ละ series และชื่อ field ที่ escape แล้ว
+    """
+
+    def __init__(self, max_series=10000):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Line Protocol Encoder
+
+        Args:
+            max_series (int): จำนวน series สูงสุดที่ cache ส่วนหัวไว้ (ล้าง cache เมื่อเกิน)
+        """
+        self.max_series = max_series
+        self._prefixes = {}
+        self._field_keys = {}
+
+    def prefix(self, measurement, tags):
+        """
+        ส่วนหัวของ series เช่น 'disk_metrics,host=web1,mountpoint=/ '
+
+        Args:
+            measurement (str): ชื่อ measurement
+            tags (tuple): คู่ (key, value) ของ tags
+
+        Returns:
+            str: measurement และ tags ที่ escape และเรียงตาม key แล้ว ตามด้วยช่องว่าง
+        """
+        key = (measurement, tags)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            parts = [str(measurement).translate(_ESCAPE_MEASUREMENT)]
+            for tag_key, tag_value in sorted(tags):
+                if tag_value is None:
+                    continue
+                escaped_key = str(tag_key).translate(_ESCAPE_KEY)
+                escaped_value = escape_tag_value(tag_value)
+                if escaped_key and escaped_value:
+                    parts.append(f"{escaped_key}={escaped_value}")
+            prefix = ",".join(parts) + " "
+            if len(self._prefixes) >= self.max_series:
+                self._prefixes.clear()
+            self._prefixes[key] = prefix
+        return prefix
+
+    def fields(self, fields):
+        """
+        แปลง fields เป็นข้อความ (เรียงตามชื่อ field และข้ามค่าที่เป็น None/NaN)
+
+        Args:
+            fields (dict): ชื่อ field และค่า
+
+        Returns:
+            str: fields ในรูปแบบ line protocol (ว่างถ้าไม่มี field ที่มีค่า)
+        """
+        parts = []
+        field_keys = self._field_keys
+        for name in sorted(fields):
+            text = format_field_value(fields[name])
+            if text is None:
+                continue
+            escaped = field_keys.get(name)
+            if escaped is None:
+                escaped = field_keys[name] = str(name).translate(_ESCAPE_KEY)
+            parts.append(f"{escaped}={text}")
+        return ",".join(parts)
+
+    def line(self, measurement, tags, fields, timestamp_ns=None):
+        """
+        สร้าง line protocol หนึ่งบรรทัด
+
+        Args:
+            measurement (str): ชื่อ measurement
+            tags (tuple): คู่ (key, value) ของ tags
+            fields (dict): ชื่อ field และค่า
+            timestamp_ns (int, optional): epoch nanoseconds
+
+        Returns:
+            str: line protocol หรือข้อความว่างถ้าไม่มี field ที่มีค่า
+        """
+        field_text = self.fields(fields)
+        if not field_text:
+            return ""
+        if timestamp_ns is None:
+            return f"{self.prefix(measurement, tags)}{field_text}"
+        return f"{self.prefix(measurement, tags)}{field_text} {timestamp_ns}"
+
+    def encode(self, points, timestamp=None):
+        """
+        แปลงหลาย points เป็น buffer เดียว (หนึ่งบรรทัดต่อ point)
+
+        Args:
+            points (iterable): รายการ (measurement, tags, fields)
+            timestamp: เวลาของทุก point (datetime หรือ epoch nanoseconds)
+
+        Returns:
+            str: line protocol ที่คั่นด้วย newline
+        """
+        timestamp_ns = to_nanoseconds(timestamp) if timestamp is not None else None
+        lines = []
+        for measurement, tags, fields in points:
+            line = self.line(measurement, tags, fields, timestamp_ns)
+            if line:
+                lines.append(line)
+        return "\n".join(lines)
+
+def verify_against_client(samples=2000, seed=42):
+    """
+    เปรียบเทียบผลลัพธ์กับ influxdb_client.Point.to_line_protocol() แบบสุ่ม
+
+    Returns:
+        int: จำนวนบรรทัดที่ตรวจสอบแล้ว
+
+    Raises:
+        AssertionError: ถ้าพบบรรทัดที่ไม่ตรงกัน
+    """
+    import random
+    import warnings
+    from influxdb_client import Point
+
+    # measurement ที่ขึ้นต้นด้วย '#' ทำให้ client เตือน SyntaxWarning ซึ่งไม่เกี่ยวกับการเปรียบเทียบ
+    warnings.simplefilter("ignore", SyntaxWarning)
+
+    rng = random.Random(seed)
+    specials = ['', ' ', ',', '=', '"', '\\', '\n', '\t', '\r', '#', 'ก', '/dev/sda1', 'a b', 'x\\']
+
+    def text():
+        return "".join(rng.choice(specials + ['cpu', 'eth0', '/', 'host-1']) for _ in range(rng.randint(0, 4)))
+
+    def value():
+        kind = rng.randint(0, 7)
+        if kind == 0:
+            return rng.uniform(-1e6, 1e6)
+        if kind == 1:
+            return float(rng.randint(-1000, 1000))
+        if kind == 2:
+            return rng.choice([float('nan'), float('inf'), 1e16, 1e-7, 0.1, -0.0])
+        if kind == 3:
+            return rng.randint(-2 ** 63, 2 ** 63 - 1)
+        if kind == 4:
+            return rng.choice([True, False])
+        if kind == 5:
+            return text()
+        return None
+
+    encoder = LineProtocolEncoder()
+    start = datetime(2020, 1, 1)
+    for _ in range(samples):
+        measurement = text() or "m"
+        tags = tuple((text() or "t", rng.choice([text(), None])) for _ in range(rng.randint(0, 3)))
+        tags = tuple(dict(tags).items())
+        fields = {text() or "f": value() for _ in range(rng.randint(1, 5))}
+        timestamp = start + timedelta(microseconds=rng.randint(0, 10 ** 15))
+        if rng.random() < 0.5:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+
+        point = Point(measurement).time(timestamp)
+        for tag_key, tag_value in tags:
+            point.tag(tag_key, tag_value)
+        for field_key, field_value in fields.items():
+            point.field(field_key, field_value)
+
+        expected = point.to_line_protocol()
+        actual = encoder.line(measurement, tags, fields, to_nanoseconds(timestamp))
+        assert actual == expected, f"ไม่ตรงกัน:\n  client:  {expected!r}\n  encoder: {actual!r}"
+    return samples
+
+if __name__ == "__main__":
+    # ตรวจสอบว่าผลลัพธ์ตรงกับ influxdb_client ทุก byte
+    print(f"ตรงกับ Point.to_line_protocol() ทั้งหมด {verify_against_client()} บรรทัด")
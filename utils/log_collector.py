@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Log Error Collector
+
+ใช้สำหรับนับสัญญาณข้อผิดพลาด (OOM kill, I/O error, segfault ฯลฯ) จาก syslog, kern.log หรือ journal ที่ export ไว้
+โดยอ่านเฉพาะส่วนที่เพิ่มขึ้นจาก offset ที่บันทึกไว้ ไม่อ่านข้อมูลเก่าซ้ำแม้ไฟล์จะมีขนาดหลาย GB
+"""
+
+import glob
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# รูปแบบข้อผิดพลาดเริ่มต้น (แต่ละ pattern ควรขึ้นต้นด้วยข้อความคงที่ re จะค้นหาได้เร็วกว่า pattern ที่ขึ้นต้นด้วย
+# character class หรือ alternation หลายเท่า จึงแยก alternation เป็นหลาย pattern แทน)
+DEFAULT_SIGNATURES = {
+    "oom_kill": [r"Out of memory: Kill"],
+    "io_error": [r"I/O error", r"critical medium error"],
+    "filesystem_error": [r"EXT4-fs error", r"XFS \(\S+\): (?:metadata I/O error|Corruption)", r"BTRFS (?:error|critical)"],
+    "segfault": [r"segfault at ", r"general protection fault"],
+    "hung_task": [r"blocked for more than \d+ seconds"],
+    "hardware_error": [r"Machine check events logged", r"\[Hardware Error\]"],
+    "service_failed": [r"\.service: Failed with result", r"\.service: Main process exited, code=(?:killed|dumped)"]
+}
+
+# ส่วนหัวของบรรทัด syslog แบบ RFC 3339 / short-iso หรือแบบ BSD (Oct 19 10:00:01) ตามด้วย host และ unit[pid]:
+_HEADER = re.compile(
+    rb'(?:(?P<iso>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\S*)|(?P<bsd>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}):\d{2}(?:\.\d+)?)'
+    rb' +\S+ +(?P<unit>[^\s:\[]+)'
+)
+
+# ข้อความของ systemd ที่ขึ้นต้นด้วยชื่อ unit (เช่น "nginx.service: Failed with result") นับเป็นของ unit นั้น
+_SYSTEMD_UNIT = re.compile(rb'([\w@.-]+\.(?:service|socket|mount|timer|scope|slice)): ')
+
+class _Source:
+    """ไฟล์ log หนึ่งไฟล์และรูปแบบของมัน"""
+
+    __slots__ = ('path', 'format')
+
+    def __init__(self, path, format='syslog'):
+        self.path = path
+        self.format = format
+
+class LogErrorCollector:
+    """
+    คลาสสำหรับติดตามไฟล์ log แบบ incremental และนับข้อผิดพลาดแยกตาม signature, unit และนาที
+
+    offset, inode และ device ของแต่ละไฟล์ถูกบันทึกลง state_file จึงอ่านต่อจากเดิมได้หลังรีสตาร์ท
+    ไฟล์ที่ไม่เคยเห็นมาก่อนจะเริ่มอ่านจากท้ายไฟล์ เมื่อ inode เปลี่ยน (logrotate) จะอ่านส่วนที่เหลือของไฟล์เดิม
+    จากชื่อที่ถูก rotate (เช่น syslog.1) ก่อนเริ่มอ่านไฟล์ใหม่ตั้งแต่ต้น และเมื่อไฟล์เล็กลง (copytruncate) จะเริ่มใหม่จากต้นไฟล์
+    """
+
+    def __init__(self, paths=('/var/log/syslog', '/var/log/kern.log'), state_file='logs/log_offsets.json',
+                 signatures=None, window_minutes=60, max_read_bytes=64 * 1024 ** 2, max_units=200):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Log Error Collector
+
+        Args:
+            paths (list): path ของไฟล์ log หรือ dict {"path": ..., "format": "syslog" | "journal-export"}
+            state_file (str): ไฟล์ที่ใช้บันทึก offset ของแต่ละไฟล์ (None คือไม่บันทึก)
+            signatures (dict, optional): ชื่อ signature และ regular expression หรือ list ของ regular expression
+                (เพิ่มหรือแทนที่ค่าเริ่มต้น)
+            window_minutes (int): จำนวนนาทีล่าสุดที่เก็บจำนวนรายนาทีไว้
+            max_read_bytes (int): จำนวน byte สูงสุดที่อ่านต่อไฟล์ต่อรอบ (ส่วนที่เหลืออ่านต่อในรอบถัดไป)
+            max_units (int): จำนวน unit สูงสุดที่แยกนับ (unit ที่เกินนับรวมเป็น 'other')
+        """
+        self.sources = [
+            _Source(path) if isinstance(path, str) else _Source(path["path"], path.get("format", "syslog"))
+            for path in paths
+        ]
+        self.state_file = state_file
+        self.window_minutes = window_minutes
+        self.max_read_bytes = max_read_bytes
+        self.max_units = max_units
+
+        patterns = dict(DEFAULT_SIGNATURES)
+        patterns.update(signatures or {})
+        # compile ครั้งเดียว แต่ละ pattern ค้นทั้ง chunk ในครั้งเดียว (ไม่ได้ทดสอบทีละบรรทัด)
+        self.signatures = [
+            (name, re.compile(pattern.encode()))
+            for name, items in patterns.items()
+            for pattern in ([items] if isinstance(items, str) else items)
+        ]
+
+        self.offsets = {}
+        self.minutes = {}
+        self.lifetime = Counter()
+        self.units = set()
+        self.bytes_read = 0
+        self._saved = None
+        # ป้องกันไม่ให้หลาย request อ่านจาก offset เดียวกัน (นับซ้ำ) และเขียน state file พร้อมกัน
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """โหลด offset ที่บันทึกไว้ (ถ้ามี)"""
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, 'r') as f:
+                self.offsets = json.load(f)
+            self._saved = json.dumps(self.offsets, sort_keys=True)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"ไม่สามารถโหลด offset ของ log จาก {self.state_file}: {str(e)}")
+
+    def save(self):
+        """บันทึก offset ลงไฟล์เมื่อมีการเปลี่ยนแปลง (เขียนไฟล์ชั่วคราวแล้ว rename)"""
+        if not self.state_file:
+            return
+        data = json.dumps(self.offsets, sort_keys=True)
+        if data == self._saved:
+            return
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, 'w') as f:
+            f.write(data)
+        os.replace(temp_file, self.state_file)
+        self._saved = data
+
+    def collect(self):
+        """
+        อ่านส่วนที่เพิ่มขึ้นของทุกไฟล์และนับข้อผิดพลาด
+
+        Returns:
+            dict: จำนวนข้อผิดพลาดในช่วง window_minutes, จำนวนรายนาที, จำนวนสะสม และสถานะของแต่ละไฟล์
+        """
+        with self._lock:
+            now = time.time()
+            files = {}
+            self.bytes_read = 0
+            for source in self.sources:
+                try:
+                    files[source.path] = self._collect_source(source, now)
+                except OSError as e:
+                    files[source.path] = {"error": str(e)}
+
+            cutoff = (int(now // 60) - self.window_minutes + 1) * 60
+            for minute in [minute for minute in self.minutes if minute < cutoff]:
+                del self.minutes[minute]
+
+            try:
+                self.save()
+            except OSError as e:
+                logging.error(f"ไม่สามารถบันทึก offset ของ log: {str(e)}")
+            return self.snapshot(files)
+
+    def _collect_source(self, source, now):
+        """อ่านไฟล์หนึ่งไฟล์ต่อจาก offset เดิม"""
+        path = source.path
+        state = self.offsets.get(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # ไฟล์ถูก rotate แต่ยังไม่ถูกสร้างใหม่ อ่านส่วนที่เหลือของไฟล์เดิม
+            if state is not None:
+                self._drain_rotated(source, state, now)
+            return {"error": "ไม่พบไฟล์"}
+
+        if state is None:
+            # ไฟล์ใหม่: เริ่มจากท้ายไฟล์ ไม่ parse ข้อมูลย้อนหลัง
+            state = self.offsets[path] = {"inode": stat.st_ino, "device": stat.st_dev, "offset": stat.st_size}
+        elif (state["inode"], state["device"]) != (stat.st_ino, stat.st_dev):
+            self._drain_rotated(source, state, now)
+            state = self.offsets[path] = {"inode": stat.st_ino, "device": stat.st_dev, "offset": 0}
+        elif stat.st_size < state["offset"]:
+            # copytruncate: ไฟล์ถูกตัดให้สั้นลง
+            state["offset"] = 0
+
+        if stat.st_size > state["offset"]:
+            with open(path, 'rb') as f:
+                state["offset"] += self._read_from(f, source, state["offset"], stat.st_size, now)
+
+        return {
+            "inode": state["inode"],
+            "offset": state["offset"],
+            "size": stat.st_size,
+            "lag_bytes": stat.st_size - state["offset"]
+        }
+
+    def _drain_rotated(self, source, state, now):
+        """หาไฟล์เดิม (inode เดิม) ที่ถูก rotate ไปเป็นชื่ออื่นแล้วอ่านส่วนที่เหลือ"""
+        for candidate in sorted(glob.glob(glob.escape(source.path) + '[.-]*')):
+            if candidate.endswith(('.gz', '.xz', '.bz2', '.zst')):
+                continue
+            try:
+                with open(candidate, 'rb') as f:
+                    stat = os.fstat(f.fileno())
+                    if (stat.st_ino, stat.st_dev) == (state["inode"], state["device"]):
+                        while stat.st_size > state["offset"]:
+                            state["offset"] += self._read_from(f, source, state["offset"], stat.st_size, now, final=True)
+                        return
+            except OSError:
+                continue
+
+    def _read_from(self, f, source, offset, size, now, final=False):
+        """
+        อ่านข้อมูลตั้งแต่ offset และนับข้อผิดพลาด
+
+        Returns:
+            int: จำนวน byte ที่ประมวลผลแล้ว (ถึงขอบบรรทัดหรือ record สุดท้ายที่สมบูรณ์)
+        """
+        f.seek(offset)
+        data = f.read(min(size - offset, self.max_read_bytes))
+        separator = b'\n\n' if source.format == 'journal-export' else b'\n'
+        end = data.rfind(separator)
+        if (final and offset + len(data) >= size) or (end < 0 and len(data) >= self.max_read_bytes):
+            # ส่วนท้ายของไฟล์ที่ถูก rotate แล้ว หรือ chunk เต็มแต่ไม่มีขอบบรรทัด
+            end = len(data)
+        elif end >= 0:
+            end += len(separator)
+        else:
+            return 0
+
+        chunk = data[:end]
+        self.bytes_read += len(chunk)
+        if source.format == 'journal-export':
+            self._count_journal(chunk, now)
+        else:
+            self._count_syslog(chunk, now)
+        return end
+
+    def _matches(self, chunk):
+        """
+        ค้นทุก pattern ใน chunk
+
+        Yields:
+            tuple: (ชื่อ signature, ตำแหน่งที่พบ)
+        """
+        for signature, pattern in self.signatures:
+            for match in pattern.finditer(chunk):
+                yield signature, match.start()
+
+    def _count_syslog(self, chunk, now):
+        """นับข้อผิดพลาดใน chunk ของ syslog (ค้นทั้ง chunk แล้ว parse เฉพาะบรรทัดที่ตรง)"""
+        seen = set()
+        for signature, position in self._matches(chunk):
+            start = chunk.rfind(b'\n', 0, position) + 1
+            # นับแต่ละ signature ไม่เกินหนึ่งครั้งต่อบรรทัด
+            if (signature, start) in seen:
+                continue
+            seen.add((signature, start))
+            end = chunk.find(b'\n', position)
+            line = chunk[start:end if end >= 0 else len(chunk)]
+
+            header = _HEADER.match(line)
+            if header:
+                minute = self._minute(header, now)
+                unit = header.group('unit')
+            else:
+                minute, unit = int(now // 60) * 60, b"unknown"
+            self._add(signature, unit, minute, line)
+
+    def _count_journal(self, chunk, now):
+        """นับข้อผิดพลาดใน chunk ของ journal export format (record คั่นด้วยบรรทัดว่าง parse เฉพาะ record ที่ตรง)"""
+        seen = set()
+        for signature, position in self._matches(chunk):
+            start = chunk.rfind(b'\n\n', 0, position)
+            start = start + 2 if start >= 0 else 0
+            if (signature, start) in seen:
+                continue
+            seen.add((signature, start))
+            end = chunk.find(b'\n\n', position)
+            for fields in _journal_records(chunk[start:end if end >= 0 else len(chunk)]):
+                message = fields.get(b'MESSAGE') or b''
+                # ข้อความที่ตรงต้องอยู่ใน MESSAGE ไม่ใช่ field อื่น
+                if not any(pattern.search(message) for name, pattern in self.signatures if name == signature):
+                    continue
+                if fields.get(b'_TRANSPORT') == b'kernel':
+                    unit = b'kernel'
+                else:
+                    unit = fields.get(b'_SYSTEMD_UNIT') or fields.get(b'SYSLOG_IDENTIFIER') or b'unknown'
+                try:
+                    minute = int(int(fields[b'__REALTIME_TIMESTAMP']) // 60000000) * 60
+                except (KeyError, ValueError):
+                    minute = int(now // 60) * 60
+                self._add(signature, unit, minute, message)
+
+    def _add(self, signature, unit, minute, text):
+        """เพิ่มจำนวนของ signature และ unit ในนาทีที่ระบุ"""
+        named = _SYSTEMD_UNIT.search(text)
+        if named is not None:
+            unit = named.group(1)
+        unit = unit.decode(errors='replace')
+        if unit not in self.units:
+            if len(self.units) >= self.max_units:
+                unit = "other"
+            self.units.add(unit)
+        key = (signature, unit)
+        self.minutes.setdefault(minute, Counter())[key] += 1
+        self.lifetime[key] += 1
+
+    @staticmethod
+    def _minute(header, now):
+        """epoch time ของต้นนาทีจากส่วนหัวของบรรทัด"""
+        iso = header.group('iso')
+        if iso:
+            try:
+                return int(datetime.fromisoformat(iso.decode()).timestamp() // 60) * 60
+            except ValueError:
+                return int(datetime.strptime(iso[:16].decode(), '%Y-%m-%dT%H:%M').timestamp())
+        # รูปแบบ BSD ไม่มีปี ใช้ปีปัจจุบัน (หรือปีก่อนถ้าได้เวลาในอนาคต เช่นอ่าน log เดือนธันวาคมในเดือนมกราคม)
+        parsed = datetime.strptime(header.group('bsd').decode(), '%b %d %H:%M')
+        year = datetime.fromtimestamp(now).year
+        value = parsed.replace(year=year).timestamp()
+        if value > now + 86400:
+            value = parsed.replace(year=year - 1).timestamp()
+        return int(value)
+
+    def snapshot(self, files=None):
+        """
+        สรุปจำนวนข้อผิดพลาด
+
+        Args:
+            files (dict, optional): สถานะของแต่ละไฟล์จากรอบล่าสุด
+
+        Returns:
+            dict: totals (ในช่วง window_minutes), per_minute, lifetime (สะสมตั้งแต่เริ่มโปรแกรม) และ files
+        """
+        totals = Counter()
+        per_minute = []
+        for minute in sorted(self.minutes):
+            counts = self.minutes[minute]
+            totals.update(counts)
+            per_minute.append({
+                "minute": datetime.fromtimestamp(minute).isoformat(),
+                "counts": _nest(counts)
+            })
+        return {
+            "window_minutes": self.window_minutes,
+            "totals": _nest(totals),
+            "per_minute": per_minute,
+            "lifetime": _nest(self.lifetime),
+            "bytes_read": self.bytes_read,
+            "files": files or {}
+        }
+
+def _nest(counts):
+    """แปลง Counter ที่มี key เป็น (signature, unit) เป็น dict ซ้อน {signature: {unit: count}}"""
+    nested = {}
+    for (signature, unit), count in sorted(counts.items()):
+        nested.setdefault(signature, {})[unit] = count
+    return nested
+
+def _journal_records(chunk):
+    """
+    แยก record ของ journal export format
+
+    field แบบข้อความอยู่ในรูป NAME=value ส่วน field แบบ binary คือ NAME ตามด้วยความยาว 64 bit (little endian) และข้อมูล
+
+    Yields:
+        dict: ชื่อ field (bytes) และค่า (bytes)
+    """
+    fields = {}
+    position = 0
+    length = len(chunk)
+    while position < length:
+        end = chunk.find(b'\n', position)
+        if end < 0:
+            end = length
+        if end == position:
+            if fields:
+                yield fields
+                fields = {}
+            position = end + 1
+            continue
+        line = chunk[position:end]
+        separator = line.find(b'=')
+        if separator >= 0:
+            fields[line[:separator]] = line[separator + 1:]
+            position = end + 1
+        else:
+            if end + 9 > length:
+                break
+            size = struct.unpack_from('<Q', chunk, end + 1)[0]
+            fields[line] = chunk[end + 9:end + 9 + size]
+            position = end + 9 + size + 1
+    if fields:
+        yield fields
+
+if __name__ == '__main__':
+    # ตัวอย่าง: python -m utils.log_collector /var/log/syslog (อ่านทั้งไฟล์หนึ่งครั้งเพื่อวัดความเร็ว)
+    import sys
+
+    paths = sys.argv[1:] or ['/var/log/syslog']
+    collector = LogErrorCollector(paths, state_file=None, max_read_bytes=1 << 40)
+    for path in paths:
+        collector.offsets[path] = {"inode": os.stat(path).st_ino, "device": os.stat(path).st_dev, "offset": 0}
+    started = time.perf_counter()
+    result = collector.collect()
+    elapsed = time.perf_counter() - started
+    print(f"อ่าน {result['bytes_read'] / 1024 ** 2:.1f} MiB ใน {elapsed:.2f} วินาที "
+          f"({result['bytes_read'] / 1024 ** 2 / max(elapsed, 1e-9):.0f} MiB/s)")
+    print(json.dumps(result["lifetime"], indent=2, ensure_ascii=False))
@@ -0,0 +1,685 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Collector Plugins
+
+ใช้สำหรับโหลด collector เพิ่มเติมจากไดเรกทอรี plugins/ หรือ entry point ของ package ที่ติดตั้งไว้
+แต่ละ plugin ทำงานใน process แยก (nice และจำกัดหน่วยความจำ) จึงไม่แย่ง GIL หรือทำให้ endpoint หลักช้าลง
+เวลา CPU และเวลาจริงของทุกรอบถูกวัดแยกต่อ plugin plugin ที่ใช้เกิน budget จะถูกขยายรอบเวลา
+และถูกปิดการทำงานถ้ายังเกิน budget, timeout หรือ crash ติดต่อกันหลายครั้ง
+"""
+
+import json
+import logging
+import math
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+# กลุ่ม entry point ที่ package อื่นใช้ลงทะเบียน plugin เช่น
+# [project.entry-points."ubuntu_health_monitor.collectors"] nginx = "mypackage.nginx:NginxPlugin"
+ENTRY_POINT_GROUP = "ubuntu_health_monitor.collectors"
+
+# ชนิดของ field ที่รองรับใน schema (bool ไม่ถูกนับเป็นตัวเลข)
+FIELD_TYPES = {"float": (int, float), "int": (int,), "bool": (bool,), "str": (str,)}
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class CollectorPlugin:
+    """
+    คลาสพื้นฐานของ collector plugin
+
+    ชื่อของ plugin คือชื่อไฟล์ (ไม่รวม .py) หรือชื่อ entry point ตัวอย่าง:
+
+        class QueuePlugin(CollectorPlugin):
+            schema = {"depth": "int", "oldest_seconds": "float"}
+            interval = 30
+            influxdb = {"measurement": "queue_metrics", "tag": "queue"}
+            thresholds = {"depth": {"max": 1000}}
+
+            def collect(self):
+                return {"emails": {"depth": 12, "oldest_seconds": 3.5}}
+
+    Attributes:
+        schema (dict): ชื่อ field และชนิด ('float', 'int', 'bool', 'str') field ที่ไม่อยู่ใน schema ถูกตัดออก
+        interval (float): รอบเวลาปกติ (วินาที)
+        jitter (float): สัดส่วนการสุ่มเลื่อนรอบเวลา
+        cpu_budget (float): เวลา CPU สูงสุดต่อรอบ (วินาที)
+        wall_budget (float): เวลาจริงสูงสุดต่อรอบ (วินาที)
+        timeout (float): เวลาจริงที่รอได้ก่อน process ของ plugin ถูก kill และเริ่มใหม่
+        influxdb (dict, optional): {"measurement": ..., "tag": ...} ถ้ามี tag ผลลัพธ์คือ {ค่า tag: {field: ค่า}}
+            ถ้าไม่มี tag ผลลัพธ์คือ {field: ค่า}
+        thresholds (dict): ชื่อ field และ {"max": ...} หรือ {"min": ...} สำหรับการแจ้งเตือน
+    """
+
+    schema = {}
+    interval = 10
+    jitter = 0.1
+    cpu_budget = 0.1
+    wall_budget = 1.0
+    timeout = 5.0
+    influxdb = None
+    thresholds = {}
+
+    def setup(self, config):
+        """
+        เตรียม plugin ก่อนรอบแรก (เช่นเปิดไฟล์หรือ connection)
+
+        Args:
+            config (dict): ค่า config ของ plugin จาก settings.json (plugins.overrides.<name>.config)
+        """
+        self.config = config
+
+    def collect(self):
+        """
+        เก็บข้อมูลหนึ่งรอบ
+
+        Returns:
+            dict: ข้อมูลตาม schema (หรือ {ค่า tag: {field: ค่า}} ถ้า influxdb มี tag)
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def metadata(cls):
+        """ค่าที่ process หลักใช้จัดรอบเวลา, ตรวจ schema และแปลงเป็น InfluxDB/การแจ้งเตือน"""
+        return {
+            "schema": dict(cls.schema),
+            "interval": cls.interval,
+            "jitter": cls.jitter,
+            "cpu_budget": cls.cpu_budget,
+            "wall_budget": cls.wall_budget,
+            "timeout": cls.timeout,
+            "influxdb": dict(cls.influxdb) if cls.influxdb else None,
+            "thresholds": {field: dict(limits) for field, limits in cls.thresholds.items()},
+            "description": (cls.__doc__ or "").strip().split("\n")[0]
+        }
+
+def discover(directory='plugins', entry_points=True):
+    """
+    หา plugin จากไดเรกทอรีและ entry point โดยไม่ import code ของ plugin ใน process หลัก
+
+    Args:
+        directory (str): ไดเรกทอรีของไฟล์ plugin (*.py ที่ไม่ขึ้นต้นด้วย _)
+        entry_points (bool): ค้นหา entry point กลุ่ม ENTRY_POINT_GROUP ด้วยหรือไม่
+
+    Returns:
+        dict: ชื่อ plugin และแหล่งที่มา {"kind": "file", "path": ...} หรือ {"kind": "entry_point", "value": ...}
+    """
+    sources = {}
+    if directory and os.path.isdir(directory):
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith('.py') and not filename.startswith('_'):
+                sources[filename[:-3]] = {"kind": "file", "path": os.path.abspath(os.path.join(directory, filename))}
+
+    if entry_points:
+        try:
+            from importlib.metadata import entry_points as find_entry_points
+            found = find_entry_points()
+            group = found.select(group=ENTRY_POINT_GROUP) if hasattr(found, 'select') else found.get(ENTRY_POINT_GROUP, [])
+        except Exception as e:
+            logging.error(f"ไม่สามารถค้นหา entry point ของ plugin: {str(e)}")
+            group = []
+        for entry_point in group:
+            if entry_point.name in sources:
+                logging.warning(f"plugin {entry_point.name} มีทั้งไฟล์และ entry point ใช้ไฟล์ใน {directory}")
+                continue
+            sources[entry_point.name] = {"kind": "entry_point", "value": entry_point.value}
+    return sources
+
+def load_plugin_class(source):
+    """
+    import คลาสของ plugin (เรียกใน process ของ plugin เท่านั้น)
+
+    ไฟล์ต้องมี subclass ของ CollectorPlugin หนึ่งคลาส หรือกำหนด PLUGIN = คลาส
+
+    Returns:
+        type: คลาสของ plugin
+    """
+    import importlib
+    import importlib.util
+
+    if source["kind"] == "entry_point":
+        module_name, _, attribute = source["value"].partition(':')
+        plugin = importlib.import_module(module_name.strip())
+        for part in attribute.strip().split('.') if attribute else ():
+            plugin = getattr(plugin, part)
+        return plugin
+
+    name = os.path.splitext(os.path.basename(source["path"]))[0]
+    spec = importlib.util.spec_from_file_location(f"health_monitor_plugin_{name}", source["path"])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if hasattr(module, 'PLUGIN'):
+        return module.PLUGIN
+    classes = [
+        value for value in vars(module).values()
+        if isinstance(value, type) and issubclass(value, CollectorPlugin) and value is not CollectorPlugin
+        and value.__module__ == module.__name__
+    ]
+    if len(classes) != 1:
+        raise ValueError(f"ไฟล์ต้องมี subclass ของ CollectorPlugin หนึ่งคลาส (พบ {len(classes)})")
+    return classes[0]
+
+def validate(data, schema, rows=False):
+    """
+    ตรวจผลลัพธ์ของ plugin กับ schema
+
+    Args:
+        data: ผลลัพธ์จาก collect()
+        schema (dict): ชื่อ field และชนิด
+        rows (bool): ผลลัพธ์เป็น {ค่า tag: {field: ค่า}}
+
+    Returns:
+        tuple: (ข้อมูลที่ผ่านการตรวจ, จำนวน field ที่ถูกตัดออก)
+    """
+    def clean(fields):
+        kept = {}
+        dropped = 0
+        if not isinstance(fields, dict):
+            return kept, 1
+        for field, value in fields.items():
+            kind = schema.get(field)
+            if value is None or kind not in FIELD_TYPES or isinstance(value, bool) != (kind == "bool") or \
+                    not isinstance(value, FIELD_TYPES[kind]) or (isinstance(value, float) and not math.isfinite(value)):
+                dropped += 1
+                continue
+            kept[field] = value
+        return kept, dropped
+
+    if not rows:
+        return clean(data)
+    if not isinstance(data, dict):
+        return {}, 1
+    result = {}
+    dropped = 0
+    for key, fields in data.items():
+        result[str(key)], extra = clean(fields)
+        dropped += extra
+    return result, dropped
+
+def _field_value(value, kind):
+    """แปลงค่าให้ตรงกับชนิดใน schema (field แบบ float ต้องไม่ถูกเขียนเป็น integer)"""
+    if kind == "float":
+        return float(value)
+    return value
+
+def plugin_points(plugins, host_tags):
+    """
+    แปลงผลของ plugins ใน snapshot เป็น points สำหรับ InfluxDB
+
+    Args:
+        plugins (dict): section "plugins" ของ snapshot
+        host_tags (tuple): tags ของ host เช่น (("host", "web1"),)
+
+    Returns:
+        list: รายการ (measurement, tags, fields)
+    """
+    points = []
+    for name, plugin in plugins.items():
+        mapping = plugin.get("influxdb")
+        data = plugin.get("data")
+        if not mapping or not data:
+            continue
+        schema = plugin.get("schema") or {}
+        measurement = mapping.get("measurement") or name
+        tag = mapping.get("tag")
+        rows = data.items() if tag else ((None, data),)
+        for key, fields in rows:
+            fields = {field: _field_value(value, schema.get(field)) for field, value in fields.items()}
+            if fields:
+                points.append((measurement, host_tags + (((tag, key),) if tag else ()), fields))
+    return points
+
+def plugin_alerts(plugins):
+    """
+    ตรวจ thresholds ของ plugins ใน snapshot
+
+    Args:
+        plugins (dict): section "plugins" ของ snapshot
+
+    Returns:
+        list: ข้อความแจ้งเตือน
+    """
+    alerts = []
+    for name, plugin in plugins.items():
+        data = plugin.get("data")
+        thresholds = plugin.get("thresholds")
+        if not data or not thresholds:
+            continue
+        tag = (plugin.get("influxdb") or {}).get("tag")
+        rows = data.items() if tag else ((None, data),)
+        for key, fields in rows:
+            label = f"{name} {key}" if tag else name
+            for field, limits in thresholds.items():
+                value = fields.get(field)
+                if value is None or isinstance(value, (bool, str)):
+                    continue
+                if limits.get("max") is not None and value > limits["max"]:
+                    alerts.append(f"⚠️ {label} {field} is high: {value} (threshold: {limits['max']})")
+                if limits.get("min") is not None and value < limits["min"]:
+                    alerts.append(f"⚠️ {label} {field} is low: {value} (threshold: {limits['min']})")
+    return alerts
+
+class _PluginState:
+    """สถานะของ plugin หนึ่งตัว"""
+
+    def __init__(self, name, source, overrides):
+        self.name = name
+        self.source = source
+        self.overrides = overrides
+        self.meta = None
+        self.status = "starting"
+        self.reason = None
+        self.process = None
+        self.replies = None
+        self.effective_interval = None
+        self.result = None
+        self.collected_at = None
+        self.runs = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.dropped_fields = 0
+        self.strikes = 0
+        self.last_error = None
+        self.last_cpu = None
+        self.last_wall = None
+        self.avg_cpu = None
+        self.avg_wall = None
+        self.cpu_total = 0.0
+        self.wall_total = 0.0
+        self.wake = threading.Event()
+        self.lock = threading.Lock()
+
+class PluginManager:
+    """
+    คลาสสำหรับรัน collector plugins แต่ละตัวใน process แยก และคุม budget ของแต่ละตัว
+
+    process หลักเพียงส่งคำสั่งและรอผลลัพธ์ (ไม่ใช้ CPU ระหว่างที่ plugin ทำงาน) ผลลัพธ์ล่าสุดถูก cache ไว้
+    endpoint ต่างๆ จึงไม่เคยรอ plugin
+    """
+
+    def __init__(self, directory='plugins', entry_points=True, overrides=None, thresholds=None, nice=10,
+                 max_memory_mb=1024, disable_after=3, max_slowdown=10, max_result_bytes=1024 * 1024,
+                 start_timeout=10, log_file='logs/plugins.log', smoothing=0.3):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Plugin Manager
+
+        Args:
+            directory (str): ไดเรกทอรีของไฟล์ plugin
+            entry_points (bool): โหลด plugin จาก entry point ด้วยหรือไม่
+            overrides (dict, optional): ค่าที่แทนที่ของแต่ละ plugin เช่น
+                {"queue": {"interval": 60, "cpu_budget": 0.5, "enabled": false, "config": {...}}}
+            thresholds (dict, optional): thresholds ที่แทนที่ค่าของ plugin {"queue": {"depth": {"max": 500}}}
+            nice (int): ค่า nice ของ process ของ plugin (ลดลำดับความสำคัญเทียบกับ process หลัก)
+            max_memory_mb (int): หน่วยความจำสูงสุดของ process ของ plugin (None คือไม่จำกัด)
+            disable_after (int): จำนวนครั้งติดต่อกันที่เกิน budget (ที่รอบเวลาสูงสุด), timeout หรือ crash ก่อนถูกปิด
+            max_slowdown (float): รอบเวลาสูงสุดเมื่อถูกขยาย (เท่าของ interval)
+            max_result_bytes (int): ขนาดสูงสุดของผลลัพธ์ต่อรอบ (JSON)
+            start_timeout (float): เวลาที่รอให้ plugin โหลดและ setup เสร็จ (วินาที)
+            log_file (str): ไฟล์ที่เก็บ stdout/stderr ของ plugin (None คือทิ้ง)
+            smoothing (float): น้ำหนักของค่าล่าสุดใน moving average ของเวลาที่ใช้
+        """
+        self.directory = directory
+        self.entry_points = entry_points
+        self.overrides = overrides or {}
+        self.thresholds = thresholds or {}
+        self.nice = nice
+        self.max_memory_mb = max_memory_mb
+        self.disable_after = disable_after
+        self.max_slowdown = max_slowdown
+        self.max_result_bytes = max_result_bytes
+        self.start_timeout = start_timeout
+        self.log_file = log_file
+        self.smoothing = smoothing
+        self.plugins = {}
+        self.running = False
+        self._version = 0
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """ค้นหา plugin และเริ่ม thread ควบคุมของแต่ละตัว"""
+        if self.running:
+            return
+        self._stop.clear()
+        for name, source in discover(self.directory, self.entry_points).items():
+            overrides = self.overrides.get(name, {})
+            state = _PluginState(name, source, overrides)
+            self.plugins[name] = state
+            if overrides.get("enabled", True) is False:
+                state.status, state.reason = "disabled", "ปิดใน settings"
+                continue
+            thread = threading.Thread(target=self._loop, args=(state,), name=f"plugin-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.running = True
+        if self.plugins:
+            logging.info(f"พบ plugin {len(self.plugins)} ตัว: {', '.join(sorted(self.plugins))}")
+
+    def stop(self):
+        """หยุดทุก plugin และปิด process"""
+        self._stop.set()
+        for state in self.plugins.values():
+            state.wake.set()
+            self._kill(state)
+        self.running = False
+        self._threads = []
+
+    def enable(self, name):
+        """
+        เปิด plugin ที่ถูกปิดเพราะเกิน budget อีกครั้ง (เริ่มจากรอบเวลาปกติ)
+
+        Returns:
+            bool: False ถ้าไม่พบ plugin
+        """
+        state = self.plugins.get(name)
+        if state is None:
+            return False
+        with state.lock:
+            was_disabled = state.status == "disabled"
+            state.strikes = 0
+            state.effective_interval = None
+            if was_disabled:
+                state.status, state.reason = "starting", None
+        if was_disabled and not self._stop.is_set():
+            thread = threading.Thread(target=self._loop, args=(state,), name=f"plugin-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return True
+
+    def _spawn(self, state):
+        """เริ่ม process ของ plugin และรอ metadata"""
+        config = {
+            "source": state.source,
+            "config": state.overrides.get("config", {}),
+            "nice": self.nice,
+            "max_memory_mb": self.max_memory_mb
+        }
+        log = open(self.log_file, 'ab') if self.log_file else subprocess.DEVNULL
+        try:
+            state.process = subprocess.Popen(
+                [sys.executable, "-m", "utils.plugins", json.dumps(config)],
+                cwd=ROOT_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=log, close_fds=True
+            )
+        finally:
+            if log is not subprocess.DEVNULL:
+                log.close()
+        state.replies = queue.Queue()
+        reader = threading.Thread(target=self._read_replies, args=(state.process, state.replies),
+                                  name=f"plugin-{state.name}-reader", daemon=True)
+        reader.start()
+
+        reply = self._reply(state, self.start_timeout)
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error", "โหลด plugin ไม่สำเร็จ"))
+        meta = reply["meta"]
+        for key in ("interval", "jitter", "cpu_budget", "wall_budget", "timeout"):
+            if key in state.overrides:
+                meta[key] = state.overrides[key]
+        meta["thresholds"].update(self.thresholds.get(state.name, {}))
+        with state.lock:
+            state.meta = meta
+            if state.effective_interval is None:
+                state.effective_interval = meta["interval"]
+            state.status = "running"
+
+    def _read_replies(self, process, replies):
+        """อ่านผลลัพธ์ทีละบรรทัดจาก stdout ของ plugin (บรรทัดที่ยาวเกิน max_result_bytes ถูกแทนด้วย error)"""
+        stream = process.stdout
+        while True:
+            line = stream.readline(self.max_result_bytes + 1)
+            if not line:
+                replies.put(None)
+                return
+            if not line.endswith(b'\n'):
+                # ข้ามส่วนที่เหลือของบรรทัดที่ยาวเกิน
+                while line and not line.endswith(b'\n'):
+                    line = stream.readline(self.max_result_bytes + 1)
+                replies.put({"ok": False, "error": f"ผลลัพธ์ใหญ่เกิน {self.max_result_bytes} bytes"})
+                continue
+            try:
+                replies.put(json.loads(line))
+            except ValueError:
+                replies.put({"ok": False, "error": "ผลลัพธ์ไม่ใช่ JSON"})
+
+    def _reply(self, state, timeout):
+        """
+        รอผลลัพธ์จาก process ของ plugin
+
+        Raises:
+            TimeoutError: ถ้าไม่ได้ผลลัพธ์ภายใน timeout
+            RuntimeError: ถ้า process จบการทำงาน
+        """
+        try:
+            reply = state.replies.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"ไม่ได้ผลลัพธ์ภายใน {timeout}s")
+        if reply is None:
+            code = state.process.wait()
+            raise RuntimeError(f"process ของ plugin จบการทำงาน (exit code {code})")
+        return reply
+
+    def _kill(self, state):
+        """ปิด process ของ plugin (kill ถ้าไม่จบภายในเวลาสั้นๆ)"""
+        process, state.process = state.process, None
+        if process is None or process.poll() is not None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=0.5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def _collect(self, state):
+        """รัน plugin หนึ่งรอบ"""
+        if state.process is None or state.process.poll() is not None:
+            if state.runs:
+                state.restarts += 1
+            self._spawn(state)
+        started = time.perf_counter()
+        state.process.stdin.write(b'{"cmd": "collect"}\n')
+        state.process.stdin.flush()
+        reply = self._reply(state, state.meta["timeout"])
+        wall = time.perf_counter() - started
+        if not reply.get("ok"):
+            return None, reply.get("cpu", 0.0), wall, reply.get("error", "unknown error")
+        return reply["data"], reply["cpu"], wall, None
+
+    def _loop(self, state):
+        """รัน plugin ตามรอบเวลาจนกว่าจะหยุดหรือถูกปิด"""
+        while not self._stop.is_set():
+            started = time.monotonic()
+            error = None
+            data = None
+            cpu = wall = 0.0
+            try:
+                data, cpu, wall, error = self._collect(state)
+            except TimeoutError as e:
+                error = str(e)
+                state.timeouts += 1
+                self._kill(state)
+                wall = state.meta["timeout"] if state.meta else self.start_timeout
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                self._kill(state)
+
+            if state.meta is None:
+                # โหลดไม่สำเร็จ: นับเป็น strike และลองใหม่หลังรอ
+                self._account(state, None, 0.0, wall, error, crashed=True)
+            else:
+                self._account(state, data, cpu, wall, error, crashed=error is not None and state.process is None)
+
+            if state.status == "disabled":
+                self._kill(state)
+                return
+            interval = state.effective_interval or self.start_timeout
+            jitter = state.meta["jitter"] if state.meta else 0
+            if jitter:
+                interval *= 1 + random.uniform(-jitter, jitter)
+            state.wake.wait(max(0, interval - (time.monotonic() - started)))
+
+    def _account(self, state, data, cpu, wall, error, crashed=False):
+        """บันทึกเวลา CPU/เวลาจริง และขยายรอบเวลาหรือปิด plugin ที่เกิน budget"""
+        meta = state.meta
+        with state.lock:
+            state.runs += 1
+            state.last_cpu, state.last_wall = cpu, wall
+            state.cpu_total += cpu
+            state.wall_total += wall
+            state.avg_cpu = cpu if state.avg_cpu is None else state.avg_cpu + self.smoothing * (cpu - state.avg_cpu)
+            state.avg_wall = wall if state.avg_wall is None else state.avg_wall + self.smoothing * (wall - state.avg_wall)
+
+            if error is None:
+                clean, dropped = validate(data, meta["schema"], rows=bool((meta["influxdb"] or {}).get("tag")))
+                state.dropped_fields += dropped
+                state.result = clean
+                state.collected_at = time.time()
+                self._version += 1
+            else:
+                state.errors += 1
+                state.last_error = error
+                logging.error(f"Plugin {state.name} ล้มเหลว: {error}")
+
+            if meta is None or crashed:
+                state.strikes += 1
+                reason = f"โหลดหรือทำงานล้มเหลว {state.strikes} ครั้งติดต่อกัน: {error}"
+            else:
+                over = state.avg_cpu > meta["cpu_budget"] or state.avg_wall > meta["wall_budget"]
+                max_interval = meta["interval"] * self.max_slowdown
+                if over and state.effective_interval < max_interval:
+                    widened = min(max_interval, state.effective_interval * 2)
+                    logging.warning(
+                        f"Plugin {state.name} ใช้ CPU {state.avg_cpu:.3f}s / เวลา {state.avg_wall:.3f}s ต่อรอบ "
+                        f"เกิน budget ({meta['cpu_budget']}s / {meta['wall_budget']}s) ขยายรอบเป็น {widened}s"
+                    )
+                    state.effective_interval = widened
+                    state.strikes = 0
+                elif over:
+                    state.strikes += 1
+                    reason = (f"ใช้ CPU {state.avg_cpu:.3f}s / เวลา {state.avg_wall:.3f}s ต่อรอบ เกิน budget "
+                              f"แม้ขยายรอบเป็น {state.effective_interval}s แล้ว")
+                else:
+                    state.strikes = 0
+                    if state.avg_cpu < meta["cpu_budget"] / 2 and state.avg_wall < meta["wall_budget"] / 2 and \
+                            state.effective_interval > meta["interval"]:
+                        state.effective_interval = max(meta["interval"], state.effective_interval / 2)
+
+            if state.strikes >= self.disable_after:
+                state.status, state.reason = "disabled", reason
+                logging.error(f"ปิด plugin {state.name}: {reason}")
+
+    def snapshot(self):
+        """
+        ผลลัพธ์ล่าสุดของ plugin ที่ยังทำงานอยู่ พร้อม schema และ mapping
+        (แนบไปกับ snapshot เพื่อให้ aggregator ที่ไม่มี plugin นี้บันทึกและแจ้งเตือนได้)
+
+        Returns:
+            dict: ชื่อ plugin และ data, collected_at, schema, influxdb, thresholds
+        """
+        result = {}
+        for name, state in self.plugins.items():
+            with state.lock:
+                if state.collected_at is None or state.status == "disabled":
+                    continue
+                result[name] = {
+                    "data": state.result,
+                    "collected_at": datetime.fromtimestamp(state.collected_at).isoformat(),
+                    "schema": state.meta["schema"],
+                    "influxdb": state.meta["influxdb"],
+                    "thresholds": state.meta["thresholds"]
+                }
+        return result
+
+    def version(self):
+        """ค่าที่เปลี่ยนทุกครั้งที่ plugin ใดมีผลลัพธ์ใหม่ (ใช้เป็น key ของ cache)"""
+        return self._version
+
+    def stats(self):
+        """
+        สถานะและต้นทุนของแต่ละ plugin
+
+        Returns:
+            dict: สถานะ, รอบเวลา, เวลา CPU/เวลาจริง (ล่าสุด, เฉลี่ย, รวม), จำนวนรอบ, ข้อผิดพลาด, timeout และ restart
+        """
+        result = {}
+        for name, state in self.plugins.items():
+            with state.lock:
+                meta = state.meta or {}
+                result[name] = {
+                    "status": state.status,
+                    "reason": state.reason,
+                    "source": state.source.get("path") or state.source.get("value"),
+                    "description": meta.get("description"),
+                    "interval": meta.get("interval"),
+                    "effective_interval": state.effective_interval,
+                    "cpu_budget": meta.get("cpu_budget"),
+                    "wall_budget": meta.get("wall_budget"),
+                    "last_cpu_seconds": state.last_cpu,
+                    "last_wall_seconds": state.last_wall,
+                    "avg_cpu_seconds": state.avg_cpu,
+                    "avg_wall_seconds": state.avg_wall,
+                    "cpu_seconds_total": state.cpu_total,
+                    "wall_seconds_total": state.wall_total,
+                    "runs": state.runs,
+                    "errors": state.errors,
+                    "timeouts": state.timeouts,
+                    "restarts": state.restarts,
+                    "dropped_fields": state.dropped_fields,
+                    "last_error": state.last_error,
+                    "collected_at": state.collected_at
+                }
+        return result
+
+def _worker(config):
+    """
+    ทำงานใน process ของ plugin: โหลด plugin, ส่ง metadata แล้วรันตามคำสั่งจาก stdin
+
+    ผลลัพธ์ถูกส่งทาง stdout เดิม (หนึ่ง JSON ต่อบรรทัด) ส่วน print ของ plugin ถูกส่งไปยัง stderr
+    """
+    protocol = os.fdopen(os.dup(1), 'w')
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    def send(message):
+        protocol.write(json.dumps(message, default=str) + "\n")
+        protocol.flush()
+
+    try:
+        if config.get("nice"):
+            os.nice(config["nice"])
+        if config.get("max_memory_mb"):
+            import resource
+            limit = config["max_memory_mb"] * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        plugin = load_plugin_class(config["source"])()
+        plugin.setup(config.get("config") or {})
+        send({"ok": True, "meta": plugin.metadata()})
+    except BaseException as e:
+        send({"ok": False, "error": f"{type(e).__name__}: {e}"})
+        return
+
+    for line in sys.stdin:
+        cpu_started = time.process_time()
+        try:
+            message = {"ok": True, "data": plugin.collect()}
+        except Exception as e:
+            message = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        message["cpu"] = time.process_time() - cpu_started
+        send(message)
+
+if __name__ == '__main__':
+    # process ของ plugin ถูกเริ่มโดย PluginManager: python -m utils.plugins '<config JSON>'
+    # เรียกผ่าน utils.plugins เพื่อให้ plugin ที่ import CollectorPlugin ได้คลาสเดียวกับที่ใช้ตรวจ (ไม่ใช่ของ __main__)
+    from utils.plugins import _worker as run_worker
+    run_worker(json.loads(sys.argv[1]))
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Process Collector
+
+ใช้สำหรับหา process ที่ใช้ CPU, หน่วยความจำ และ I/O มากที่สุด โดยอ่าน /proc โดยตรง
+"""
+
+import heapq
+import logging
+import os
+import pwd
+import threading
+import time
+
+class ProcessCollector:
+    """
+    คลาสสำหรับอ่าน /proc/[pid]/stat และ statm ของทุก process และคำนวณ CPU% จากผลต่างระหว่างรอบ
+    """
+
+    def __init__(self, proc_root='/proc', top_n=10, collect_io=True):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Process Collector
+
+        Args:
+            proc_root (str): ตำแหน่งของ procfs
+            top_n (int): จำนวน process ที่จะรายงานในแต่ละอันดับ
+            collect_io (bool): อ่าน /proc/[pid]/io เพื่อจัดอันดับ I/O หรือไม่
+        """
+        self.proc_root = proc_root
+        self.top_n = top_n
+        self.collect_io = collect_io
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        # ข้อมูลที่ไม่เปลี่ยนตลอดอายุ process: pid -> (starttime, cmdline, user)
+        self.static = {}
+        # ข้อมูลรอบก่อน: pid -> (starttime, cpu_ticks, io_read, io_write)
+        self.previous = {}
+        self.previous_time = None
+        self.users = {}
+        # ป้องกันไม่ให้หลาย request คำนวณผลต่างจาก snapshot ก่อนหน้าเดียวกันพร้อมกัน
+        self._lock = threading.Lock()
+
+    def _user(self, uid):
+        """แปลง uid เป็นชื่อผู้ใช้ (cache ไว้)"""
+        name = self.users.get(uid)
+        if name is None:
+            try:
+                name = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                name = str(uid)
+            self.users[uid] = name
+        return name
+
+    def _static_info(self, pid, starttime, comm):
+        """ดึง cmdline และผู้ใช้ของ process (อ่านใหม่เฉพาะเมื่อ pid ถูกใช้ซ้ำ)"""
+        info = self.static.get(pid)
+        if info is not None and info[0] == starttime:
+            return info
+
+        base = f"{self.proc_root}/{pid}"
+        try:
+            with open(f"{base}/cmdline", 'rb') as f:
+                cmdline = f.read(4096).replace(b'\0', b' ').strip().decode('utf-8', 'replace')
+        except OSError:
+            cmdline = ""
+        try:
+            user = self._user(os.stat(base).st_uid)
+        except OSError:
+            user = None
+
+        info = (starttime, cmdline or f"[{comm}]", user)
+        self.static[pid] = info
+        return info
+
+    def _read_io(self, pid):
+        """อ่าน read_bytes/write_bytes จาก /proc/[pid]/io (ต้องมีสิทธิ์)"""
+        try:
+            with open(f"{self.proc_root}/{pid}/io", 'rb') as f:
+                content = f.read()
+        except OSError:
+            return None, None
+
+        read_bytes = write_bytes = None
+        for line in content.split(b'\n'):
+            if line.startswith(b'read_bytes:'):
+                read_bytes = int(line[11:])
+            elif line.startswith(b'write_bytes:'):
+                write_bytes = int(line[12:])
+        return read_bytes, write_bytes
+
+    def collect(self):
+        """
+        สแกนทุก process และจัดอันดับตาม CPU, RSS และ I/O
+
+        Returns:
+            dict: จำนวน process, จำนวนตามสถานะ และรายการ top-N ของแต่ละอันดับ
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self.previous_time if self.previous_time is not None else None
+            previous = self.previous
+            current = {}
+            records = []
+            states = {}
+            threads = 0
+
+            try:
+                entries = os.scandir(self.proc_root)
+            except OSError as e:
+                logging.error(f"ไม่สามารถอ่าน {self.proc_root}: {str(e)}")
+                return {"error": str(e)}
+
+            with entries:
+                for entry in entries:
+                    name = entry.name
+                    if not name.isdigit():
+                        continue
+                    pid = int(name)
+                    base = f"{self.proc_root}/{name}"
+                    try:
+                        with open(f"{base}/stat", 'rb') as f:
+                            stat = f.read()
+                        with open(f"{base}/statm", 'rb') as f:
+                            statm = f.read()
+                    except OSError:
+                        # process จบไปแล้วระหว่างสแกน
+                        continue
+
+                    # ชื่อ process อยู่ในวงเล็บและอาจมีช่องว่างหรือวงเล็บซ้อน
+                    open_paren = stat.find(b'(')
+                    close_paren = stat.rfind(b')')
+                    comm = stat[open_paren + 1:close_paren].decode('utf-8', 'replace')
+                    fields = stat[close_paren + 2:].split()
+                    state = fields[0].decode()
+                    cpu_ticks = int(fields[11]) + int(fields[12])
+                    num_threads = int(fields[17])
+                    starttime = int(fields[19])
+                    rss = int(statm.split()[1]) * self.page_size
+
+                    states[state] = states.get(state, 0) + 1
+                    threads += num_threads
+
+                    io_read = io_write = None
+                    if self.collect_io:
+                        io_read, io_write = self._read_io(pid)
+
+                    current[pid] = (starttime, cpu_ticks, io_read, io_write)
+
+                    cpu_percent = None
+                    io_rate = None
+                    prev = previous.get(pid)
+                    if elapsed and prev is not None and prev[0] == starttime:
+                        cpu_percent = (cpu_ticks - prev[1]) / self.clock_ticks / elapsed * 100
+                        if io_read is not None and prev[2] is not None:
+                            io_rate = ((io_read - prev[2]) + (io_write - prev[3])) / elapsed
+
+                    records.append((pid, comm, state, starttime, cpu_percent, rss, num_threads, io_rate))
+
+            self.previous = current
+            self.previous_time = now
+
+            # ลบ cache ของ process ที่จบไปแล้ว
+            for pid in [pid for pid in self.static if pid not in current]:
+                del self.static[pid]
+
+            top_cpu = heapq.nlargest(self.top_n, records, key=lambda r: r[4] or 0.0)
+            top_memory = heapq.nlargest(self.top_n, records, key=lambda r: r[5])
+            top_io = []
+            if self.collect_io:
+                top_io = heapq.nlargest(self.top_n, [r for r in records if r[7]], key=lambda r: r[7])
+
+            return {
+                "count": len(records),
+                "threads": threads,
+                "states": states,
+                "top_cpu": [self._format(r) for r in top_cpu],
+                "top_memory": [self._format(r) for r in top_memory],
+                "top_io": [self._format(r) for r in top_io]
+            }
+
+    def _format(self, record):
+        """สร้าง dict ของ process สำหรับ response (เฉพาะ process ที่ติดอันดับ)"""
+        pid, comm, state, starttime, cpu_percent, rss, num_threads, io_rate = record
+        _, cmdline, user = self._static_info(pid, starttime, comm)
+        return {
+            "pid": pid,
+            "name": comm,
+            "user": user,
+            "cmdline": cmdline,
+            "state": state,
+            "cpu_percent": round(cpu_percent, 2) if cpu_percent is not None else None,
+            "rss": rss,
+            "threads": num_threads,
+            "io_bytes_per_sec": round(io_rate, 1) if io_rate is not None else None
+        }
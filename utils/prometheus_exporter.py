@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Prometheus Exporter
+
+ใช้สำหรับแปลงข้อมูลระบบเป็น Prometheus text exposition format
+"""
+
+import gzip
+import threading
+import time
+from collections import Counter
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+PREFIX = "ubuntu_health"
+
+def escape_label_value(value):
+    """escape ค่า label ตาม Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def format_value(value):
+    """แปลงค่าตัวเลขเป็นข้อความ (bool ถือเป็น 0/1)"""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if value != value:
+        return "NaN"
+    return repr(float(value))
+
+class _Family:
+    """กลุ่มของ samples ที่ใช้ชื่อ metric เดียวกัน"""
+
+    __slots__ = ('name', 'kind', 'help', 'lines')
+
+    def __init__(self, name, kind, help_text):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.lines = []
+
+    def add(self, value, labels=None):
+        if value is None:
+            return
+        if labels:
+            label_text = ",".join(f'{key}="{escape_label_value(val)}"' for key, val in labels.items())
+            self.lines.append(f"{self.name}{{{label_text}}} {format_value(value)}")
+        else:
+            self.lines.append(f"{self.name} {format_value(value)}")
+
+class _Builder:
+    """ตัวช่วยรวม metric families ตามลำดับที่ประกาศ"""
+
+    def __init__(self):
+        self.families = {}
+
+    def family(self, name, kind, help_text):
+        full_name = f"{PREFIX}_{name}"
+        family = self.families.get(full_name)
+        if family is None:
+            family = _Family(full_name, kind, help_text)
+            self.families[full_name] = family
+        return family
+
+    def render(self):
+        parts = []
+        for family in self.families.values():
+            if not family.lines:
+                continue
+            parts.append(f"# HELP {family.name} {family.help}")
+            parts.append(f"# TYPE {family.name} {family.kind}")
+            parts.extend(family.lines)
+        parts.append("")
+        return "\n".join(parts)
+
+def render_metrics(data, sampled_at=None):
+    """
+    แปลงข้อมูลระบบเป็น Prometheus text exposition format
+
+    Args:
+        data (dict): ข้อมูลระบบในรูปแบบเดียวกับ /api/v1/system/info
+        sampled_at (float, optional): epoch time ที่เก็บข้อมูล
+
+    Returns:
+        str: ข้อความในรูปแบบ Prometheus text format
+    """
+    builder = _Builder()
+
+    cpu = data.get("cpu") or {}
+    builder.family("cpu_usage_percent", "gauge", "CPU usage in percent.").add(cpu.get("percent"))
+    cpu_time_family = builder.family("cpu_time_percent", "gauge", "Share of CPU time by mode in percent.")
+    for mode, value in (cpu.get("times_percent") or {}).items():
+        cpu_time_family.add(value, {"mode": mode})
+    for core in cpu.get("per_core") or []:
+        labels = {"core": core.get("core")}
+        builder.family("cpu_core_usage_percent", "gauge", "Per-core CPU usage in percent.").add(core.get("percent"), labels)
+        core_time_family = builder.family("cpu_core_time_percent", "gauge", "Per-core share of CPU time by mode in percent.")
+        for mode in ("user", "system", "iowait", "irq", "softirq", "steal"):
+            core_time_family.add(core.get(mode), {"core": core.get("core"), "mode": mode})
+    builder.family("context_switches_per_second", "gauge", "Context switches per second.").add(cpu.get("context_switches_per_sec"))
+    builder.family("interrupts_per_second", "gauge", "Interrupts per second.").add(cpu.get("interrupts_per_sec"))
+    load_average = cpu.get("load_average") or {}
+    load = builder.family("load_average", "gauge", "System load average.")
+    for period in ("1min", "5min", "15min"):
+        load.add(load_average.get(period), {"period": period})
+    cores = cpu.get("cores") or {}
+    core_family = builder.family("cpu_cores", "gauge", "Number of CPU cores.")
+    for kind in ("physical", "logical"):
+        core_family.add(cores.get(kind), {"type": kind})
+    frequency = cpu.get("frequency") or {}
+    builder.family("cpu_frequency_mhz", "gauge", "Current CPU frequency in MHz.").add(frequency.get("current"))
+
+    memory = data.get("memory") or {}
+    ram = memory.get("ram") or {}
+    ram_family = builder.family("memory_bytes", "gauge", "Physical memory in bytes.")
+    for kind in ("total", "available", "used"):
+        ram_family.add(ram.get(kind), {"type": kind})
+    builder.family("memory_usage_percent", "gauge", "Physical memory usage in percent.").add(ram.get("percent"))
+    swap = memory.get("swap") or {}
+    swap_family = builder.family("swap_bytes", "gauge", "Swap space in bytes.")
+    for kind in ("total", "used", "free"):
+        swap_family.add(swap.get(kind), {"type": kind})
+    builder.family("swap_usage_percent", "gauge", "Swap usage in percent.").add(swap.get("percent"))
+
+    disk = data.get("disk") or {}
+    for partition in disk.get("partitions") or []:
+        labels = {
+            "device": partition.get("device", ""),
+            "mountpoint": partition.get("mountpoint", ""),
+            "fstype": partition.get("fstype", "")
+        }
+        builder.family("filesystem_size_bytes", "gauge", "Filesystem size in bytes.").add(partition.get("total"), labels)
+        builder.family("filesystem_used_bytes", "gauge", "Filesystem used space in bytes.").add(partition.get("used"), labels)
+        builder.family("filesystem_free_bytes", "gauge", "Filesystem free space in bytes.").add(partition.get("free"), labels)
+        builder.family("filesystem_usage_percent", "gauge", "Filesystem usage in percent.").add(partition.get("percent"), labels)
+
+    io = disk.get("io") or {}
+    builder.family("disk_reads_completed_total", "counter", "Total completed disk reads.").add(io.get("read_count"))
+    builder.family("disk_writes_completed_total", "counter", "Total completed disk writes.").add(io.get("write_count"))
+    builder.family("disk_read_bytes_total", "counter", "Total bytes read from disk.").add(io.get("read_bytes"))
+    builder.family("disk_written_bytes_total", "counter", "Total bytes written to disk.").add(io.get("write_bytes"))
+
+    for device, stats in (disk.get("devices") or {}).items():
+        labels = {"device": device}
+        builder.family("disk_device_reads_per_second", "gauge", "Completed reads per second.").add(stats.get("reads_per_sec"), labels)
+        builder.family("disk_device_writes_per_second", "gauge", "Completed writes per second.").add(stats.get("writes_per_sec"), labels)
+        builder.family("disk_device_read_bytes_per_second", "gauge", "Bytes read per second.").add(stats.get("read_bytes_per_sec"), labels)
+        builder.family("disk_device_written_bytes_per_second", "gauge", "Bytes written per second.").add(stats.get("write_bytes_per_sec"), labels)
+        builder.family("disk_device_await_milliseconds", "gauge", "Average time per completed I/O in milliseconds.").add(stats.get("await_ms"), labels)
+        builder.family("disk_device_queue_size", "gauge", "Average number of I/Os in the queue.").add(stats.get("avg_queue_size"), labels)
+        builder.family("disk_device_utilization_percent", "gauge", "Percent of time the device was busy.").add(stats.get("util_percent"), labels)
+
+    network = data.get("network") or {}
+    for interface_name, interface in (network.get("interfaces") or {}).items():
+        io = interface.get("io")
+        if not io:
+            continue
+        labels = {"interface": interface_name}
+        builder.family("network_transmit_bytes_total", "counter", "Total bytes sent.").add(io.get("bytes_sent"), labels)
+        builder.family("network_receive_bytes_total", "counter", "Total bytes received.").add(io.get("bytes_recv"), labels)
+        builder.family("network_transmit_packets_total", "counter", "Total packets sent.").add(io.get("packets_sent"), labels)
+        builder.family("network_receive_packets_total", "counter", "Total packets received.").add(io.get("packets_recv"), labels)
+        builder.family("network_transmit_errors_total", "counter", "Total transmit errors.").add(io.get("errout"), labels)
+        builder.family("network_receive_errors_total", "counter", "Total receive errors.").add(io.get("errin"), labels)
+        builder.family("network_transmit_drops_total", "counter", "Total outgoing packets dropped.").add(io.get("dropout"), labels)
+        builder.family("network_receive_drops_total", "counter", "Total incoming packets dropped.").add(io.get("dropin"), labels)
+
+    connections = network.get("connections") or {}
+    connection_family = builder.family("network_connections", "gauge", "Number of inet connections by state.")
+    for state, count in connections.items():
+        connection_family.add(count, {"state": state})
+
+    temperature = data.get("temperature") or {}
+    if isinstance(temperature, dict) and "error" not in temperature:
+        for chip, sensors in temperature.items():
+            if not isinstance(sensors, list):
+                continue
+            # chip ที่ชื่อซ้ำกัน (NVMe หลายตัว, coretemp หลาย socket) อยู่ใน list เดียวกัน จึงต้องมี label device
+            # เพื่อไม่ให้เกิด series ซ้ำ ข้อมูลที่ไม่มี device (เช่นจาก psutil) ใช้ลำดับของ label ที่ซ้ำกันแทน
+            seen = Counter()
+            for index, sensor in enumerate(sensors):
+                name = sensor.get("label") or str(index)
+                device = sensor.get("device")
+                if not device:
+                    device = str(seen[name])
+                    seen[name] += 1
+                labels = {"chip": chip, "device": device, "sensor": name}
+                builder.family("temperature_celsius", "gauge", "Current sensor temperature in Celsius.").add(sensor.get("current"), labels)
+                builder.family("temperature_high_celsius", "gauge", "Sensor high threshold in Celsius.").add(sensor.get("high"), labels)
+                builder.family("temperature_critical_celsius", "gauge", "Sensor critical threshold in Celsius.").add(sensor.get("critical"), labels)
+
+    system = data.get("system") or {}
+    uptime = system.get("uptime") or {}
+    builder.family("uptime_seconds", "gauge", "System uptime in seconds.").add(uptime.get("seconds"))
+    if sampled_at is not None:
+        builder.family("sample_timestamp_seconds", "gauge", "Time the metrics were sampled (epoch seconds).").add(sampled_at)
+
+    return builder.render()
+
+class MetricsExposition:
+    """
+    เก็บข้อความ metrics ที่ render แล้วในรูปแบบ bytes (และ gzip) เพื่อให้การ scrape ไม่ต้องเก็บข้อมูลใหม่
+    """
+
+    def __init__(self, compress=True, compresslevel=6):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Metrics Exposition
+
+        Args:
+            compress (bool): เก็บสำเนาแบบ gzip ไว้ล่วงหน้าหรือไม่
+            compresslevel (int): ระดับการบีบอัด gzip
+        """
+        self.compress = compress
+        self.compresslevel = compresslevel
+        self.body = None
+        self.gzip_body = None
+        self.updated_at = None
+        self._lock = threading.Lock()
+
+    def update(self, data, sampled_at=None):
+        """
+        render ข้อมูลระบบใหม่ (เรียกหนึ่งครั้งต่อรอบการเก็บข้อมูล)
+
+        Args:
+            data (dict): ข้อมูลระบบ
+            sampled_at (float, optional): epoch time ที่เก็บข้อมูล
+        """
+        if sampled_at is None:
+            sampled_at = time.time()
+        body = render_metrics(data, sampled_at).encode('utf-8')
+        gzip_body = gzip.compress(body, compresslevel=self.compresslevel) if self.compress else None
+
+        # สลับ reference พร้อมกันเพื่อให้ scrape ได้ข้อมูลชุดเดียวกันเสมอ
+        with self._lock:
+            self.body = body
+            self.gzip_body = gzip_body
+            self.updated_at = sampled_at
+
+    def get(self, accept_gzip=False):
+        """
+        ดึงข้อความ metrics ล่าสุด
+
+        Args:
+            accept_gzip (bool): client รองรับ gzip หรือไม่
+
+        Returns:
+            tuple: (body, content_encoding) หรือ (None, None) ถ้ายังไม่มีข้อมูล
+        """
+        with self._lock:
+            body = self.body
+            gzip_body = self.gzip_body
+
+        if body is None:
+            return None, None
+        if accept_gzip and gzip_body is not None:
+            return gzip_body, "gzip"
+        return body, None
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Response Cache
+
+ใช้สำหรับแปลงข้อมูลเป็น JSON เพียงครั้งเดียวต่อ snapshot พร้อมเก็บสำเนาที่บีบอัดและ ETag
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# JSON encoder ที่เร็วกว่า (ถ้าติดตั้งไว้)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Brotli (ถ้าติดตั้งไว้)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def dumps(data):
+    """
+    แปลงข้อมูลเป็น JSON bytes ด้วย encoder ที่เร็วที่สุดที่มี
+
+    Args:
+        data: ข้อมูลที่จะแปลง
+
+    Returns:
+        bytes: JSON ในรูปแบบ UTF-8
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def supported_encodings():
+    """รายการ Content-Encoding ที่รองรับ เรียงตามลำดับที่ต้องการ"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def choose_encoding(accept_encoding, supported=None):
+    """
+    เลือก Content-Encoding จาก Accept-Encoding header
+
+    Args:
+        accept_encoding (str): ค่า Accept-Encoding ของ request
+        supported (tuple, optional): encoding ที่ผู้เรียกมีให้ เรียงตามลำดับที่ต้องการ (ค่าเริ่มต้นคือ supported_encodings())
+
+    Returns:
+        str: 'br', 'gzip' หรือ None (ไม่บีบอัด)
+    """
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for item in accept_encoding.split(','):
+        parts = item.strip().split(';')
+        coding = parts[0].strip().lower()
+        quality = 1.0
+        for param in parts[1:]:
+            param = param.strip()
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+
+    for coding in supported or supported_encodings():
+        quality = accepted.get(coding, accepted.get('*', 0.0))
+        if quality > 0:
+            return coding
+    return None
+
+def etag_matches(if_none_match, etag):
+    """ตรวจสอบว่า If-None-Match ตรงกับ ETag หรือไม่ (เปรียบเทียบแบบ weak)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+class CachedResponse:
+    """
+    JSON body ของ snapshot หนึ่งชุด พร้อม ETag และสำเนาที่บีบอัด (สร้างเมื่อมีการขอครั้งแรก)
+    """
+
+    def __init__(self, data, version=None, last_modified=None):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Cached Response
+
+        Args:
+            data: ข้อมูลที่จะส่งกลับ
+            version: ค่าที่ใช้บอกว่า snapshot เปลี่ยนหรือยัง
+            last_modified (float, optional): epoch time ที่ข้อมูลถูกเก็บ
+        """
+        self.version = version
+        self.body = dumps(data)
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=12).hexdigest() + '"'
+        self.last_modified = last_modified if last_modified is not None else time.time()
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding):
+        """
+        ดึง body ตาม Content-Encoding ที่ระบุ
+
+        Args:
+            encoding (str): 'br', 'gzip' หรือ None
+
+        Returns:
+            bytes: body ที่บีบอัดแล้ว (หรือ body เดิมถ้าไม่บีบอัด)
+        """
+        if encoding is None:
+            return self.body
+
+        body = self._encoded.get(encoding)
+        if body is None:
+            with self._lock:
+                body = self._encoded.get(encoding)
+                if body is None:
+                    if encoding == 'br':
+                        body = brotli.compress(self.body, quality=5)
+                    else:
+                        body = gzip.compress(self.body, compresslevel=6)
+                    self._encoded[encoding] = body
+        return body
+
+class ResponseCache:
+    """
+    เก็บ CachedResponse ล่าสุดของแต่ละ key และสร้างใหม่เฉพาะเมื่อ version เปลี่ยน
+    """
+
+    def __init__(self, max_entries=None):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Response Cache
+
+        Args:
+            max_entries (int, optional): จำนวน key สูงสุด (ลบ key ที่ไม่ได้ใช้นานที่สุดออกก่อน, None = ไม่จำกัด)
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key):
+        """lock แยกตาม key เพื่อไม่ให้การสร้าง response หนึ่งรอ response อื่น"""
+        lock = self._locks.get(key)
+        if lock is None:
+            with self._lock:
+                lock = self._locks.setdefault(key, threading.Lock())
+        return lock
+
+    def get(self, key, version, build, last_modified=None):
+        """
+        ดึง response ที่ cache ไว้ หรือสร้างใหม่ถ้า version เปลี่ยน
+
+        Args:
+            key (str): ชื่อของ response เช่น 'system/info'
+            version: ค่าที่บอกว่าข้อมูลเปลี่ยนหรือยัง (None = ไม่ cache)
+            build (callable): ฟังก์ชันที่คืนค่าข้อมูลใหม่
+            last_modified (float, optional): epoch time ของข้อมูล
+
+        Returns:
+            CachedResponse: response ของข้อมูลชุดปัจจุบัน
+        """
+        if version is None:
+            self.misses += 1
+            return CachedResponse(build(), None, last_modified)
+
+        entry = self.entries.get(key)
+        if entry is not None and entry.version == version:
+            self.hits += 1
+            self._touch(key)
+            return entry
+
+        with self._key_lock(key):
+            entry = self.entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                entry = CachedResponse(build(), version, last_modified)
+                self._store(key, entry)
+            else:
+                self.hits += 1
+        return entry
+
+    def _touch(self, key):
+        """ย้าย key ไปเป็นรายการที่ใช้ล่าสุด (เฉพาะเมื่อจำกัดจำนวน)"""
+        if self.max_entries is None:
+            return
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+
+    def _store(self, key, entry):
+        """เก็บ entry และลบ key ที่ไม่ได้ใช้นานที่สุดถ้าเกินจำนวนที่กำหนด"""
+        with self._lock:
+            self.entries[key] = entry
+            if self.max_entries is None:
+                return
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                evicted, _ = self.entries.popitem(last=False)
+                self._locks.pop(evicted, None)
+
+    def stats(self):
+        """
+        สถิติของ cache
+
+        Returns:
+            dict: จำนวน hit/miss และขนาดของแต่ละ entry
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "encoder": "orjson" if orjson is not None else "json",
+            "encodings": list(supported_encodings()),
+            "entries": {
+                key: {"bytes": len(entry.body), "etag": entry.etag}
+                for key, entry in list(self.entries.items())
+            }
+        }
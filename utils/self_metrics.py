@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Self Metrics
+
+ใช้สำหรับวัดเวลาและนับข้อผิดพลาดของการทำงานภายใน monitor เอง
+"""
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# ขอบเขตของ histogram (วินาที) ตั้งแต่ 0.1 ms ถึง 30 วินาที
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+class Histogram:
+    """
+    histogram แบบ bucket คงที่ จองหน่วยความจำครั้งเดียวตอนสร้าง
+    """
+
+    __slots__ = ('buckets', 'counts', 'total', 'count', 'max', '_lock')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Histogram
+
+        Args:
+            buckets (tuple): ขอบบนของแต่ละ bucket เรียงจากน้อยไปมาก
+        """
+        self.buckets = tuple(buckets)
+        # bucket สุดท้ายสำหรับค่าที่เกินขอบบนสุด (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """บันทึกค่าหนึ่งค่า"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+            if value > self.max:
+                self.max = value
+
+    def snapshot(self):
+        """
+        สรุปค่าปัจจุบันของ histogram
+
+        Returns:
+            dict: count, sum, mean, max และจำนวนสะสมของแต่ละ bucket
+        """
+        with self._lock:
+            counts = list(self.counts)
+            total = self.total
+            count = self.count
+            maximum = self.max
+
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = cumulative + counts[-1]
+
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else None,
+            "max": maximum,
+            "buckets": buckets
+        }
+
+class SelfMetrics:
+    """
+    คลาสสำหรับเก็บ timers, counters, error counters และ gauges ของ monitor
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Self Metrics
+
+        Args:
+            buckets (tuple): ขอบของ histogram ที่ใช้กับทุก timer
+        """
+        self.buckets = buckets
+        self.started_at = time.time()
+        self.timers = {}
+        self.counters = {}
+        self.errors = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        """
+        ดึง histogram ตามชื่อ (สร้างใหม่ถ้ายังไม่มี)
+
+        Args:
+            name (str): ชื่อ timer เช่น 'collector.cpu'
+
+        Returns:
+            Histogram: histogram ของ timer
+        """
+        histogram = self.timers.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.timers.get(name)
+                if histogram is None:
+                    histogram = Histogram(self.buckets)
+                    self.timers[name] = histogram
+        return histogram
+
+    def observe(self, name, seconds):
+        """บันทึกเวลาที่ใช้ (วินาที) ของ timer ที่ระบุ"""
+        self.histogram(name).observe(seconds)
+
+    def increment(self, name, value=1):
+        """เพิ่มค่า counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def error(self, name, exc):
+        """นับข้อผิดพลาดแยกตามชื่อการทำงานและชนิดของ exception"""
+        key = (name, type(exc).__name__)
+        with self._lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def gauge(self, name, func):
+        """
+        ลงทะเบียน gauge ที่จะถูกอ่านค่าตอนดึง snapshot เท่านั้น
+
+        Args:
+            name (str): ชื่อ gauge เช่น 'fleet.queue_depth'
+            func (callable): ฟังก์ชันที่คืนค่าตัวเลขปัจจุบัน
+        """
+        self.gauges[name] = func
+
+    def timed(self, name):
+        """
+        decorator สำหรับจับเวลาฟังก์ชันและนับ exception ที่หลุดออกมา
+
+        Args:
+            name (str): ชื่อ timer
+        """
+        def decorator(func):
+            histogram = self.histogram(name)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    self.error(name, e)
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """
+        สรุปค่าทั้งหมด
+
+        Returns:
+            dict: timers, counters, errors และ gauges
+        """
+        with self._lock:
+            timers = dict(self.timers)
+            counters = dict(self.counters)
+            errors = dict(self.errors)
+            gauges = dict(self.gauges)
+
+        error_summary = {}
+        for (name, error_type), count in sorted(errors.items()):
+            error_summary.setdefault(name, {})[error_type] = count
+
+        gauge_values = {}
+        for name, func in sorted(gauges.items()):
+            try:
+                gauge_values[name] = func()
+            except Exception:
+                gauge_values[name] = None
+
+        return {
+            "uptime_seconds": time.time() - self.started_at,
+            "timers": {name: histogram.snapshot() for name, histogram in sorted(timers.items())},
+            "counters": dict(sorted(counters.items())),
+            "errors": error_summary,
+            "gauges": gauge_values
+        }
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Series Registry
+
+ใช้สำหรับแยกข้อมูลระบบแต่ละตัวอย่างเป็น series ที่มี label (เช่น disk:/var, network_recv:eth0)
+และเก็บเป็นแถวของ numpy array ร่วมกับแกนเวลาเดียวกัน เพื่อให้วิเคราะห์หลาย series ได้ในครั้งเดียว
+"""
+
+import fnmatch
+import sys
+import threading
+
+import numpy as np
+
+# เมตริกที่เป็นตัวนับสะสม จะถูกแปลงเป็นอัตราต่อวินาทีก่อนเก็บ
+COUNTER_METRICS = frozenset({"network_sent", "network_recv"})
+
+# เมตริกที่เป็นเปอร์เซ็นต์ (ค่าพยากรณ์ถูกจำกัดไว้ที่ 0-100)
+PERCENT_METRICS = frozenset({"cpu", "memory", "swap", "disk"})
+
+def series_name(metric, label=None):
+    """ชื่อ series ในรูปแบบ 'metric' หรือ 'metric:label'"""
+    return metric if label is None else f"{metric}:{label}"
+
+def parse_series_name(name):
+    """แยกชื่อ series เป็น (metric, label)"""
+    metric, separator, label = name.partition(':')
+    return metric, (label if separator else None)
+
+def match_series(name, selectors):
+    """
+    ตรวจว่าชื่อ series ตรงกับ selector ตัวใดตัวหนึ่งหรือไม่
+
+    Args:
+        name (str): ชื่อ series เช่น 'disk:/var'
+        selectors (iterable): selector เช่น 'disk' (ทุก mountpoint), 'disk:/var' หรือ 'temperature:coretemp/*'
+
+    Returns:
+        bool: True ถ้าตรงกับ selector ตัวใดตัวหนึ่ง
+    """
+    metric, label = parse_series_name(name)
+    for selector in selectors:
+        selector_metric, selector_label = parse_series_name(selector)
+        if selector_metric == metric and (selector_label is None or fnmatch.fnmatchcase(label or "", selector_label)):
+            return True
+    return False
+
+def counter_rates(times, values):
+    """
+    แปลงค่าตัวนับสะสมเป็นอัตราต่อวินาที (กติกาเดียวกับ SeriesRegistry.append_values)
+
+    Args:
+        times (array): epoch time
+        values (array): ค่าตัวนับ (NaN คือไม่มีค่า)
+
+    Returns:
+        tuple: (เวลา, อัตรา) ของตัวอย่างที่คำนวณได้ (ข้ามตัวอย่างแรกและจุดที่ตัวนับลดลง)
+    """
+    present = ~np.isnan(values)
+    times, values = times[present], values[present]
+    elapsed = np.diff(times)
+    delta = np.diff(values)
+    valid = (elapsed > 0) & (delta >= 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return times[1:][valid], (delta / elapsed)[valid]
+
+def split_sample(entry):
+    """
+    แยกข้อมูลระบบหนึ่งตัวอย่างเป็นค่าของแต่ละ series
+
+    Args:
+        entry (dict): ข้อมูลระบบในรูปแบบเดียวกับ /api/v1/system/info (หรือบางส่วน)
+
+    Yields:
+        tuple: (metric, label, value)
+    """
+    cpu = entry.get('cpu')
+    if isinstance(cpu, dict):
+        yield "cpu", None, cpu.get('percent')
+
+    memory = entry.get('memory')
+    if isinstance(memory, dict):
+        yield "memory", None, (memory.get('ram') or {}).get('percent')
+        if memory.get('swap'):
+            yield "swap", None, memory['swap'].get('percent')
+
+    disk = entry.get('disk')
+    if isinstance(disk, dict):
+        for index, partition in enumerate(disk.get('partitions') or []):
+            label = partition.get('mountpoint') or partition.get('device') or str(index)
+            yield "disk", label, partition.get('percent')
+
+    network = entry.get('network')
+    if isinstance(network, dict):
+        for interface, data in (network.get('interfaces') or {}).items():
+            io = data.get('io') if isinstance(data, dict) else None
+            if io:
+                yield "network_sent", interface, io.get('bytes_sent')
+                yield "network_recv", interface, io.get('bytes_recv')
+
+    temperature = entry.get('temperature')
+    if isinstance(temperature, dict):
+        for chip, sensors in temperature.items():
+            if not isinstance(sensors, list):
+                continue
+            for index, sensor in enumerate(sensors):
+                yield "temperature", f"{chip}/{sensor.get('label') or index}", sensor.get('current')
+
+class SeriesRegistry:
+    """
+    คลาสสำหรับเก็บหลาย series ร่วมกับแกนเวลาเดียวกัน (แถวคือ series, คอลัมน์คือเวลา, ค่าที่ไม่มีคือ NaN)
+
+    ข้อมูลของแต่ละ series อยู่ติดกันในหน่วยความจำ ชื่อ series ถูก intern ไว้ และ buffer ถูกจองไว้ล่วงหน้า
+    เมื่อเต็มจะย้ายข้อมูลล่าสุด max_entries ตัวอย่างไปไว้ต้น buffer (amortized O(1) ต่อการเพิ่มข้อมูล)
+    """
+
+    def __init__(self, max_entries=1000):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Series Registry
+
+        Args:
+            max_entries (int): จำนวนตัวอย่างสูงสุดที่เก็บไว้
+        """
+        self.max_entries = max_entries
+        self.names = []
+        self.rows = {}
+        self.metrics = {}
+        self._capacity = max_entries + max(256, max_entries // 4)
+        self.times = np.empty(self._capacity, dtype=np.float64)
+        self.values = np.full((8, self._capacity), np.nan, dtype=np.float64)
+        self.size = 0
+        self.appended = 0
+        self._counters = {}
+        self._selections = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return min(self.size, self.max_entries)
+
+    def _add_series(self, name):
+        """เพิ่ม series ใหม่ (ขยาย array เป็นสองเท่าเมื่อเต็ม)"""
+        height = self.values.shape[0]
+        if len(self.names) == height:
+            values = np.full((height * 2, self._capacity), np.nan, dtype=np.float64)
+            values[:height] = self.values
+            self.values = values
+        name = sys.intern(name)
+        row = len(self.names)
+        self.names.append(name)
+        self.rows[name] = row
+        self.metrics.setdefault(parse_series_name(name)[0], []).append(row)
+        self._selections.clear()
+        return row
+
+    def _compact(self):
+        """ย้ายข้อมูลล่าสุดไปไว้ต้น buffer เพื่อให้มีที่ว่างสำหรับข้อมูลใหม่"""
+        keep = self.max_entries - 1
+        self.times[:keep] = self.times[self.size - keep:self.size]
+        self.values[:, :keep] = self.values[:, self.size - keep:self.size]
+        self.size = keep
+
+    def append(self, timestamp, entry):
+        """
+        เพิ่มข้อมูลหนึ่งตัวอย่าง
+
+        Args:
+            timestamp (float): epoch time ของตัวอย่าง (ถ้าน้อยกว่าตัวอย่างก่อนหน้าจะใช้เวลาของตัวอย่างก่อนหน้า)
+            entry (dict): ข้อมูลระบบ
+        """
+        self.append_values(timestamp, (
+            (series_name(metric, label), value)
+            for metric, label, value in split_sample(entry)
+            if value is not None
+        ))
+
+    def append_values(self, timestamp, values):
+        """
+        เพิ่มข้อมูลหนึ่งตัวอย่างจากค่าของแต่ละ series (ตัวนับสะสมยังเป็นค่าดิบ)
+
+        Args:
+            timestamp (float): epoch time ของตัวอย่าง
+            values (iterable): คู่ (ชื่อ series, ค่า)
+        """
+        with self._lock:
+            if self.size == self._capacity:
+                self._compact()
+            index = self.size
+            if index and timestamp < self.times[index - 1]:
+                timestamp = self.times[index - 1]
+            self.times[index] = timestamp
+            self.values[:, index] = np.nan
+
+            for name, value in values:
+                if name.partition(':')[0] in COUNTER_METRICS:
+                    previous = self._counters.get(name)
+                    self._counters[name] = (timestamp, value)
+                    # ตัวนับที่ลดลงคือรีบูตหรือ interface ถูกสร้างใหม่
+                    if previous is None or timestamp <= previous[0] or value < previous[1]:
+                        continue
+                    value = (value - previous[1]) / (timestamp - previous[0])
+                row = self.rows.get(name)
+                if row is None:
+                    row = self._add_series(name)
+                self.values[row, index] = value
+
+            self.size += 1
+            self.appended += 1
+
+    def assign(self, times, series):
+        """
+        แทนที่ข้อมูลทั้งหมดด้วย array (ใช้โหลดข้อมูลจำนวนมากในครั้งเดียว)
+
+        Args:
+            times (array): epoch time เรียงจากน้อยไปมาก
+            series (dict): ชื่อ series และ array ของค่า (ยาวเท่ากับ times, NaN คือไม่มีค่า)
+        """
+        times = np.asarray(times, dtype=np.float64)[-self.max_entries:]
+        count = len(times)
+        with self._lock:
+            self.names = []
+            self.rows = {}
+            self.metrics = {}
+            self._counters = {}
+            self._selections = {}
+            self.times = np.empty(self._capacity, dtype=np.float64)
+            self.times[:count] = times
+            self.values = np.full((max(8, len(series)), self._capacity), np.nan, dtype=np.float64)
+            for name, values in series.items():
+                row = self._add_series(name)
+                self.values[row, :count] = np.asarray(values, dtype=np.float64)[len(values) - count:]
+            self.size = count
+            self.appended += count
+
+    def select(self, selector):
+        """
+        หาแถวของ series ที่ตรงกับ selector
+
+        Args:
+            selector (str | list): 'disk' (ทุก mountpoint), 'disk:/var', 'temperature:coretemp/*'
+                หรือ list ของ selector หลายตัว
+
+        Returns:
+            list: index ของแถวเรียงตามชื่อ series
+        """
+        selectors = (selector,) if isinstance(selector, str) else tuple(selector)
+        with self._lock:
+            rows = self._selections.get(selectors)
+            if rows is not None:
+                return rows
+            metrics = {parse_series_name(item)[0] for item in selectors}
+            selected = [
+                row
+                for metric in metrics
+                for row in self.metrics.get(metric, [])
+                if match_series(self.names[row], selectors)
+            ]
+            rows = sorted(selected, key=lambda row: self.names[row])
+            self._selections[selectors] = rows
+            return rows
+
+    def window(self, selector, start=None, end=None):
+        """
+        ดึงข้อมูลของ series ที่เลือกในช่วงเวลาที่กำหนด
+
+        Args:
+            selector (str | list): selector ของ series
+            start (float, optional): epoch time เริ่มต้น (รวม)
+            end (float, optional): epoch time สิ้นสุด (รวม)
+
+        Returns:
+            tuple: (เวลา shape (n,), ค่า shape (k, n), ชื่อ series k ตัว) เป็นสำเนาของข้อมูล
+        """
+        with self._lock:
+            rows = self.select(selector)
+            first = max(0, self.size - self.max_entries)
+            times = self.times[first:self.size]
+            lo = int(np.searchsorted(times, start, 'left')) if start is not None else 0
+            hi = int(np.searchsorted(times, end, 'right')) if end is not None else len(times)
+            return (
+                times[lo:hi].copy(),
+                self.values[rows, first + lo:first + hi],
+                [self.names[row] for row in rows]
+            )
+
+    def first_timestamp(self):
+        """เวลาของตัวอย่างแรกที่ยังเก็บไว้ (None ถ้ายังไม่มีข้อมูล)"""
+        with self._lock:
+            return float(self.times[max(0, self.size - self.max_entries)]) if self.size else None
+
+    def last_timestamp(self):
+        """เวลาของตัวอย่างล่าสุด (None ถ้ายังไม่มีข้อมูล)"""
+        with self._lock:
+            return float(self.times[self.size - 1]) if self.size else None
+
+    def series_names(self):
+        """ชื่อ series ทั้งหมด"""
+        with self._lock:
+            return sorted(self.names)
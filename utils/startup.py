@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ubuntu Health Monitor - Startup
+
+ใช้สำหรับโหลด module ที่ไม่จำเป็นเมื่อถูกใช้งานครั้งแรก, สร้าง client เมื่อต้องใช้
+และวัดเวลาที่ใช้ตอนเริ่มโปรแกรม (เวลา import ของแต่ละ module และเวลาจนถึง request แรก)
+"""
+
+import builtins
+import importlib
+import sys
+import threading
+import time
+
+class StartupTimer:
+    """
+    คลาสสำหรับวัดเวลา import ของแต่ละ module ระหว่างเริ่มโปรแกรม และเวลาจนถึง request แรก
+
+    เวลาของแต่ละ module รวมเวลาของ module ที่มันนำเข้าต่อด้วย (เหมือนคอลัมน์ cumulative ของ python -X importtime)
+    """
+
+    def __init__(self):
+        """กำหนดค่าเริ่มต้นสำหรับ Startup Timer"""
+        self.started = time.perf_counter()
+        self.imports = {}
+        self.deferred = {}
+        self.ready_seconds = None
+        self.first_request_seconds = None
+        self._original_import = None
+        self._depth = threading.local()
+        self._lock = threading.Lock()
+
+    def track_imports(self):
+        """เริ่มจับเวลา import ระดับบนสุดที่ยังไม่เคยถูกโหลด"""
+        if self._original_import is not None:
+            return
+        original = self._original_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            depth = getattr(self._depth, 'value', 0)
+            if depth or level or name in sys.modules:
+                self._depth.value = depth + 1
+                try:
+                    return original(name, globals, locals, fromlist, level)
+                finally:
+                    self._depth.value = depth
+            started = time.perf_counter()
+            self._depth.value = 1
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                self._depth.value = 0
+                self.imports[name] = self.imports.get(name, 0.0) + time.perf_counter() - started
+
+        builtins.__import__ = timed_import
+
+    def stop_tracking(self):
+        """หยุดจับเวลา import และบันทึกเวลาที่โปรแกรมพร้อมทำงาน"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+        if self.ready_seconds is None:
+            self.ready_seconds = time.perf_counter() - self.started
+
+    def record_deferred(self, name, seconds):
+        """บันทึกเวลาของ module หรือ client ที่ถูกโหลด/สร้างเมื่อใช้งานครั้งแรก"""
+        with self._lock:
+            self.deferred[name] = seconds
+
+    def first_request(self):
+        """บันทึกเวลาจนถึง request แรก (เรียกทุก request ได้ บันทึกเฉพาะครั้งแรก)"""
+        if self.first_request_seconds is None:
+            with self._lock:
+                if self.first_request_seconds is None:
+                    self.first_request_seconds = time.perf_counter() - self.started
+
+    def report(self, limit=15):
+        """
+        สรุปเวลาที่ใช้ตอนเริ่มโปรแกรม (นับจากตอนสร้าง timer ไม่รวมเวลาเริ่ม interpreter)
+
+        Args:
+            limit (int): จำนวน module ที่ใช้เวลานานที่สุดที่จะแสดง
+
+        Returns:
+            dict: เวลา (วินาที) จนพร้อมทำงาน, จนถึง request แรก, ของแต่ละ import และของสิ่งที่โหลดภายหลัง
+        """
+        imports = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)
+        report = {
+            "ready_seconds": self.ready_seconds,
+            "first_request_seconds": self.first_request_seconds,
+            "import_seconds": sum(seconds for _, seconds in imports),
+            "imports": {name: seconds for name, seconds in imports[:limit]},
+            "deferred": dict(sorted(self.deferred.items()))
+        }
+        return report
+
+class LazyModule:
+    """
+    module ที่ถูก import เมื่อมีการเข้าถึง attribute ครั้งแรก
+
+    ใช้กับ dependency ที่ใช้เพียงบาง deployment (เช่น openai, requests) เพื่อไม่ให้เพิ่มเวลาเริ่มโปรแกรม
+    """
+
+    def __init__(self, name, timer=None):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Lazy Module
+
+        Args:
+            name (str): ชื่อ module เช่น 'requests'
+            timer (StartupTimer, optional): ใช้บันทึกเวลาที่ใช้ import
+        """
+        self._name = name
+        self._timer = timer
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with self._lock:
+                module = self._module
+                if module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    if self._timer is not None:
+                        self._timer.record_deferred(self._name, time.perf_counter() - started)
+                    self._module = module
+        return module
+
+    @property
+    def loaded(self):
+        """True ถ้า module ถูก import แล้ว"""
+        return self._module is not None
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+def lazy_import(name, timer=None):
+    """
+    สร้าง module ที่ import เมื่อใช้งานครั้งแรก
+
+    Args:
+        name (str): ชื่อ module
+        timer (StartupTimer, optional): ใช้บันทึกเวลาที่ใช้ import
+
+    Returns:
+        LazyModule: object ที่ใช้แทน module ได้ (เข้าถึง attribute ได้เหมือน module)
+    """
+    return LazyModule(name, timer)
+
+class ClientFactory:
+    """
+    สร้าง client (เช่น InfluxDBClient, write API) เมื่อถูกใช้งานครั้งแรกและใช้ instance เดิมต่อ
+
+    การสร้างถูกป้องกันด้วย lock จึงมีเพียง instance เดียวแม้หลาย thread เรียกพร้อมกัน
+    การเข้าถึง attribute ของ factory จะส่งต่อไปยัง client จึงใช้แทน client ได้โดยตรง
+    """
+
+    def __init__(self, build, name=None, timer=None):
+        """
+        กำหนดค่าเริ่มต้นสำหรับ Client Factory
+
+        Args:
+            build (callable): ฟังก์ชันที่สร้างและคืนค่า client
+            name (str, optional): ชื่อที่ใช้แสดงใน repr และรายงานเวลา
+            timer (StartupTimer, optional): ใช้บันทึกเวลาที่ใช้สร้าง client
+        """
+        self._build = build
+        self._name = name or getattr(build, '__name__', 'client')
+        self._timer = timer
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        ดึง client (สร้างใหม่ถ้ายังไม่มี)
+
+        Returns:
+            object: client ที่สร้างโดย build
+        """
+        client = self._client
+        if client is None:
+            with self._lock:
+                client = self._client
+                if client is None:
+                    started = time.perf_counter()
+                    client = self._client = self._build()
+                    if self._timer is not None:
+                        self._timer.record_deferred(self._name, time.perf_counter() - started)
+        return client
+
+    @property
+    def built(self):
+        """True ถ้า client ถูกสร้างแล้ว"""
+        return self._client is not None
+
+    def close(self):
+        """ปิด client ที่สร้างไว้แล้ว (ถ้ามีเมธอด close) และให้สร้างใหม่ในการใช้งานครั้งถัดไป"""
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None and hasattr(client, 'close'):
+            client.close()
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def __repr__(self):
+        state = "built" if self.built else "not built"
+        return f"<ClientFactory {self._name} ({state})>"